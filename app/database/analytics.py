@@ -0,0 +1,195 @@
+# app/database/analytics.py
+
+"""
+Grade analytics for the performance dashboard: course averages, trend arrows and
+"why did my grade change" breakdowns.
+
+Grade history is loaded in one query into columnar arrays per course (points
+earned, points possible and percent as `array('d')`, in posting order), with
+SQLite splitting "18/20" scores into earned and possible. Every statistic is then
+a whole-column pass: running totals with `itertools.accumulate` and elementwise
+arithmetic with `map` over `operator` functions, so the per-row work stays in C
+instead of touching ORM objects.
+
+Results are cached per engine and per sync generation. `crud.upsert_grades` and
+retention call `invalidate()` when grade rows change, which bumps the generation;
+the next dashboard read rebuilds.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import accumulate, repeat
+from operator import mul, sub, truediv
+
+from sqlalchemy import Float, and_, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.database import models
+
+# Moves of the course average smaller than this (in percentage points) show as flat.
+TREND_EPSILON = 0.1
+ARROWS = {"up": "↑", "down": "↓", "flat": "→"}
+
+
+def _points_columns():
+    """
+    (earned, possible) as SQL expressions, so '18/20' is split by SQLite rather than
+    a regex per row. Scores without a positive denominator count as percent out of 100.
+    """
+    g = models.Grade
+    slash = func.instr(g.score_raw, "/")
+    possible = cast(func.substr(g.score_raw, slash + 1), Float)
+    has_points = and_(slash > 0, possible > 0)
+    return (
+        case((has_points, cast(func.substr(g.score_raw, 1, slash - 1), Float)), else_=g.score_pct),
+        case((has_points, possible), else_=100.0),
+    )
+
+
+def _round(value: float | None, digits: int = 2) -> float | None:
+    return round(value, digits) if value is not None else None
+
+
+class CourseAnalytics:
+    """One course's graded history as parallel columns, plus the derived series."""
+
+    def __init__(self, course_id: int, course_name: str, columns: dict):
+        self.course_id = course_id
+        self.course_name = course_name
+        self.assignment_ids: list[int] = columns["assignment_id"]
+        self.titles: list[str] = columns["title"]
+        self.scores: list[str | None] = columns["score_raw"]
+        self.posted: list[datetime] = columns["posted"]
+        self.earned = array("d", columns["earned"])
+        self.possible = array("d", columns["possible"])
+        self.pct = array("d", columns["pct"])
+
+        n = len(self.earned)
+        cum_earned = array("d", accumulate(self.earned))
+        cum_possible = array("d", accumulate(self.possible))
+        # Points-weighted average after each posting.
+        self.running = array("d", map(mul, map(truediv, cum_earned, cum_possible), repeat(100.0)))
+        total_e, total_p = cum_earned[-1], cum_possible[-1]
+        self.average = self.running[-1]
+        # Impact of each assignment on today's average: the average with it minus without it.
+        if n > 1:
+            without = map(truediv, map(sub, repeat(total_e), self.earned), map(sub, repeat(total_p), self.possible))
+            self.impact = array("d", map(sub, repeat(self.average), map(mul, without, repeat(100.0))))
+        else:
+            self.impact = array("d", [0.0])
+
+        # The latest posting batch (one sync posts several grades at the same instant).
+        self.batch_start = bisect_left(self.posted, self.posted[-1])
+        self.previous_average = self.running[self.batch_start - 1] if self.batch_start else None
+        if self.previous_average is None:
+            self.delta, self.trend = None, None
+        else:
+            self.delta = self.average - self.previous_average
+            self.trend = "up" if self.delta > TREND_EPSILON else "down" if self.delta < -TREND_EPSILON else "flat"
+
+    def __len__(self):
+        return len(self.earned)
+
+    def _entry(self, i: int) -> dict:
+        return {
+            "assignmentId": self.assignment_ids[i],
+            "assignment": self.titles[i],
+            "score": self.scores[i],
+            "percent": _round(self.pct[i]),
+            "postedAt": self.posted[i].isoformat(),
+            "impact": _round(self.impact[i]),
+        }
+
+    def summary(self) -> dict:
+        return {
+            "courseId": self.course_id,
+            "course": self.course_name,
+            "average": _round(self.average),
+            "graded": len(self),
+            "pointsEarned": _round(sum(self.earned)),
+            "pointsPossible": _round(sum(self.possible)),
+            "previousAverage": _round(self.previous_average),
+            "delta": _round(self.delta),
+            "trend": self.trend,
+            "arrow": ARROWS.get(self.trend, ""),
+            "lastPostedAt": self.posted[-1].isoformat(),
+        }
+
+    def detail(self, history_points: int = 20, top: int = 5) -> dict:
+        """Average over time, the latest change broken down, and the biggest movers."""
+        n = len(self)
+        step = max(1, -(-n // history_points))
+        picks = list(range(n - 1, -1, -step))[::-1]
+        by_impact = sorted(range(n), key=lambda i: self.impact[i])
+        return {
+            "history": [{"at": self.posted[i].isoformat(), "average": _round(self.running[i])} for i in picks],
+            "lastChange": [self._entry(i) for i in range(self.batch_start, n)],
+            "helping": [self._entry(i) for i in reversed(by_impact[-top:]) if self.impact[i] > 0],
+            "hurting": [self._entry(i) for i in by_impact[:top] if self.impact[i] < 0],
+        }
+
+
+class Dashboard:
+    def __init__(self, courses: list[CourseAnalytics], generation: int, build_ms: float):
+        self.courses = {c.course_id: c for c in courses}
+        self.generation = generation
+        self.build_ms = build_ms
+        self.built_at = time.time()
+
+    def summaries(self) -> list[dict]:
+        return sorted((c.summary() for c in self.courses.values()), key=lambda s: s["course"] or "")
+
+
+def load(db: Session, generation: int = 0) -> Dashboard:
+    t0 = time.perf_counter()
+    g = models.Grade
+    rows = db.execute(
+        select(g.course_id, g.course_name, g.assignment_id, g.assignment_title, g.score_raw, *_points_columns(),
+               g.score_pct, g.posted_at_utc)
+        .where(g.score_pct.is_not(None))
+        .order_by(g.course_id, g.posted_at_utc, g.id)
+    ).all()
+    courses = []
+    if rows:
+        # Transpose once, then slice each column at the course boundaries.
+        course_ids, names, *columns = map(list, zip(*rows))
+        keys = ("assignment_id", "title", "score_raw", "earned", "possible", "pct", "posted")
+        for course_id in dict.fromkeys(course_ids):
+            lo, hi = bisect_left(course_ids, course_id), bisect_right(course_ids, course_id)
+            courses.append(CourseAnalytics(course_id, names[hi - 1], {k: col[lo:hi] for k, col in zip(keys, columns)}))
+    return Dashboard(courses, generation, (time.perf_counter() - t0) * 1000)
+
+
+_dashboards: "weakref.WeakKeyDictionary[object, Dashboard]" = weakref.WeakKeyDictionary()
+_generations: "weakref.WeakKeyDictionary[object, int]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def invalidate(db: Session):
+    """Grades changed: start a new generation and drop the cached dashboard."""
+    bind = db.get_bind()
+    with _lock:
+        _generations[bind] = _generations.get(bind, 0) + 1
+        _dashboards.pop(bind, None)
+
+
+def get(db: Session) -> Dashboard:
+    """The dashboard for the current generation of `db`'s grades, built on first use."""
+    bind = db.get_bind()
+    with _lock:
+        generation = _generations.get(bind, 0)
+        dash = _dashboards.get(bind)
+    if dash is not None and dash.generation == generation:
+        return dash
+    dash = load(db, generation)
+    with _lock:
+        # A write that landed while we were loading leaves this one stale; don't cache it.
+        if _generations.get(bind, 0) == generation:
+            _dashboards[bind] = dash
+    logging.info(f"Grade analytics rebuilt: {len(dash.courses)} course(s) in {dash.build_ms:.1f} ms")
+    return dash
@@ -1,35 +1,54 @@
 # app/database/crud.py
 
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
 from zoneinfo import ZoneInfo  # <-- KEEP THIS FOR REFERENCE, BUT NO LONGER USED IN PARSING  # noqa: F401
-from app.database import models
-import re
+from app.database import models, analytics, derived, read_model, retention
 
 # ---- FIXED: Remove status filter since it's not being set by sync ----
-def upcoming_assignments(db: Session, window_hours: int = 48, limit: int = 20):
+def upcoming_assignments(db: Session, window_hours: int = 48, limit: int = 20, types: list[str] | None = None):
     """
-    Return assignments due within the next `window_hours`.
+    Return assignments due within the next `window_hours`, optionally only those
+    whose stored `assignment_type` is in `types` (e.g. ["Test", "Quiz"]).
+    Served from the in-memory read model when available, else from SQL.
     """
     now = datetime.now(timezone.utc)
     end = now + timedelta(hours=window_hours)
+    snap = read_model.get(db)
+    if snap is not None and snap.covers(now):
+        return snap.upcoming(now, end, limit=limit, types=types)
+    return upcoming_assignments_sql(db, now, end, limit, types)
+
+def upcoming_assignments_sql(db: Session, start: datetime, end: datetime, limit: int | None = 20,
+                             types: list[str] | None = None) -> list[read_model.AssignmentView]:
+    """
+    The SQL side of `upcoming_assignments`. Selects only the `AssignmentView` columns,
+    so rows come back as plain tuples without ORM identity-map or change tracking.
+    """
+    a = models.Assignment
     q = (
-        db.query(models.Assignment)
-        # REMOVED: .filter(models.Assignment.status == "open")
-        .filter(models.Assignment.due_at_utc != None)  # noqa: E711
-        .filter(models.Assignment.due_at_utc >= now)
-        .filter(models.Assignment.due_at_utc <= end)
-        .order_by(models.Assignment.due_at_utc.asc())
-        .limit(limit)
+        select(*read_model.COLUMNS)
+        .where(a.due_at_utc.is_not(None))
+        .where(a.due_at_utc >= start)
+        .where(a.due_at_utc <= end)
     )
-    return q.all()
+    if types:
+        q = q.where(a.assignment_type.in_(types))
+    q = q.order_by(a.due_at_utc.asc(), a.id).limit(limit)
+    return list(map(read_model.AssignmentView._make, db.execute(q)))
 
 def parse_html_title(html_title: str) -> str:
     """Extracts clean text from the Schoology HTML title."""
-    if not html_title:
-        return "Untitled"
-    clean = re.sub('<.*?>', '', html_title)
-    return clean.strip()
+    return derived.clean_title(html_title)
+
+def _item_title(item: dict, default: str) -> str:
+    if item.get('titleText'):
+        return item['titleText']
+    if item.get('title'):
+        return derived.clean_title(item['title'])
+    return default
 
 def parse_schoology_date(date_str: str) -> datetime | None:
     """
@@ -46,11 +65,67 @@ def parse_schoology_date(date_str: str) -> datetime | None:
     return dt_naive.replace(tzinfo=timezone.utc)
 
 
-def upsert_calendar_events(db: Session, events: list[dict]):
+def _utc_naive(value):
+    # SQLite hands datetimes back naive (they are stored as UTC); compare like with like.
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _set_if_changed(row, **values) -> bool:
+    """Assign only the attributes whose value actually differs; True if any did."""
+    changed = False
+    for name, value in values.items():
+        if _utc_naive(getattr(row, name)) != _utc_naive(value):
+            setattr(row, name, value)
+            changed = True
+    return changed
+
+# Assignments found only on course materials pages are keyed by their Schoology
+# assignment id plus this offset, so they never share an id with a calendar event row.
+# Schoology ids stay well below 2**39, and search.py packs ids into 40 bits.
+MATERIALS_ID_OFFSET = 1 << 39
+
+
+def materials_row_id(assignment_id: int) -> int:
+    return MATERIALS_ID_OFFSET + assignment_id
+
+
+def _merge_duplicate_assignments(db: Session, calendar_urls: dict[str, int]) -> int:
+    """
+    Drop rows (materials-only assignments, typically) that duplicate a calendar
+    assignment's URL, moving any planner task that pointed at them to the calendar row.
+    """
+    if not calendar_urls:
+        return 0
+    dupes = db.execute(
+        select(models.Assignment.id, models.Assignment.url)
+        .where(models.Assignment.url.in_(calendar_urls))
+        .where(models.Assignment.id.notin_(calendar_urls.values()))
+    ).all()
+    for row in dupes:
+        db.execute(
+            update(models.PlannerTask)
+            .where(models.PlannerTask.schoology_assignment_id == row.id)
+            .values(schoology_assignment_id=calendar_urls[row.url])
+        )
+        db.execute(delete(models.Assignment).where(models.Assignment.id == row.id))
+    return len(dupes)
+
+
+def upsert_calendar_events(db: Session, events: list[dict]) -> dict:
     """
     Takes a list of raw event dicts from the SchoologyClient and updates or inserts
     them into the database, distinguishing between Assignments and Events.
+    Returns insert/update counts; rows whose fields are all unchanged count as unchanged.
+    A materials-only row for an assignment the calendar now has is merged into the
+    calendar row and counted as updated. Assignments due before the retention cutoff
+    (and events before theirs) are skipped, so an archive replay can't bring back rows retention already moved out.
     """
+    inserted = updated = unchanged = skipped = 0
+    now = datetime.now(timezone.utc)
+    oldest = retention.cutoff("assignments", now)
+    oldest_event = retention.cutoff("events", now)
+    calendar_urls: dict[str, int] = {}
     for item in events:
         is_assignment_type = item.get('e_type') in ['assignment', 'assessment', 'common-assessment', 'discussion']
         
@@ -62,48 +137,321 @@ def upsert_calendar_events(db: Session, events: list[dict]):
                 
             # Use the correct assignment ID and append '/info' for robust linking
             assignment_url = f"https://classes.esdallas.org/assignment/{assignment_id_for_link}/info"
-            
+            calendar_urls[assignment_url] = item['id']
+            due = parse_schoology_date(item.get('start'))
+            if due is not None and oldest is not None and due < oldest:
+                skipped += 1
+                continue
+
             existing_assignment = db.query(models.Assignment).filter(models.Assignment.id == item['id']).first()
             
             if existing_assignment:
                 # Update existing assignment
-                existing_assignment.title = item.get('titleText', 'Untitled Assignment')
-                existing_assignment.due_at_utc = parse_schoology_date(item.get('start'))
-                existing_assignment.course_name = item.get('content_title', 'Unknown Course')
-                existing_assignment.url = assignment_url
-                existing_assignment.status = "open"  # SET STATUS HERE
-                existing_assignment.last_seen_at_utc = datetime.now(timezone.utc)
+                changed = _set_if_changed(
+                    existing_assignment,
+                    title=_item_title(item, 'Untitled Assignment'),
+                    due_at_utc=due,
+                    course_name=item.get('content_title', 'Unknown Course'),
+                    url=assignment_url,
+                    status="open",  # SET STATUS HERE
+                )
+                existing_assignment.last_seen_at_utc = now
+                if changed:
+                    derived.apply_to_assignment(existing_assignment)
+                    updated += 1
+                else:
+                    unchanged += 1
             else:
                 # Create new assignment
                 new_assignment = models.Assignment(
                     id=item['id'],
-                    title=item.get('titleText', 'Untitled Assignment'),
-                    due_at_utc=parse_schoology_date(item.get('start')),
+                    title=_item_title(item, 'Untitled Assignment'),
+                    due_at_utc=due,
                     course_name=item.get('content_title', 'Unknown Course'),
                     url=assignment_url,
                     course_id=item.get('realm_id'),
                     status="open",  # SET STATUS HERE
                 )
+                derived.apply_to_assignment(new_assignment)
                 db.add(new_assignment)
+                inserted += 1
         else:
             # It's a generic event, handle it in the Event table
+            start = parse_schoology_date(item.get('start'))
+            if start is not None and oldest_event is not None and start < oldest_event:
+                skipped += 1
+                continue
             existing_event = db.query(models.Event).filter(models.Event.id == item['id']).first()
 
             if existing_event:
                 # Update existing event
-                existing_event.title = item.get('titleText', 'Untitled Event')
-                existing_event.start_utc = parse_schoology_date(item.get('start'))
-                existing_event.end_utc = parse_schoology_date(item.get('end')) if item.get('has_end') == '1' else None
-                existing_event.source = item.get('content_title', 'Unknown Source')
+                changed = _set_if_changed(
+                    existing_event,
+                    title=_item_title(item, 'Untitled Event'),
+                    start_utc=start,
+                    end_utc=parse_schoology_date(item.get('end')) if item.get('has_end') == '1' else None,
+                    source=item.get('content_title', 'Unknown Source'),
+                )
+                if changed:
+                    updated += 1
+                else:
+                    unchanged += 1
             else:
                 # Create new event
                 new_event = models.Event(
                     id=item['id'],
-                    title=item.get('titleText', 'Untitled Event'),
-                    start_utc=parse_schoology_date(item.get('start')),
+                    title=_item_title(item, 'Untitled Event'),
+                    start_utc=start,
                     end_utc=parse_schoology_date(item.get('end')) if item.get('has_end') == '1' else None,
                     source=item.get('content_title', 'Unknown Source'),
                 )
                 db.add(new_event)
-                
-    db.commit()
\ No newline at end of file
+                inserted += 1
+
+    updated += _merge_duplicate_assignments(db, calendar_urls)
+    db.commit()
+    if inserted or updated:
+        read_model.invalidate(db)
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged, "skipped": skipped}
+
+
+def upsert_grades(db: Session, grades: list[dict], emit_alerts: bool = True) -> dict:
+    """
+    Writes only new or changed grade rows. Stored `(course_id, assignment_id) ->
+    score_raw` is loaded for all affected courses in one query and diffed in memory,
+    then inserts and updates are issued as two executemany batches.
+
+    Every newly posted score (or changed score) is also appended to `grade_alerts`.
+    A course seen for the first time is treated as a baseline and raises no alerts,
+    so the initial sync doesn't report a whole transcript as "new". Replays from the
+    response archive pass `emit_alerts=False`.
+    """
+    if not grades:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "alerts": 0}
+    # One row per (course_id, assignment_id); the last copy in the input wins.
+    grades = list({(g["course_id"], g["assignment_id"]): g for g in grades}.values())
+
+    course_ids = {g["course_id"] for g in grades}
+    stored = {
+        (row.course_id, row.assignment_id): row
+        for row in db.execute(
+            select(
+                models.Grade.id, models.Grade.course_id, models.Grade.assignment_id,
+                models.Grade.score_raw, models.Grade.assignment_title, models.Grade.course_name,
+            ).where(models.Grade.course_id.in_(course_ids))
+        )
+    }
+    known_courses = {course_id for course_id, _ in stored}
+
+    now = datetime.now(timezone.utc)
+    to_insert, to_update, alerts = [], [], []
+    unchanged = 0
+    for g in grades:
+        key = (g["course_id"], g["assignment_id"])
+        row = stored.get(key)
+        if row is None:
+            to_insert.append({**g, "posted_at_utc": now})
+            continue
+        if (row.score_raw, row.assignment_title, row.course_name) == (
+            g["score_raw"], g["assignment_title"], g["course_name"]
+        ):
+            unchanged += 1
+            continue
+        to_update.append({
+            "id": row.id,
+            "score_raw": g["score_raw"],
+            "score_pct": g["score_pct"],
+            "assignment_title": g["assignment_title"],
+            "course_name": g["course_name"],
+        })
+        if g["score_raw"] is not None and g["score_raw"] != row.score_raw:
+            to_update[-1]["posted_at_utc"] = now
+            alerts.append(_grade_alert(row.id, "changed", g, row.score_raw, now))
+
+    if to_insert:
+        inserted = db.execute(
+            insert(models.Grade).returning(models.Grade.id, models.Grade.course_id, models.Grade.assignment_id),
+            to_insert,
+        ).all()
+        new_ids = {(r.course_id, r.assignment_id): r.id for r in inserted}
+        for g in to_insert:
+            if g["score_raw"] is not None and g["course_id"] in known_courses:
+                alerts.append(_grade_alert(new_ids[(g["course_id"], g["assignment_id"])], "new", g, None, now))
+    if to_update:
+        db.execute(update(models.Grade), to_update)
+    if alerts and emit_alerts:
+        db.execute(insert(models.GradeAlert), alerts)
+    db.commit()
+    if to_insert or to_update:
+        analytics.invalidate(db)
+
+    return {
+        "inserted": len(to_insert), "updated": len(to_update), "unchanged": unchanged,
+        "alerts": len(alerts) if emit_alerts else 0,
+    }
+
+
+def _grade_alert(grade_id: int, kind: str, g: dict, previous: str | None, now: datetime) -> dict:
+    return {
+        "grade_id": grade_id,
+        "kind": kind,
+        "course_id": g["course_id"],
+        "course_name": g["course_name"],
+        "assignment_id": g["assignment_id"],
+        "assignment_title": g["assignment_title"],
+        "score_raw": g["score_raw"],
+        "previous_score_raw": previous,
+        "score_pct": g["score_pct"],
+        "created_at_utc": now,
+    }
+
+
+class GradeAlertView(NamedTuple):
+    """Read-only grade alert row; same attribute names as `models.GradeAlert`."""
+    id: int
+    kind: str
+    course_name: str
+    assignment_title: str
+    score_raw: str | None
+    previous_score_raw: str | None
+    score_pct: float | None
+    created_at_utc: datetime | None
+
+
+_GRADE_ALERT_COLUMNS = [getattr(models.GradeAlert, f) for f in GradeAlertView._fields]
+
+
+def recent_grade_alerts(db: Session, since_id: int | None = None, limit: int = 20) -> list[GradeAlertView]:
+    """
+    Newest grade alerts first. Walks the `grade_alerts` primary key only, so cost is
+    proportional to `limit`, not to the size of the `grades` table. Pass the highest
+    `id` already seen as `since_id` to read just what's new.
+    """
+    q = select(*_GRADE_ALERT_COLUMNS)
+    if since_id is not None:
+        q = q.where(models.GradeAlert.id > since_id)
+    q = q.order_by(models.GradeAlert.id.desc()).limit(limit)
+    return list(map(GradeAlertView._make, db.execute(q)))
+
+
+def upsert_feed_updates(db: Session, updates: list[dict], sanitizer=None) -> dict:
+    """
+    Stores feed posts (`id, author, content_html, posted_at_utc, source`, raw HTML).
+    A post whose raw HTML hashes to the stored `content_sha256` is not sanitized
+    again; only new or edited bodies go through the sanitizer (itself cached by hash).
+    """
+    if not updates:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+    # Feed pages are offset-based: a post published between page fetches appears on two
+    # pages. Keep one copy per id (the last seen) so the batch insert can't collide.
+    updates = list({u["id"]: u for u in updates}.values())
+    from app.schoology_client.sanitize import content_hash, get_sanitizer
+    sanitizer = sanitizer or get_sanitizer()
+
+    stored = {
+        row.id: row
+        for row in db.execute(
+            select(models.Update.id, models.Update.content_sha256, models.Update.author, models.Update.source)
+            .where(models.Update.id.in_([u["id"] for u in updates]))
+        )
+    }
+    hashes = [content_hash(u["content_html"]) for u in updates]
+    dirty = [i for i, (u, h) in enumerate(zip(updates, hashes))
+             if u["id"] not in stored or stored[u["id"]].content_sha256 != h]
+    sanitizer.note_stored(len(updates) - len(dirty))
+    cleaned = dict(zip(dirty, sanitizer.sanitize_many(
+        [updates[i]["content_html"] for i in dirty], [hashes[i] for i in dirty]
+    )))
+
+    to_insert, to_update = [], []
+    unchanged = 0
+    for i, (u, h) in enumerate(zip(updates, hashes)):
+        values = {"id": u["id"], "author": u["author"], "source": u["source"]}
+        if i in cleaned:
+            values.update(content_html_sanitized=cleaned[i], content_sha256=h)
+        row = stored.get(u["id"])
+        if row is None:
+            to_insert.append({**values, "posted_at_utc": u["posted_at_utc"]})
+        elif i in cleaned or (row.author, row.source) != (u["author"], u["source"]):
+            to_update.append(values)
+        else:
+            unchanged += 1
+    if to_insert:
+        db.execute(insert(models.Update), to_insert)
+    if to_update:
+        # Rows differ in which columns they set; group so each executemany is uniform.
+        for keys in {tuple(sorted(v)) for v in to_update}:
+            db.execute(update(models.Update), [v for v in to_update if tuple(sorted(v)) == keys])
+    db.commit()
+    return {"inserted": len(to_insert), "updated": len(to_update), "unchanged": unchanged}
+
+
+def upsert_course_materials(db: Session, records: list) -> dict:
+    """
+    Fills in assignments that appear on course materials pages but not on the calendar
+    (typically undated ones). Rows the calendar already links to the same assignment URL
+    are left alone, since the calendar is the authoritative source for due dates.
+    Rows written here use `materials_row_id()`, never the calendar's event ids.
+    """
+    if not records:
+        return {"inserted": 0, "updated": 0, "skipped": 0}
+
+    row_ids = [materials_row_id(r.assignment_id) for r in records]
+    on_calendar = set(db.scalars(
+        select(models.Assignment.url).where(models.Assignment.url.in_({r.url for r in records}))
+        .where(models.Assignment.id.notin_(row_ids))
+    ))
+    course_names = dict(db.execute(
+        select(models.Assignment.course_id, models.Assignment.course_name)
+        .where(models.Assignment.course_id.in_({r.course_id for r in records}))
+        .group_by(models.Assignment.course_id)
+    ).all())
+    existing = {a.id: a for a in db.query(models.Assignment).filter(models.Assignment.id.in_(row_ids))}
+
+    inserted = updated = skipped = 0
+    now = datetime.now(timezone.utc)
+    # Don't re-ingest assignments retention has already archived.
+    oldest = retention.cutoff("assignments", now)
+    for r, row_id in zip(records, row_ids):
+        if r.url in on_calendar:
+            skipped += 1
+            continue
+        due = datetime.fromisoformat(r.due_at_utc) if r.due_at_utc else None
+        if due is not None and oldest is not None and due < oldest:
+            skipped += 1
+            continue
+        row = existing.get(row_id)
+        if row is None:
+            row = models.Assignment(
+                id=row_id,
+                course_id=r.course_id,
+                course_name=course_names.get(r.course_id, f"Course {r.course_id}"),
+                title=r.title,
+                due_at_utc=due,
+                url=r.url,
+                status="open",
+            )
+            db.add(row)
+            existing[row_id] = row
+            inserted += 1
+        else:
+            row.last_seen_at_utc = now
+            if not _set_if_changed(row, title=r.title, due_at_utc=due):
+                continue
+            updated += 1
+        derived.apply_to_assignment(row)
+    db.commit()
+    if inserted or updated:
+        read_model.invalidate(db)
+    return {"inserted": inserted, "updated": updated, "skipped": skipped}
+
+
+def backfill_assignment_derived(db: Session) -> int:
+    """Compute derived columns for rows stored before those columns existed."""
+    rows = db.query(models.Assignment).filter(models.Assignment.assignment_type == None).all()  # noqa: E711
+    for a in rows:
+        derived.apply_to_assignment(a)
+    if rows:
+        db.commit()
+        read_model.invalidate(db)
+    return len(rows)
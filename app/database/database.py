@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from app.database.schema import DATABASE_PATH, SCHEMA_VERSION
 
-DATABASE_URL = "sqlite:///schoology.db"
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
 engine = create_engine(
     DATABASE_URL, connect_args={"check_same_thread": False}
@@ -9,13 +11,107 @@ engine = create_engine(
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
-def init_db():
-    # pragma tuning for local SQLite
-    with engine.connect() as conn:
+@event.listens_for(Engine, "connect")
+def _on_sqlite_connect(dbapi_conn, _record):
+    if not type(dbapi_conn).__module__.startswith("sqlite3"):
+        return
+    # synchronous is per-connection, so it belongs here rather than in init_db().
+    dbapi_conn.execute("PRAGMA synchronous=NORMAL;")
+    # Truncate the WAL back to this size after checkpoints instead of letting it sit at its peak.
+    dbapi_conn.execute("PRAGMA journal_size_limit=67108864;")
+    # The search_index triggers call strip_html(), so every SQLite connection needs it.
+    from app.database.search import strip_html
+    dbapi_conn.create_function("strip_html", 1, strip_html, deterministic=True)
+
+def init_db(bind: Engine = engine, force: bool = False):
+    """
+    Build or migrate the schema. When the database is already stamped with the current
+    SCHEMA_VERSION this is a single PRAGMA read and no DDL runs.
+    """
+    with bind.connect() as conn:
+        if not force and conn.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION:
+            return
+        # Retention frees pages; incremental auto-vacuum lets idle_vacuum() return them
+        # to the filesystem in small steps. Set before anything else touches a new file;
+        # an existing file needs one VACUUM to switch.
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL;")
+            if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+                conn.exec_driver_sql("VACUUM;")
+        # pragma tuning for local SQLite (journal_mode is persistent in the file)
         conn.exec_driver_sql("PRAGMA journal_mode=WAL;")
-        conn.exec_driver_sql("PRAGMA synchronous=NORMAL;")
     from app.database import models  # ensure models registered
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        _dedupe_grades(conn)
+        _add_missing_columns(conn)
+    from app.database.search import init_search_index, rebuild_search_index
+    with bind.begin() as conn:
+        init_search_index(conn)
+        if _rekey_material_assignments(conn):
+            rebuild_search_index(conn)
+    from app.database.read_model import init_version_tracking
+    with bind.begin() as conn:
+        init_version_tracking(conn)
+    from app.database.crud import backfill_assignment_derived
+    with Session(bind=bind) as db:
+        backfill_assignment_derived(db)
+    with bind.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _add_missing_columns(conn):
+    """
+    create_all() only creates missing tables. Columns and indexes added to a model
+    later are applied here with ALTER TABLE so an existing schoology.db keeps working.
+    """
+    insp = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {col.type.compile(dialect=conn.dialect)}'
+            if col.server_default is not None:
+                ddl += f" DEFAULT {col.server_default.arg}"
+            conn.exec_driver_sql(ddl)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+def _dedupe_grades(conn):
+    """
+    Older versions could store one grade twice. Keep the first row per
+    (course_id, assignment_id), move its duplicates' alerts onto it, and drop the
+    rest, so the unique index can be created.
+    """
+    keep = "SELECT MIN(id) FROM grades GROUP BY course_id, assignment_id"
+    conn.exec_driver_sql(
+        "UPDATE grade_alerts SET grade_id = (SELECT MIN(k.id) FROM grades d JOIN grades k "
+        "ON k.course_id = d.course_id AND k.assignment_id = d.assignment_id WHERE d.id = grade_alerts.grade_id) "
+        f"WHERE grade_id IN (SELECT id FROM grades WHERE id NOT IN ({keep}))"
+    )
+    conn.exec_driver_sql(f"DELETE FROM grades WHERE id NOT IN ({keep})")
+
+def _rekey_material_assignments(conn) -> int:
+    """
+    Materials-only assignments used to be stored under their Schoology assignment id,
+    which shares `assignments.id` with calendar event ids. Move them (and planner tasks
+    pointing at them) to `crud.materials_row_id()`. They are recognised by a URL built
+    from their own id; a calendar row caught by that (no content_id) is merged back
+    by the next calendar upsert.
+    """
+    from app.database.crud import MATERIALS_ID_OFFSET
+    legacy = (
+        "SELECT id FROM assignments WHERE id < :offset "
+        "AND url = 'https://classes.esdallas.org/assignment/' || id || '/info'"
+    )
+    params = {"offset": MATERIALS_ID_OFFSET}
+    conn.execute(text(
+        f"UPDATE planner_tasks SET schoology_assignment_id = schoology_assignment_id + :offset "
+        f"WHERE schoology_assignment_id IN ({legacy})"
+    ), params)
+    return conn.execute(text(f"UPDATE assignments SET id = id + :offset WHERE id IN ({legacy})"), params).rowcount
 
 # FastAPI deps pattern (used in /mcp route)
 def get_db():
@@ -0,0 +1,52 @@
+# app/database/derived.py
+
+"""
+Values derived from raw Schoology fields once, at ingest time, and stored as columns.
+
+Read paths (`briefing.get` and friends) project these stored values instead of
+re-classifying titles and re-formatting dates for every row on every request.
+"""
+
+import re
+from datetime import datetime
+
+_TAG_RE = re.compile(r"<.*?>")
+
+ASSIGNMENT_TYPES = ("Test", "Quiz", "Project", "Paper", "Homework")
+
+
+def clean_title(html_title: str | None) -> str:
+    """Extracts clean text from the Schoology HTML title."""
+    if not html_title:
+        return "Untitled"
+    return _TAG_RE.sub("", html_title).strip()
+
+
+def assignment_type(title: str | None) -> str:
+    """Identify assignment type from its title."""
+    title_lower = (title or "").lower()
+    if "test" in title_lower:
+        return "Test"
+    if "quiz" in title_lower:
+        return "Quiz"
+    if "project" in title_lower:
+        return "Project"
+    if "essay" in title_lower or "paper" in title_lower:
+        return "Paper"
+    return "Homework"  # Default
+
+
+def due_display(dt: datetime | None) -> str:
+    if not dt:
+        return ""
+    try:
+        # Use '%-I' on Unix-like systems for non-padded hour, fallback to '%I'
+        return dt.strftime("%a, %b %d @ %-I:%M %p").replace('AM', 'am').replace('PM', 'pm')
+    except ValueError:
+        return dt.strftime("%a, %b %d @ %I:%M %p").replace('AM', 'am').replace('PM', 'pm')
+
+
+def apply_to_assignment(assignment) -> None:
+    """Fill the derived columns of an `Assignment` from its title and due date."""
+    assignment.assignment_type = assignment_type(assignment.title)
+    assignment.due_display = due_display(assignment.due_at_utc)
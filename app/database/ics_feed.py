@@ -0,0 +1,156 @@
+# app/database/ics_feed.py
+
+"""
+iCalendar (RFC 5545) export of assignments and events, for phone/desktop calendars.
+
+Calendar clients poll subscribed feeds often, so the feed is never rendered on the
+request path: `refresh()` runs after a sync that changed calendar data and swaps in
+a `FeedSnapshot` holding the finished bytes, a gzip copy, a strong ETag and a
+Last-Modified time. A refresh whose content matches the current snapshot keeps it
+(validators included), so pollers keep getting 304s.
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import models
+
+PRODID = "-//schoology-copilot//calendar feed//EN"
+CALENDAR_NAME = "Schoology"
+PAST_DAYS = 30  # how far back the feed reaches; everything upcoming is included
+
+
+class FeedSnapshot(NamedTuple):
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    last_modified: datetime
+    last_modified_http: str
+    events: int
+
+
+_snapshot: FeedSnapshot | None = None
+_lock = threading.Lock()
+
+
+def _escape(value: str | None) -> str:
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Fold to 75-octet lines as RFC 5545 requires, without splitting a UTF-8 sequence."""
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts, chunk, limit = [], b"", 75
+    for ch in line:
+        b = ch.encode()
+        if len(chunk) + len(b) > limit:
+            parts.append(chunk.decode())
+            chunk, limit = b"", 74  # continuation lines start with a space
+        chunk += b
+    parts.append(chunk.decode())
+    return "\r\n ".join(parts)
+
+
+def _ts(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _vevents(db: Session, since: datetime) -> list[list[str]]:
+    """One property list per VEVENT, minus DTSTAMP (added once the content is known to have changed)."""
+    out = []
+    assignments = db.execute(
+        select(models.Assignment.id, models.Assignment.title, models.Assignment.course_name,
+               models.Assignment.url, models.Assignment.due_at_utc, models.Assignment.assignment_type)
+        .where(models.Assignment.due_at_utc >= since)
+        .order_by(models.Assignment.due_at_utc, models.Assignment.id)
+    )
+    for a in assignments:
+        props = [
+            f"UID:assignment-{a.id}@schoology-copilot",
+            f"DTSTART:{_ts(a.due_at_utc)}",
+            f"DTEND:{_ts(a.due_at_utc)}",
+            f"SUMMARY:{_escape(a.title)}",
+            f"DESCRIPTION:{_escape(' · '.join(p for p in (a.course_name, a.assignment_type) if p))}",
+            f"CATEGORIES:{_escape(a.assignment_type or 'Assignment')}",
+        ]
+        if a.url:
+            props.append(f"URL:{a.url}")
+        out.append(props)
+
+    events = db.execute(
+        select(models.Event.id, models.Event.title, models.Event.source,
+               models.Event.start_utc, models.Event.end_utc)
+        .where(models.Event.start_utc >= since)
+        .order_by(models.Event.start_utc, models.Event.id)
+    )
+    for e in events:
+        props = [
+            f"UID:event-{e.id}@schoology-copilot",
+            f"DTSTART:{_ts(e.start_utc)}",
+        ]
+        if e.end_utc:
+            props.append(f"DTEND:{_ts(e.end_utc)}")
+        props += [f"SUMMARY:{_escape(e.title)}", f"DESCRIPTION:{_escape(e.source)}"]
+        out.append(props)
+    return out
+
+
+def _render(vevents: list[list[str]], stamp: str) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{CALENDAR_NAME}", "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+    ]
+    for props in vevents:
+        lines += ["BEGIN:VEVENT", f"DTSTAMP:{stamp}", *props, "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(l) for l in lines) + "\r\n").encode()
+
+
+def refresh(db: Session) -> FeedSnapshot:
+    """Rebuild the feed from the database; keeps the current snapshot if nothing changed."""
+    global _snapshot
+    now = datetime.now(timezone.utc)
+    vevents = _vevents(db, now - timedelta(days=PAST_DAYS))
+    digest = hashlib.sha256("\n".join("\n".join(p) for p in vevents).encode()).hexdigest()
+    etag = f'"{digest[:32]}"'
+    with _lock:
+        if _snapshot is not None and _snapshot.etag == etag:
+            return _snapshot
+        body = _render(vevents, _ts(now))
+        modified = now.replace(microsecond=0)
+        _snapshot = FeedSnapshot(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=etag,
+            last_modified=modified,
+            last_modified_http=format_datetime(modified, usegmt=True),
+            events=len(vevents),
+        )
+    logging.info(f"Calendar feed rebuilt: {len(vevents)} events, {len(body)} bytes")
+    return _snapshot
+
+
+def get_snapshot(db_factory=None) -> FeedSnapshot | None:
+    """
+    The current snapshot. Before the first sync-driven refresh (e.g. just after
+    startup) one is built on demand from `db_factory()`, if given.
+    """
+    if _snapshot is None and db_factory is not None:
+        db = db_factory()
+        try:
+            return refresh(db)
+        finally:
+            db.close()
+    return _snapshot
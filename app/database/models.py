@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime, Text, Enum
+from sqlalchemy import String, Integer, DateTime, Text, Enum, Index
 from datetime import datetime, timezone
 from app.database.database import Base
 
@@ -16,6 +16,11 @@ class Assignment(Base):
     url: Mapped[str | None] = mapped_column(String(1024))
     status: Mapped[str] = mapped_column(String(32), default="open")
     last_seen_at_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, index=True)
+    # Derived at ingest (see app/database/derived.py) so reads just project them.
+    assignment_type: Mapped[str | None] = mapped_column(String(16))
+    due_display: Mapped[str | None] = mapped_column(String(64))
+
+    __table_args__ = (Index("ix_assignments_type_due", "assignment_type", "due_at_utc"),)
 
 class Event(Base):
     __tablename__ = "events"
@@ -30,6 +35,8 @@ class Update(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     author: Mapped[str] = mapped_column(String(255))
     content_html_sanitized: Mapped[str] = mapped_column(Text)
+    # SHA-256 of the raw HTML the sanitized body came from; unchanged posts skip bleach.
+    content_sha256: Mapped[str | None] = mapped_column(String(64))
     posted_at_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
     source: Mapped[str] = mapped_column(String(255))
 
@@ -44,6 +51,8 @@ class Grade(Base):
     score_pct: Mapped[float | None] = mapped_column()
     posted_at_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, index=True)
 
+    __table_args__ = (Index("ux_grades_course_assignment", "course_id", "assignment_id", unique=True),)
+
 class PlannerTask(Base):
     __tablename__ = "planner_tasks"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -53,3 +62,32 @@ class PlannerTask(Base):
     schoology_assignment_id: Mapped[int | None] = mapped_column(Integer, index=True)
     column: Mapped[str] = mapped_column(String(16), default="todo")  # 'todo','in_progress','done'
     priority: Mapped[int] = mapped_column(Integer, default=0)
+    # Fractional (lexicographic) position within `column`; a move rewrites only this row.
+    rank: Mapped[str | None] = mapped_column(String(255))
+    # Bumped on every write; clients send it back for optimistic concurrency checks.
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    completed_at_utc: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    updated_at_utc: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+    __table_args__ = (Index("ix_planner_tasks_column_rank", "column", "rank"),)
+
+class GradeAlert(Base):
+    """Append-only stream of newly posted or changed grades, read newest-first by id."""
+    __tablename__ = "grade_alerts"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    grade_id: Mapped[int] = mapped_column(Integer, index=True)
+    kind: Mapped[str] = mapped_column(String(16))  # 'new'|'changed'
+    course_id: Mapped[int] = mapped_column(Integer)
+    course_name: Mapped[str] = mapped_column(String(255))
+    assignment_id: Mapped[int] = mapped_column(Integer)
+    assignment_title: Mapped[str] = mapped_column(String(400))
+    score_raw: Mapped[str | None] = mapped_column(String(64))
+    previous_score_raw: Mapped[str | None] = mapped_column(String(64))
+    score_pct: Mapped[float | None] = mapped_column()
+    created_at_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+
+class DataVersion(Base):
+    """Per-table change counters, bumped by triggers (see read_model.init_version_tracking)."""
+    __tablename__ = "data_versions"
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
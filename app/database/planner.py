@@ -0,0 +1,227 @@
+# app/database/planner.py
+
+"""
+Planner board (Kanban) storage.
+
+Order within a column is a lexicographic rank key (fractional indexing over base-62
+digits): a task dropped between two neighbours gets a key strictly between theirs,
+so every move is a single-row UPDATE instead of renumbering the column. Each task
+carries a `version`; writes are conditional on the version the client last saw, and a
+conflict returns the task's current state so the widget can patch just that card.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import models
+
+COLUMNS = ("todo", "in_progress", "done")
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_INDEX = {c: i for i, c in enumerate(DIGITS)}
+
+
+class PlannerError(ValueError):
+    """Invalid planner request (unknown task/column, bad neighbours)."""
+
+
+def key_between(a: str | None, b: str | None) -> str:
+    """
+    Return a rank key strictly between `a` and `b` (None means the start/end of
+    the column). Keys never end in '0', so there is always room to go lower.
+    """
+    if a is not None and b is not None and a >= b:
+        raise PlannerError(f"rank {a!r} is not before {b!r}")
+    if a and b is None:
+        # Appending is the common case: step the last digit instead of halving the
+        # gap, so keys grow by one character per ~30 appends rather than per ~6.
+        if a[-1] != DIGITS[-1]:
+            return a[:-1] + DIGITS[_INDEX[a[-1]] + 1]
+        return a + DIGITS[len(DIGITS) // 2]
+    return _midpoint(a or "", b)
+
+
+def _midpoint(a: str, b: str | None) -> str:
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    lo = _INDEX[a[0]] if a else 0
+    hi = _INDEX[b[0]] if b else len(DIGITS)
+    if hi - lo > 1:
+        return DIGITS[(lo + hi + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[lo] + _midpoint(a[1:], None)
+
+
+def _last_rank(db: Session, column: str) -> str | None:
+    return db.scalar(select(func.max(models.PlannerTask.rank)).where(models.PlannerTask.column == column))
+
+
+def _rank_of(db: Session, task_id: int, column: str) -> str:
+    rank = db.scalar(select(models.PlannerTask.rank).where(
+        models.PlannerTask.id == task_id, models.PlannerTask.column == column
+    ))
+    if rank is None:
+        raise PlannerError(f"task {task_id} is not in column {column!r}")
+    return rank
+
+
+def _neighbour(db: Session, column: str, rank: str, after: bool) -> str | None:
+    col = models.PlannerTask.rank
+    q = select(func.min(col) if after else func.max(col)).where(
+        models.PlannerTask.column == column, col > rank if after else col < rank
+    )
+    return db.scalar(q)
+
+
+def _split_tie(db: Session, column: str, task_id: int, rank: str) -> str:
+    """
+    Two concurrent moves into the same gap compute the same key, leaving tasks with
+    equal ranks (shown in id order). Nothing fits strictly between them, so give
+    `task_id` a fresh key above the tie and bump its version like any other move.
+    """
+    new_rank = key_between(rank, _neighbour(db, column, rank, after=True))
+    db.execute(
+        update(models.PlannerTask).where(models.PlannerTask.id == task_id)
+        .values(rank=new_rank, version=models.PlannerTask.version + 1,
+                updated_at_utc=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    return new_rank
+
+
+def rank_for_position(db: Session, column: str, after_id: int | None = None, before_id: int | None = None) -> str:
+    """
+    Rank for a drop position: below `after_id`, above `before_id`, both, or (neither)
+    at the end of the column. At most two indexed single-row lookups, plus one UPDATE
+    when the two neighbours share a rank.
+    """
+    if after_id is None and before_id is None:
+        return key_between(_last_rank(db, column), None)
+    lo = _rank_of(db, after_id, column) if after_id is not None else None
+    hi = _rank_of(db, before_id, column) if before_id is not None else None
+    if hi is None:
+        hi = _neighbour(db, column, lo, after=True)
+    elif lo is None:
+        lo = _neighbour(db, column, hi, after=False)
+    elif lo == hi:
+        hi = _split_tie(db, column, before_id, hi)
+    return key_between(lo, hi)
+
+
+def to_dict(task: models.PlannerTask) -> dict:
+    return {
+        "id": task.id,
+        "title": task.title,
+        "column": task.column,
+        "rank": task.rank,
+        "version": task.version,
+        "origin": task.origin,
+        "assignmentId": task.schoology_assignment_id,
+        "dueAt": task.due_at_utc.isoformat() if task.due_at_utc else None,
+        "completedAt": task.completed_at_utc.isoformat() if task.completed_at_utc else None,
+    }
+
+
+def list_tasks(db: Session, columns: list[str] | None = None) -> list[models.PlannerTask]:
+    q = db.query(models.PlannerTask)
+    if columns:
+        q = q.filter(models.PlannerTask.column.in_(columns))
+    # id breaks ties between equal ranks left by concurrent moves, so the order is stable.
+    return q.order_by(models.PlannerTask.column, models.PlannerTask.rank, models.PlannerTask.id).all()
+
+
+def import_upcoming_assignments(db: Session, window_hours: int = 168) -> int:
+    """Add upcoming Schoology assignments that aren't on the board yet to the end of 'todo'."""
+    now = datetime.now(timezone.utc)
+    on_board = select(models.PlannerTask.schoology_assignment_id).where(
+        models.PlannerTask.schoology_assignment_id.is_not(None)
+    )
+    missing = db.execute(
+        select(models.Assignment.id, models.Assignment.title, models.Assignment.due_at_utc)
+        .where(models.Assignment.due_at_utc >= now)
+        .where(models.Assignment.due_at_utc <= now + timedelta(hours=window_hours))
+        .where(models.Assignment.id.notin_(on_board))
+        .order_by(models.Assignment.due_at_utc)
+    ).all()
+    rank = _last_rank(db, "todo")
+    for a in missing:
+        rank = key_between(rank, None)
+        db.add(models.PlannerTask(
+            title=a.title, due_at_utc=a.due_at_utc, origin="schoology",
+            schoology_assignment_id=a.id, column="todo", rank=rank, version=1,
+        ))
+    if missing:
+        db.commit()
+    return len(missing)
+
+
+def create_task(db: Session, title: str, column: str = "todo", due_at_utc: datetime | None = None) -> models.PlannerTask:
+    if column not in COLUMNS:
+        raise PlannerError(f"unknown column {column!r}")
+    task = models.PlannerTask(
+        title=title, column=column, due_at_utc=due_at_utc, origin="personal",
+        rank=key_between(_last_rank(db, column), None), version=1,
+    )
+    db.add(task)
+    db.commit()
+    return task
+
+
+def _conditional_update(db: Session, task_id: int, expected_version: int | None, values: dict) -> dict:
+    """One-row UPDATE guarded by `version`; reports a conflict with the current row instead of raising."""
+    q = update(models.PlannerTask).where(models.PlannerTask.id == task_id)
+    if expected_version is not None:
+        q = q.where(models.PlannerTask.version == expected_version)
+    values = {**values, "version": models.PlannerTask.version + 1, "updated_at_utc": datetime.now(timezone.utc)}
+    changed = db.execute(q.values(**values).execution_options(synchronize_session=False)).rowcount
+    current = db.get(models.PlannerTask, task_id, populate_existing=True)
+    if current is None:
+        return {"ok": False, "id": task_id, "error": "not_found"}
+    if not changed:
+        return {"ok": False, "id": task_id, "error": "conflict", "task": to_dict(current)}
+    return {"ok": True, "id": task_id, "task": to_dict(current)}
+
+
+def _move(db: Session, move: dict) -> dict:
+    task_id = move["id"]
+    column = move.get("column")
+    if column is None:
+        column = db.scalar(select(models.PlannerTask.column).where(models.PlannerTask.id == task_id))
+        if column is None:
+            return {"ok": False, "id": task_id, "error": "not_found"}
+    if column not in COLUMNS:
+        return {"ok": False, "id": task_id, "error": f"unknown column {column!r}"}
+    try:
+        rank = rank_for_position(db, column, move.get("afterId"), move.get("beforeId"))
+    except PlannerError as e:
+        return {"ok": False, "id": task_id, "error": str(e)}
+    values = {"column": column, "rank": rank}
+    if column == "done":
+        values["completed_at_utc"] = datetime.now(timezone.utc)
+    else:
+        values["completed_at_utc"] = None
+    return _conditional_update(db, task_id, move.get("version"), values)
+
+
+def move_tasks(db: Session, moves: list[dict]) -> list[dict]:
+    """
+    Apply a batch of moves in one transaction (one commit, one write-lock acquisition).
+    Each move is `{"id", "column"?, "afterId"?, "beforeId"?, "version"?}`; moves apply
+    in order, so later ones may reference positions created by earlier ones. A failed
+    move doesn't abort the others; its result says why.
+    """
+    results = [_move(db, m) for m in moves]
+    db.commit()
+    return results
+
+
+def complete_task(db: Session, task_id: int, expected_version: int | None = None) -> dict:
+    result = _move(db, {"id": task_id, "column": "done", "version": expected_version})
+    db.commit()
+    return result
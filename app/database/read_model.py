@@ -0,0 +1,223 @@
+# app/database/read_model.py
+
+"""
+In-process read model for the hot "what's due soon" queries.
+
+The upcoming assignments are a small working set that only changes when a sync
+writes, so instead of a SQLAlchemy query per briefing they are held as a
+`Snapshot`: parallel arrays sorted by due time (plus one per course and per type),
+queried with `bisect`. Writers in `crud` call `invalidate()` after committing
+changes, and the sync job calls `refresh()` so the next read finds a warm model.
+Reads the snapshot can't answer (a window starting before its horizon, or
+READ_MODEL=0) fall back to SQL.
+
+Snapshots are immutable and swapped in whole, so readers never see a half-built
+model. They are kept per engine, so a session bound to another database (tests,
+benchmarks, reprocessing into a scratch DB) never reads this one's data.
+
+Two checks keep a snapshot from going stale. `invalidate()` bumps an in-process
+generation, and a load that started before the bump is not stored. Writes from
+other processes (`app.scheduler.reprocess`, the retention CLI) are caught by
+triggers that count every change to `assignments` in `data_versions`; `get()`
+reads that one row and rebuilds when it differs from the snapshot's.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.database import models
+
+READ_MODEL_ENABLED = os.getenv("READ_MODEL", "1").lower() not in ("0", "false", "no")
+# How far into the past a snapshot reaches; earlier windows are answered by SQL.
+HORIZON_PAST = timedelta(days=1)
+
+
+class AssignmentView(NamedTuple):
+    """Read-only assignment row; same attribute names as `models.Assignment`."""
+    id: int
+    course_id: int
+    course_name: str
+    title: str
+    url: str | None
+    due_at_utc: datetime
+    assignment_type: str | None
+    due_display: str | None
+    status: str
+
+
+# Shared with crud's SQL read paths, so both return the same record type.
+COLUMNS = [getattr(models.Assignment, f) for f in AssignmentView._fields]
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # SQLite returns stored UTC datetimes naive; compare in that form.
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _Index(NamedTuple):
+    keys: list  # (due_at_utc, id), ascending
+    rows: list[AssignmentView]
+
+    def between(self, start: datetime, end: datetime):
+        lo = bisect_left(self.keys, (start,))
+        hi = bisect_right(self.keys, (end, float("inf")))
+        return self.rows[lo:hi]
+
+
+def _index(rows: list[AssignmentView]) -> _Index:
+    return _Index([(r.due_at_utc, r.id) for r in rows], rows)
+
+
+class Snapshot:
+    def __init__(self, rows: list[AssignmentView], horizon: datetime, generation: int = 0,
+                 version: int | None = None):
+        self.horizon = horizon
+        self.generation = generation
+        self.version = version
+        self.built_at = time.time()
+        self.all = _index(rows)
+        by_type: dict[str | None, list] = {}
+        by_course: dict[int, list] = {}
+        for r in rows:
+            by_type.setdefault(r.assignment_type, []).append(r)
+            by_course.setdefault(r.course_id, []).append(r)
+        self.by_type = {k: _index(v) for k, v in by_type.items()}
+        self.by_course = {k: _index(v) for k, v in by_course.items()}
+
+    def __len__(self):
+        return len(self.all.rows)
+
+    def covers(self, start: datetime) -> bool:
+        return _naive_utc(start) >= self.horizon
+
+    def upcoming(self, start: datetime, end: datetime, limit: int | None = None,
+                 types: list[str] | None = None, course_id: int | None = None) -> list[AssignmentView]:
+        """Assignments due in [start, end], earliest first, like `crud.upcoming_assignments`."""
+        start, end = _naive_utc(start), _naive_utc(end)
+        if course_id is not None:
+            idx = self.by_course.get(course_id)
+            rows = idx.between(start, end) if idx else []
+            if types:
+                wanted = set(types)
+                rows = [r for r in rows if r.assignment_type in wanted]
+            return rows[:limit]
+        if types:
+            # Per-type slices are each sorted; merge them rather than re-sorting.
+            slices = [self.by_type[t].between(start, end) for t in dict.fromkeys(types) if t in self.by_type]
+            merged = heapq.merge(*slices, key=lambda r: (r.due_at_utc, r.id))
+            return [r for _, r in zip(range(limit), merged)] if limit is not None else list(merged)
+        return self.all.between(start, end)[:limit]
+
+
+_TRACKED = "assignments"
+
+
+def init_version_tracking(conn: Connection):
+    """
+    Create the `data_versions` row and the triggers that bump it when assignments change.
+    Updates only count when a column the snapshot projects changes, so the sync touching
+    `last_seen_at_utc` on every row it sees doesn't force a rebuild.
+    """
+    conn.exec_driver_sql(f"INSERT OR IGNORE INTO data_versions (name, version) VALUES ('{_TRACKED}', 0)")
+    bump = f"UPDATE data_versions SET version = version + 1 WHERE name = '{_TRACKED}'"
+    changed = " OR ".join(f"old.{f} IS NOT new.{f}" for f in AssignmentView._fields)
+    for op, when in (("INSERT", ""), ("UPDATE", f" WHEN {changed}"), ("DELETE", "")):
+        name = f"{_TRACKED}_version_{op.lower()}"
+        # Recreated rather than IF NOT EXISTS, so databases with an older definition pick up changes.
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        conn.exec_driver_sql(f"CREATE TRIGGER {name} AFTER {op} ON {_TRACKED}{when} BEGIN {bump}; END")
+
+
+def data_version(db: Session) -> int | None:
+    return db.execute(select(models.DataVersion.version).where(models.DataVersion.name == _TRACKED)).scalar()
+
+
+def load(db: Session, now: datetime | None = None, generation: int = 0) -> Snapshot:
+    # Read the version first: a commit landing mid-load then shows up as a newer
+    # version on the next get(), rather than being baked into this snapshot unnoticed.
+    version = data_version(db)
+    horizon = _naive_utc((now or datetime.now(timezone.utc)) - HORIZON_PAST)
+    rows = [AssignmentView(*r) for r in db.execute(
+        select(*COLUMNS)
+        .where(models.Assignment.due_at_utc.is_not(None))
+        .where(models.Assignment.due_at_utc >= horizon)
+        .order_by(models.Assignment.due_at_utc, models.Assignment.id)
+    )]
+    return Snapshot(rows, horizon, generation, version)
+
+
+_snapshots: "weakref.WeakKeyDictionary[object, Snapshot]" = weakref.WeakKeyDictionary()
+_generations: "weakref.WeakKeyDictionary[object, int]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def refresh(db: Session) -> Snapshot:
+    t0 = time.perf_counter()
+    bind = db.get_bind()
+    with _lock:
+        generation = _generations.get(bind, 0)
+    snap = load(db, generation=generation)
+    with _lock:
+        # An invalidate() that landed while we were loading leaves this one stale; don't store it.
+        if _generations.get(bind, 0) == generation:
+            _snapshots[bind] = snap
+    logging.info(f"Read model rebuilt: {len(snap)} assignments in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    return snap
+
+
+def invalidate(db: Session):
+    bind = db.get_bind()
+    with _lock:
+        _generations[bind] = _generations.get(bind, 0) + 1
+        _snapshots.pop(bind, None)
+
+
+def get(db: Session) -> Snapshot | None:
+    """The snapshot for `db`'s database, rebuilt when missing or out of date; None when disabled."""
+    if not READ_MODEL_ENABLED:
+        return None
+    bind = db.get_bind()
+    with _lock:
+        snap = _snapshots.get(bind)
+        generation = _generations.get(bind, 0)
+    if snap is None or snap.generation != generation or snap.version != data_version(db):
+        snap = refresh(db)
+    return snap
+
+
+def verify(db: Session, window: timedelta = timedelta(days=60)) -> list[str]:
+    """
+    Compare the current snapshot with the database over [now, now + window]. Returns
+    human-readable differences; an empty list means the model is consistent.
+    """
+    snap = _snapshots.get(db.get_bind())
+    if snap is None:
+        return ["no snapshot loaded"]
+    now = datetime.now(timezone.utc)
+    fresh = load(db, now)
+    got = snap.upcoming(now, now + window)
+    expected = fresh.upcoming(now, now + window)
+    problems = []
+    got_by_id = {r.id: r for r in got}
+    expected_by_id = {r.id: r for r in expected}
+    for missing in expected_by_id.keys() - got_by_id.keys():
+        problems.append(f"assignment {missing} missing from read model")
+    for extra in got_by_id.keys() - expected_by_id.keys():
+        problems.append(f"assignment {extra} in read model but not in database")
+    for i in got_by_id.keys() & expected_by_id.keys():
+        if got_by_id[i] != expected_by_id[i]:
+            problems.append(f"assignment {i} differs: {got_by_id[i]} != {expected_by_id[i]}")
+    return problems
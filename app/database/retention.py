@@ -0,0 +1,330 @@
+# app/database/retention.py
+
+"""
+Data retention: move old rows out of the hot tables into an archive database.
+
+    python -m app.database.retention              # run once with the configured windows
+    python -m app.database.retention --dry-run    # just count what would move
+    python -m app.database.retention --vacuum     # also reclaim free pages now
+
+Each policy names a table, the predicate that makes a row "old", and a window in
+days (RETENTION_DAYS_<TABLE>, 0 = keep forever). Rows are moved set-based, in
+batches: one INSERT ... SELECT into the attached archive database (`<db>_archive.db`,
+or RETENTION_ARCHIVE_PATH), then one DELETE from the hot table. Each batch commits
+on its own, so the write lock is held only briefly. The archive insert is
+idempotent (INSERT OR REPLACE), so a crash between the two statements just repeats
+the batch. Archived assignments, events and updates also go into an FTS index in
+the archive, which `search_archive()` queries on demand.
+
+Deleting from the hot tables frees pages. With auto_vacuum=INCREMENTAL (`init_db`
+sets it), `incremental_vacuum()` hands those pages back to the filesystem a few
+hundred at a time, only when nothing else is going on. It never blocks readers.
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.database import models, search
+
+BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "2000"))
+# Idle = no /mcp request and no sync for this long.
+IDLE_SECONDS = float(os.getenv("RETENTION_IDLE_SECONDS", "120"))
+VACUUM_PAGES_PER_STEP = 256
+
+
+class Policy(NamedTuple):
+    table: str
+    model: type
+    default_days: int
+    predicate: str  # SQL over the hot table (aliased `t`); :cutoff is bound
+    search_kind: str | None  # kind in search.KINDS when archived rows stay searchable
+
+
+def _configured_course_ids() -> str:
+    from app.schoology_client.client import course_ids_from_env
+    return ", ".join(str(int(c)) for c in course_ids_from_env()) or "NULL"
+
+
+POLICIES = [
+    Policy("assignments", models.Assignment, 180,
+           "t.due_at_utc < :cutoff OR (t.due_at_utc IS NULL AND t.last_seen_at_utc < :cutoff)", "assignment"),
+    Policy("events", models.Event, 180, "t.start_utc < :cutoff", "event"),
+    Policy("updates", models.Update, 365, "t.posted_at_utc < :cutoff", "update"),
+    # Grades of courses still being synced stay: archiving them would make the next
+    # sync re-insert them. Old grades of courses no longer in SCHOOLOGY_COURSE_IDS go.
+    Policy("grades", models.Grade, 365,
+           "t.posted_at_utc < :cutoff AND t.course_id NOT IN ({courses})", None),
+    Policy("grade_alerts", models.GradeAlert, 90, "t.created_at_utc < :cutoff", None),
+]
+_POLICY_BY_TABLE = {p.table: p for p in POLICIES}
+
+
+def retention_days(table: str) -> int:
+    return int(os.getenv(f"RETENTION_DAYS_{table.upper()}", _POLICY_BY_TABLE[table].default_days))
+
+
+def cutoff(table: str, now: datetime | None = None) -> datetime | None:
+    """Rows of `table` older than this are archived; None when retention is off for it."""
+    days = retention_days(table)
+    if days <= 0:
+        return None
+    return (now or datetime.now(timezone.utc)) - timedelta(days=days)
+
+
+def _sqlite_ts(value: datetime) -> str:
+    # Same text form SQLAlchemy's SQLite DateTime stores (naive UTC).
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def archive_path(bind: Engine) -> str | None:
+    override = os.getenv("RETENTION_ARCHIVE_PATH")
+    if override:
+        return override
+    database = bind.url.database
+    if not database or database == ":memory:":
+        return None
+    root, ext = os.path.splitext(database)
+    return f"{root}_archive{ext or '.db'}"
+
+
+# --- activity tracking for idle vacuum -------------------------------------------
+
+_last_activity = time.monotonic()
+
+
+def note_activity():
+    """Called on each /mcp request; idle work waits for IDLE_SECONDS of quiet."""
+    global _last_activity
+    _last_activity = time.monotonic()
+
+
+def is_idle() -> bool:
+    if time.monotonic() - _last_activity < IDLE_SECONDS:
+        return False
+    from app.scheduler.sync_control import get_coordinator
+    return get_coordinator().in_flight is None
+
+
+# --- archive schema ---------------------------------------------------------------
+
+def _ensure_archive_schema(conn: Connection):
+    for p in POLICIES:
+        table = p.model.__table__
+        cols = ", ".join(
+            f'"{c.name}" {c.type.compile(dialect=conn.dialect)}' + (" PRIMARY KEY" if c.primary_key else "")
+            for c in table.columns
+        )
+        conn.exec_driver_sql(
+            f'CREATE TABLE IF NOT EXISTS archive."{p.table}" ({cols}, archived_at_utc DATETIME)'
+        )
+        existing = {r[1] for r in conn.exec_driver_sql(f'PRAGMA archive.table_info("{p.table}")')}
+        for c in table.columns:
+            if c.name not in existing:  # hot table gained a column since the archive was made
+                conn.exec_driver_sql(
+                    f'ALTER TABLE archive."{p.table}" ADD COLUMN "{c.name}" {c.type.compile(dialect=conn.dialect)}'
+                )
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS archive.search_index USING fts5("
+        "title, course, body, kind UNINDEXED, ref_id UNINDEXED, at UNINDEXED, url UNINDEXED, "
+        "tokenize = 'porter unicode61 remove_diacritics 2')"
+    )
+
+
+def _search_source(kind: str):
+    return next(s for s in search._SOURCES if s[1] == kind)
+
+
+def _move_batch(conn: Connection, p: Policy, predicate: str, params: dict, now: str) -> int:
+    conn.exec_driver_sql("DELETE FROM temp._retention_ids")
+    conn.exec_driver_sql(
+        f'INSERT INTO temp._retention_ids SELECT t.id FROM main."{p.table}" t WHERE ({predicate}) LIMIT {BATCH_SIZE}',
+        params,
+    )
+    moved = conn.exec_driver_sql("SELECT COUNT(*) FROM temp._retention_ids").scalar()
+    if not moved:
+        return 0
+    cols = ", ".join(f'"{c.name}"' for c in p.model.__table__.columns)
+    in_batch = "id IN (SELECT id FROM temp._retention_ids)"
+    conn.exec_driver_sql(
+        f'INSERT OR REPLACE INTO archive."{p.table}" ({cols}, archived_at_utc) '
+        f'SELECT {cols}, ? FROM main."{p.table}" WHERE {in_batch}',
+        (now,),
+    )
+    if p.search_kind:
+        _, kind, title, course, body, at, url, _ = _search_source(p.search_kind)
+        rowid = search._rowid(kind, "src.id")
+        conn.exec_driver_sql(
+            f"DELETE FROM archive.search_index WHERE rowid IN "
+            f"(SELECT {search._rowid(kind, 'id')} FROM temp._retention_ids)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO archive.search_index(rowid, title, course, body, kind, ref_id, at, url) "
+            f"SELECT {rowid}, {title.format(r='src')}, {course.format(r='src')}, {body.format(r='src')}, "
+            f"'{kind}', src.id, {at.format(r='src')}, {url.format(r='src')} "
+            f'FROM main."{p.table}" src WHERE src.{in_batch}'
+        )
+    # The hot table's search triggers drop these rows from the live index.
+    conn.exec_driver_sql(f'DELETE FROM main."{p.table}" WHERE {in_batch}')
+    conn.commit()
+    return moved
+
+
+def run_retention(bind: Engine, dry_run: bool = False, tables: list[str] | None = None) -> dict:
+    """Apply every enabled policy once. Returns rows moved (or that would move) per table."""
+    path = archive_path(bind)
+    if path is None:
+        logging.info("Retention skipped: database has no file to archive next to.")
+        return {}
+    now = datetime.now(timezone.utc)
+    counts = {}
+    with bind.connect() as conn:
+        conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (path,))
+        try:
+            conn.exec_driver_sql("PRAGMA archive.journal_mode=WAL")
+            _ensure_archive_schema(conn)
+            conn.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS _retention_ids (id INTEGER PRIMARY KEY)")
+            conn.commit()
+            for p in POLICIES:
+                if tables and p.table not in tables:
+                    continue
+                limit = cutoff(p.table, now)
+                if limit is None:
+                    continue
+                predicate = p.predicate.format(courses=_configured_course_ids())
+                params = {"cutoff": _sqlite_ts(limit)}
+                if dry_run:
+                    counts[p.table] = conn.exec_driver_sql(
+                        f'SELECT COUNT(*) FROM main."{p.table}" t WHERE ({predicate})', params
+                    ).scalar()
+                    continue
+                total = 0
+                while moved := _move_batch(conn, p, predicate, params, _sqlite_ts(now)):
+                    total += moved
+                counts[p.table] = total
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.exec_driver_sql("DETACH DATABASE archive")
+    if not dry_run and any(counts.values()):
+        from app.database import analytics, read_model
+        with Session(bind=bind) as db:
+            read_model.invalidate(db)
+            analytics.invalidate(db)
+        logging.info(f"Retention archived {counts} into {path}")
+    return counts
+
+
+def incremental_vacuum(bind: Engine, max_steps: int | None = None, only_when_idle: bool = True) -> int:
+    """
+    Return free pages to the filesystem in small steps, stopping as soon as the
+    server gets busy. Each step is a short write; WAL readers are never blocked.
+    Returns the number of pages released.
+    """
+    released = 0
+    with bind.connect() as conn:
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            if only_when_idle and not is_idle():
+                break
+            free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if not free:
+                break
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})")
+            conn.commit()
+            released += min(free, VACUUM_PAGES_PER_STEP)
+            steps += 1
+        if released:
+            # Truncate-free checkpoint: moves WAL pages into the db without waiting on readers.
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    if released:
+        logging.info(f"Incremental vacuum released {released} page(s)")
+    return released
+
+
+_job_lock = threading.Lock()
+
+
+def retention_job(bind: Engine):
+    """Scheduled entry point: archive old rows, then vacuum if the server is idle."""
+    if not _job_lock.acquire(blocking=False):
+        return
+    try:
+        run_retention(bind)
+    except Exception as e:
+        logging.error(f"Retention run failed: {e}", exc_info=True)
+    finally:
+        _job_lock.release()
+
+
+def idle_vacuum_job(bind: Engine):
+    if not is_idle() or not _job_lock.acquire(blocking=False):
+        return
+    try:
+        incremental_vacuum(bind)
+    except Exception as e:
+        logging.error(f"Incremental vacuum failed: {e}", exc_info=True)
+    finally:
+        _job_lock.release()
+
+
+# --- archived search ------------------------------------------------------------
+
+def search_archive(db: Session, query: str, limit: int = 10, kinds: list[str] | None = None) -> list[dict]:
+    """Full-text search over archived rows (read-only; same result shape as `search.search`)."""
+    path = archive_path(db.get_bind())
+    match = search.to_match_query(query)
+    if not path or not match or not os.path.exists(path):
+        return []
+    where, params = "search_index MATCH ?", [match]
+    if kinds:
+        wanted = [k for k in kinds if k in search.KINDS]
+        if not wanted:
+            return []
+        where += " AND kind IN (" + ", ".join("?" for _ in wanted) + ")"
+        params += wanted
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT kind, ref_id, title, course, at, url, "
+            "snippet(search_index, -1, '[', ']', '…', 12) AS snippet "
+            f"FROM search_index WHERE {where} ORDER BY bm25(search_index, 10.0, 4.0, 1.0) LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+    except sqlite3.OperationalError:  # archive created before any searchable row moved
+        return []
+    finally:
+        conn.close()
+    return [{**dict(r), "archived": True} for r in rows]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="count rows past their window without moving them")
+    parser.add_argument("--table", action="append", choices=[p.table for p in POLICIES], help="limit to this table")
+    parser.add_argument("--vacuum", action="store_true", help="run incremental vacuum afterwards, idle or not")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    from app.database.database import engine, init_db
+    init_db()
+    counts = run_retention(engine, dry_run=args.dry_run, tables=args.table)
+    for table, n in counts.items():
+        print(f"{table:14} {n:8} {'to archive' if args.dry_run else 'archived'}")
+    if args.vacuum and not args.dry_run:
+        print(f"released {incremental_vacuum(engine, only_when_idle=False)} page(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# app/database/schema.py
+
+"""
+Cheap schema check used at startup instead of create_all().
+
+`init_db()` stamps SCHEMA_VERSION into SQLite's `PRAGMA user_version` after building
+or migrating the schema. On later starts a single PRAGMA read (plain sqlite3, no
+SQLAlchemy import) tells us whether any DDL work is needed at all.
+
+Bump SCHEMA_VERSION whenever a model, index, FTS table or trigger changes.
+"""
+
+import os
+import sqlite3
+
+DATABASE_PATH = "schoology.db"
+
+SCHEMA_VERSION = 7
+
+
+def stored_schema_version(path: str = DATABASE_PATH) -> int | None:
+    """The version stamped in `path`, or None if the database doesn't exist yet."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def is_current(path: str = DATABASE_PATH) -> bool:
+    return stored_schema_version(path) == SCHEMA_VERSION
+
+
+def has_data(path: str = DATABASE_PATH) -> bool:
+    """True if a previous sync left anything to serve."""
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT 1 FROM assignments LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
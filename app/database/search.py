@@ -0,0 +1,129 @@
+# app/database/search.py
+
+"""
+Full-text search over assignments, events and feed updates (SQLite FTS5).
+
+`search_index` is kept in sync by triggers on the source tables, so every ingestion
+path (calendar upsert, materials, feed) maintains it incrementally inside the same
+transaction; nothing has to remember to call an indexer. Each source row maps to a
+fixed rowid (`kind << 40 | id`), which makes trigger updates/deletes a rowid lookup.
+"""
+
+import html
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+KIND_BITS = 40
+KINDS = {"assignment": 1, "event": 2, "update": 3}
+
+
+def strip_html(value: str | None) -> str:
+    """Tag-stripped, entity-decoded text. Registered as the `strip_html` SQL function."""
+    if not value:
+        return ""
+    return _WS_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", value))).strip()
+
+
+def _rowid(kind: str, ref: str) -> str:
+    return f"(({KINDS[kind]} << {KIND_BITS}) | {ref})"
+
+
+# (table, kind, title expr, course expr, body expr, timestamp column, url expr, watched columns)
+_SOURCES = [
+    ("assignments", "assignment", "{r}.title", "{r}.course_name", "''", "{r}.due_at_utc", "{r}.url",
+     ["title", "course_name", "due_at_utc", "url"]),
+    ("events", "event", "{r}.title", "{r}.source", "''", "{r}.start_utc", "NULL",
+     ["title", "source", "start_utc"]),
+    ("updates", "update", "''", "{r}.source || ' ' || {r}.author", "strip_html({r}.content_html_sanitized)",
+     "{r}.posted_at_utc", "NULL", ["author", "content_html_sanitized", "posted_at_utc", "source"]),
+]
+
+
+def _schema_statements() -> list[str]:
+    stmts = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "title, course, body, kind UNINDEXED, ref_id UNINDEXED, at UNINDEXED, url UNINDEXED, "
+        "tokenize = 'porter unicode61 remove_diacritics 2')"
+    ]
+    for table, kind, title, course, body, at, url, watched in _SOURCES:
+        def values(r):
+            return (
+                f"{_rowid(kind, f'{r}.id')}, {title.format(r=r)}, {course.format(r=r)}, {body.format(r=r)}, "
+                f"'{kind}', {r}.id, {at.format(r=r)}, {url.format(r=r)}"
+            )
+        cols = "rowid, title, course, body, kind, ref_id, at, url"
+        changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in watched)
+        stmts += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index({cols}) VALUES ({values('new')}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE ON {table} WHEN {changed} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old.id')}; "
+            f"INSERT INTO search_index({cols}) VALUES ({values('new')}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old.id')}; END",
+        ]
+    return stmts
+
+
+def init_search_index(conn: Connection):
+    """Create the FTS table and triggers if missing; backfill when the index is new."""
+    existed = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+    ).first() is not None
+    for stmt in _schema_statements():
+        conn.exec_driver_sql(stmt)
+    if not existed:
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn: Connection):
+    """Re-index every source row from scratch (set-based, one INSERT ... SELECT per table)."""
+    conn.exec_driver_sql("DELETE FROM search_index")
+    for table, kind, title, course, body, at, url, _ in _SOURCES:
+        r = table
+        conn.exec_driver_sql(
+            f"INSERT INTO search_index(rowid, title, course, body, kind, ref_id, at, url) "
+            f"SELECT {_rowid(kind, f'{r}.id')}, {title.format(r=r)}, {course.format(r=r)}, "
+            f"{body.format(r=r)}, '{kind}', {r}.id, {at.format(r=r)}, {url.format(r=r)} FROM {table}"
+        )
+    conn.exec_driver_sql("INSERT INTO search_index(search_index) VALUES ('optimize')")
+
+
+def to_match_query(query: str) -> str | None:
+    """
+    Turn free text into a safe FTS5 expression: every word must match, as a prefix,
+    so "gatsby ess" finds "Essay: Analysis of 'The Great Gatsby'".
+    """
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens[:16])
+
+
+def search(db: Session, query: str, limit: int = 10, kinds: list[str] | None = None) -> list[dict]:
+    """Ranked matches (title hits weigh most, then course/source, then body)."""
+    match = to_match_query(query)
+    if not match:
+        return []
+    params = {"match": match, "limit": limit}
+    kind_filter = ""
+    if kinds:
+        wanted = [k for k in kinds if k in KINDS]
+        if not wanted:
+            return []
+        kind_filter = "AND kind IN (" + ", ".join(f":k{i}" for i in range(len(wanted))) + ")"
+        params.update({f"k{i}": k for i, k in enumerate(wanted)})
+    rows = db.execute(text(
+        "SELECT kind, ref_id, title, course, at, url, "
+        "snippet(search_index, -1, '[', ']', '…', 12) AS snippet "
+        f"FROM search_index WHERE search_index MATCH :match {kind_filter} "
+        "ORDER BY bm25(search_index, 10.0, 4.0, 1.0) LIMIT :limit"
+    ), params)
+    return [dict(r._mapping) for r in rows]
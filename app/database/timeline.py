@@ -0,0 +1,118 @@
+# app/database/timeline.py
+
+"""
+Unified, time-ordered read path over assignments, events, updates and grades.
+
+Each source is read as an already-sorted stream straight off its timestamp index,
+with a keyset predicate and `LIMIT page size`, so no table is ever loaded in full and
+deep pages cost the same as the first one. `heapq.merge` then k-way merges the
+streams and the first `limit` items become the page. The cursor is the sort key of
+the last item returned (plus the window and kind filter), encoded as an opaque token.
+"""
+
+import base64
+import heapq
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.database import models
+from app.database.search import strip_html
+
+# kind -> (tie-break rank, model, timestamp column)
+STREAMS = {
+    "assignment": (0, models.Assignment, models.Assignment.due_at_utc),
+    "event": (1, models.Event, models.Event.start_utc),
+    "grade": (2, models.Grade, models.Grade.posted_at_utc),
+    "update": (3, models.Update, models.Update.posted_at_utc),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        state["t"] = datetime.fromisoformat(state["t"])
+        state["e"] = datetime.fromisoformat(state["e"]) if state.get("e") else None
+        return state
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("invalid or expired cursor") from e
+
+
+def _after(kind: str, ts_col, id_col, cursor: dict):
+    """Keyset predicate: strictly after the cursor in (timestamp, kind rank, id) order."""
+    rank = STREAMS[kind][0]
+    if rank > cursor["k"]:
+        return ts_col >= cursor["t"]
+    if rank < cursor["k"]:
+        return ts_col > cursor["t"]
+    return or_(ts_col > cursor["t"], and_(ts_col == cursor["t"], id_col > cursor["i"]))
+
+
+def _stream(db: Session, kind: str, start: datetime, end: datetime | None, cursor: dict | None, limit: int):
+    rank, model, ts_col = STREAMS[kind]
+    q = select(model).where(ts_col.is_not(None))
+    q = q.where(_after(kind, ts_col, model.id, cursor) if cursor else ts_col >= start)
+    if end is not None:
+        q = q.where(ts_col < end)
+    q = q.order_by(ts_col, model.id).limit(limit)
+    for row in db.scalars(q):
+        yield (getattr(row, ts_col.key), rank, row.id, kind, row)
+
+
+def _to_item(ts: datetime, kind: str, row) -> dict:
+    item = {"kind": kind, "id": row.id, "at": ts.isoformat()}
+    if kind == "assignment":
+        item.update(title=row.title, course=row.course_name, url=row.url, type=row.assignment_type)
+    elif kind == "event":
+        item.update(title=row.title, course=row.source,
+                    endAt=row.end_utc.isoformat() if row.end_utc else None)
+    elif kind == "grade":
+        item.update(title=row.assignment_title, course=row.course_name, score=row.score_raw, percent=row.score_pct)
+    else:
+        text = strip_html(row.content_html_sanitized)
+        item.update(title=text[:140] + ("…" if len(text) > 140 else ""), course=row.source, author=row.author)
+    return item
+
+
+def timeline_page(db: Session, start: datetime | None = None, end: datetime | None = None,
+                  kinds: list[str] | None = None, limit: int = 20, cursor: str | None = None) -> dict:
+    """
+    One page of the merged timeline, oldest first from `start` (exclusive of `end`).
+    Pass the returned `nextCursor` to continue; it carries the window and kinds.
+    """
+    state = None
+    if cursor:
+        state = decode_cursor(cursor)
+        end, kinds = state["e"], state.get("kinds")
+    elif start is None:
+        raise ValueError("start is required without a cursor")
+    kinds = [k for k in (kinds or STREAMS) if k in STREAMS]
+
+    streams = [_stream(db, k, start, end, state, limit + 1) for k in kinds]
+    merged = heapq.merge(*streams, key=lambda r: r[:3])
+    rows = [r for _, r in zip(range(limit + 1), merged)]
+
+    page, more = rows[:limit], len(rows) > limit
+    next_cursor = None
+    if more and page:
+        ts, rank, row_id = page[-1][:3]
+        next_cursor = encode_cursor({
+            "t": ts.isoformat(), "k": rank, "i": row_id,
+            "e": end.isoformat() if end else None, "kinds": kinds,
+        })
+    return {
+        "items": [_to_item(ts, kind, row) for ts, _, _, kind, row in page],
+        "nextCursor": next_cursor,
+    }
@@ -0,0 +1,346 @@
+# app/mcp_server/assets.py
+
+"""
+Static widget assets: pre-compressed variants, content negotiation and caching.
+
+Shared by the /widget routes in server.py and the standalone widget servers
+(serve_widget.py, web/briefing-widget/serve.py). `AssetStore` scans a build
+directory once. Text assets get `.gz` siblings (and `.br` ones when the `brotli`
+package is installed) unless up-to-date ones already exist, so no request ever
+compresses anything. Each request's Accept-Encoding picks the smallest variant it
+accepts.
+
+Vite puts a content hash in every file name under assets/, so those are served
+`immutable` for a year; anything else (index.html) is revalidated with its ETag.
+Bodies go out with sendfile: `socket.sendfile` in the standalone servers, and
+Starlette's FileResponse in the app (zero-copy on ASGI servers that offer
+`http.response.pathsend`). This module only uses the standard library, so the
+standalone servers don't need the app's dependencies.
+
+    python -m app.mcp_server.assets web/briefing-widget/dist     # pre-compress after a build
+"""
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Smaller files aren't worth a Content-Encoding round trip.
+MIN_COMPRESS_BYTES = 1024
+# How often a store checks whether the build directory was rebuilt under it.
+RESCAN_INTERVAL = 2.0
+
+# Rollup's default [hash]: exactly 8 base64url characters after a '-' (vite.config.js names
+# files `index-[hash].ext`). An all-lowercase word like `-checkout` is a name, not a hash;
+# a hash missed by this rule is merely revalidated, but a name matched by it would be
+# cached for a year.
+_HASHED_RE = re.compile(r"-(?![a-z]{8}\.)[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+
+ENCODERS = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+if brotli is not None:
+    ENCODERS.insert(0, ("br", ".br", lambda data: brotli.compress(data, quality=11)))
+_VARIANT_SUFFIXES = (".gz", ".br")
+_TMP_RE = re.compile(r"^\..*\.tmp$")
+
+
+class Variant(NamedTuple):
+    path: str
+    size: int
+    encoding: str | None  # None = identity
+    etag: str
+
+
+class Asset(NamedTuple):
+    content_type: str
+    cache_control: str
+    last_modified: str
+    variants: list[Variant]  # identity first
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """Accept-Encoding as {coding: q}, lower-cased."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    return accepted
+
+
+def accepts(accept_encoding: str, coding: str) -> bool:
+    accepted = accepted_encodings(accept_encoding)
+    return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+
+def etag_matches(if_none_match: str, etags: tuple[str, ...]) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") in etags for t in if_none_match.split(","))
+
+
+def _content_type(path: str) -> str:
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _write_variant(path: str, data: bytes, mtime_ns: int):
+    # A unique temp file per writer, so two processes scanning the same build can't
+    # interleave writes; os.replace then swaps in a complete file.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.utime(tmp, ns=(mtime_ns, mtime_ns))
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+def _variants(path: str, rel: str, data: bytes, st: os.stat_result, content_type: str, compress: bool) -> list[Variant]:
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    variants = [Variant(path, st.st_size, None, f'"{digest}"')]
+    if not compress or st.st_size < MIN_COMPRESS_BYTES or not content_type.startswith(_COMPRESSIBLE):
+        return variants
+    for encoding, suffix, encode in ENCODERS:
+        vpath = path + suffix
+        try:
+            vst = os.stat(vpath)
+            if vst.st_mtime_ns != st.st_mtime_ns:  # stale, or not one of ours
+                raise FileNotFoundError(vpath)
+        except FileNotFoundError:
+            try:
+                _write_variant(vpath, encode(data), st.st_mtime_ns)
+                vst = os.stat(vpath)
+            except OSError as e:
+                logging.warning(f"Could not write {encoding} variant of {rel}: {e}")
+                continue
+        if vst.st_size < st.st_size:
+            variants.append(Variant(vpath, vst.st_size, encoding, f'"{digest}-{suffix[1:]}"'))
+    return variants
+
+
+class AssetStore:
+    """Every file under `root`, keyed by its '/'-separated relative path."""
+
+    def __init__(self, root: str, compress: bool = True):
+        self.root = os.path.abspath(root)
+        self.compress = compress
+        self.assets: dict[str, Asset] = {}
+        self._stamp = None
+        self._checked = 0.0
+        # Serializes scans; readers just take `self.assets`, which is swapped in whole.
+        self._lock = threading.Lock()
+        self.scan()
+
+    def _dir_stamp(self):
+        stamp = []
+        for d in (self.root, os.path.join(self.root, "assets")):
+            try:
+                stamp.append(os.stat(d).st_mtime_ns)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def scan(self):
+        with self._lock:
+            self._scan_locked()
+
+    def _scan_locked(self):
+        t0 = time.perf_counter()
+        stamp = self._dir_stamp()
+        assets: dict[str, Asset] = {}
+        for dirpath, dirs, files in os.walk(self.root):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(dirpath, name)
+                if name.endswith(_VARIANT_SUFFIXES) and os.path.exists(path.rsplit(".", 1)[0]):
+                    continue
+                if _TMP_RE.search(name):
+                    continue
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                try:
+                    st = os.stat(path)
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                content_type = _content_type(name)
+                hashed = rel.startswith("assets/") and _HASHED_RE.search(name) is not None
+                assets[rel] = Asset(
+                    content_type=content_type,
+                    cache_control=IMMUTABLE if hashed else REVALIDATE,
+                    last_modified=formatdate(st.st_mtime, usegmt=True),
+                    variants=_variants(path, rel, data, st, content_type, self.compress),
+                )
+        self.assets, self._stamp, self._checked = assets, stamp, time.monotonic()
+        encoded = sum(len(a.variants) - 1 for a in assets.values())
+        logging.info(f"Widget assets: {len(assets)} file(s), {encoded} compressed variant(s) "
+                     f"from {self.root} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    def _maybe_rescan(self):
+        if time.monotonic() - self._checked < RESCAN_INTERVAL:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked < RESCAN_INTERVAL:  # another thread just checked
+                return
+            self._checked = now
+            if self._dir_stamp() != self._stamp:
+                self._scan_locked()
+
+    def lookup(self, url_path: str) -> Asset | None:
+        """The asset for a request path relative to the mount ('' and 'x/' mean index.html)."""
+        self._maybe_rescan()
+        rel = unquote(url_path).lstrip("/")
+        if rel == "" or rel.endswith("/"):
+            rel += "index.html"
+        return self.assets.get(rel)
+
+    @staticmethod
+    def choose(asset: Asset, accept_encoding: str) -> Variant:
+        """The smallest variant the client accepts; identity is always acceptable."""
+        if len(asset.variants) == 1:
+            return asset.variants[0]
+        accepted = accepted_encodings(accept_encoding)
+        default = accepted.get("*", 0.0)
+        ok = [v for v in asset.variants[1:] if accepted.get(v.encoding, default) > 0]
+        return min(ok, key=lambda v: v.size) if ok else asset.variants[0]
+
+    @staticmethod
+    def headers(asset: Asset, variant: Variant) -> dict[str, str]:
+        headers = {
+            "Content-Type": asset.content_type,
+            "Content-Length": str(variant.size),
+            "Cache-Control": asset.cache_control,
+            "ETag": variant.etag,
+            "Last-Modified": asset.last_modified,
+        }
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if variant.encoding:
+            headers["Content-Encoding"] = variant.encoding
+        return headers
+
+    @staticmethod
+    def not_modified(asset: Asset, variant: Variant, if_none_match: str | None, if_modified_since: str | None) -> bool:
+        if if_none_match is not None:
+            return etag_matches(if_none_match, (variant.etag,))
+        return bool(if_modified_since) and if_modified_since == asset.last_modified
+
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD from an `AssetStore`, with the body sent by `socket.sendfile`."""
+
+    protocol_version = "HTTP/1.1"
+    store: AssetStore
+    cors = True
+
+    def end_headers(self):
+        if self.cors:  # the widget is loaded from ChatGPT's origin
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        super().end_headers()
+
+    def do_OPTIONS(self):
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body: bool):
+        asset = self.store.lookup(urlsplit(self.path).path)
+        if asset is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        variant = self.store.choose(asset, self.headers.get("Accept-Encoding", ""))
+        headers = self.store.headers(asset, variant)
+        if self.store.not_modified(asset, variant, self.headers.get("If-None-Match"),
+                                   self.headers.get("If-Modified-Since")):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key in ("Cache-Control", "ETag", "Last-Modified", "Vary"):
+                if key in headers:
+                    self.send_header(key, headers[key])
+            self.end_headers()
+            return
+        try:
+            f = open(variant.path, "rb")
+        except OSError:  # rebuilt between scan and request
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        with f:
+            self.send_response(HTTPStatus.OK)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            if body:
+                self.connection.sendfile(f, count=variant.size)
+
+
+def serve(root: str, host: str = "", port: int = 8080, cors: bool = True):
+    """Serve `root` until interrupted, one thread per connection."""
+    store = AssetStore(root)
+    handler = type("Handler", (AssetRequestHandler,), {"store": store, "cors": cors})
+    with ThreadingHTTPServer((host, port), handler) as httpd:
+        print(f"🚀 Widget server running at http://localhost:{port}")
+        print(f"📁 Serving files from: {store.root}")
+        print("Press Ctrl+C to stop")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Widget server stopped")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="build directory, e.g. web/briefing-widget/dist")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not os.path.isdir(args.root):
+        print(f"❌ Not a directory: {args.root}")
+        return 1
+    AssetStore(args.root)
+    if brotli is None:
+        print("brotli is not installed; only gzip variants were built (pip install brotli).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
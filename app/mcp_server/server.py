@@ -1,29 +1,67 @@
 # app/mcp_server/server.py
 
-from fastapi import FastAPI, Depends, Request
+from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-# ✅ IMPORT StaticFiles
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
-import mcp.types as types
+import secrets
+import sys
+import threading
 import logging
 
-from app.database.database import get_db, init_db
-from app.scheduler.scheduler import start_scheduler, stop_scheduler
-from app.mcp_server import tools, resources
+from app import startup
+from app.database import schema
+from app.mcp_server import assets
+
+# SQLAlchemy, mcp.types and APScheduler are imported on first use (see get_db,
+# serialize_mcp_result and _start_scheduler) so importing this module stays cheap.
+
+_scheduler_cancel = threading.Event()
+
+def _start_scheduler():
+    with startup.phase("start_scheduler"):
+        from app.scheduler.scheduler import start_scheduler
+        start_scheduler()
+
+def _deferred_scheduler_start(delay: float):
+    if _scheduler_cancel.wait(delay):
+        return
+    _start_scheduler()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting up...")
-    load_dotenv()
-    init_db()
-    start_scheduler()
+    with startup.phase("load_dotenv"):
+        load_dotenv()
+    # FAST_START=1: skip schema work when the stamped version matches, serve the existing
+    # schoology.db immediately, and start the scheduler/first sync after a short delay.
+    # Read here, after load_dotenv(), so .env can set them.
+    fast_start = os.getenv("FAST_START", "").lower() in ("1", "true", "yes")
+    fast_start_sync_delay = float(os.getenv("FAST_START_SYNC_DELAY", "10"))
+    with startup.phase("widget_assets"):
+        _load_widget_assets()
+    with startup.phase("schema_check"):
+        schema_current = fast_start and schema.is_current()
+    if not schema_current:
+        with startup.phase("init_db"):
+            from app.database.database import init_db
+            init_db()
+    if fast_start:
+        # Serve what's already on disk; with nothing to serve, sync right away.
+        delay = fast_start_sync_delay if schema.has_data() else 0
+        threading.Thread(
+            target=_deferred_scheduler_start, args=(delay,), name="deferred-scheduler", daemon=True
+        ).start()
+    else:
+        _start_scheduler()
+    startup.mark_ready()
     yield
     print("👋 Shutting down...")
-    stop_scheduler()
+    _scheduler_cancel.set()
+    if "app.scheduler.scheduler" in sys.modules:
+        from app.scheduler.scheduler import stop_scheduler
+        stop_scheduler()
 
 app = FastAPI(title="Schoology Co-Pilot", lifespan=lifespan)
 
@@ -36,27 +74,123 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ REPLACEMENT FOR serve_widget.py
-# Get the absolute path to the widget's 'dist' directory
+# Widget build output, served at /widget with pre-compressed variants (see assets.py).
 widget_dist_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'web', 'briefing-widget', 'dist'))
+_widget_assets: assets.AssetStore | None = None
+
+def _load_widget_assets():
+    global _widget_assets
+    if os.path.exists(widget_dist_path):
+        _widget_assets = assets.AssetStore(widget_dist_path)
+        logging.info(f"✅ Widget assets mounted at /widget from {widget_dist_path}")
+    else:
+        logging.error(f"❌ Widget 'dist' folder not found at {widget_dist_path}")
+        logging.error("   Please run: cd web/briefing-widget && npm run build")
+
+@app.get("/widget")
+def widget_root():
+    from fastapi.responses import RedirectResponse
+    return RedirectResponse("/widget/")
 
-if os.path.exists(widget_dist_path):
-    # Mount the entire dist directory at the '/widget' path
-    app.mount(
-        "/widget",
-        StaticFiles(directory=widget_dist_path, html=True),
-        name="widget"
-    )
-    logging.info(f"✅ Widget assets mounted at /widget from {widget_dist_path}")
-else:
-    logging.error(f"❌ Widget 'dist' folder not found at {widget_dist_path}")
-    logging.error("   Please run: cd web/briefing-widget && npm run build")
+@app.api_route("/widget/{path:path}", methods=["GET", "HEAD"])
+def widget_asset(path: str, request: Request):
+    from starlette.responses import FileResponse
+    asset = _widget_assets.lookup(path) if _widget_assets else None
+    if asset is None:
+        return Response(status_code=404)
+    variant = _widget_assets.choose(asset, request.headers.get("accept-encoding", ""))
+    headers = _widget_assets.headers(asset, variant)
+    if _widget_assets.not_modified(asset, variant, request.headers.get("if-none-match"),
+                                   request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers={
+            k: v for k, v in headers.items() if k in ("Cache-Control", "ETag", "Last-Modified", "Vary")
+        })
+    return FileResponse(variant.path, headers=headers, media_type=asset.content_type)
 
 
 @app.get("/healthz")
 def health():
+    startup.mark_first_response()
     return {"ok": True}
 
+@app.get("/debug/startup")
+def startup_report():
+    return startup.report()
+
+@app.get("/debug/sanitizer")
+def sanitizer_stats():
+    """Feed HTML sanitization cache counters (hit rate, time spent in bleach)."""
+    from app.schoology_client.sanitize import get_sanitizer
+    return get_sanitizer().stats()
+
+@app.api_route("/calendar.ics", methods=["GET", "HEAD"])
+async def calendar_feed(request: Request):
+    """
+    Assignments and events as an iCalendar subscription. Served from a pre-built
+    in-memory snapshot (rebuilt by the sync job only when calendar data changes).
+    """
+    from email.utils import parsedate_to_datetime
+    from starlette.concurrency import run_in_threadpool
+    from app.database import ics_feed
+
+    # When set, /calendar.ics requires ?token=<ICS_FEED_TOKEN> (the URL is the credential).
+    # Read per request: this module is imported before lifespan loads .env.
+    token = os.getenv("ICS_FEED_TOKEN")
+    if token and not secrets.compare_digest(request.query_params.get("token", "").encode(), token.encode()):
+        return Response(status_code=404)
+    snap = ics_feed.get_snapshot()
+    if snap is None:
+        from app.database.database import SessionLocal
+        snap = await run_in_threadpool(ics_feed.get_snapshot, SessionLocal)
+
+    gz = assets.accepts(request.headers.get("accept-encoding", ""), "gzip")
+    gz_etag = snap.etag[:-1] + '-gz"'
+    headers = {
+        "ETag": gz_etag if gz else snap.etag,
+        "Last-Modified": snap.last_modified_http,
+        "Cache-Control": "private, max-age=300",
+        "Vary": "Accept-Encoding",
+    }
+    inm = request.headers.get("if-none-match")
+    ims = request.headers.get("if-modified-since")
+    if inm is not None:
+        not_modified = assets.etag_matches(inm, (snap.etag, gz_etag))
+    elif ims:
+        try:
+            not_modified = snap.last_modified <= parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    if gz:
+        headers["Content-Encoding"] = "gzip"
+    body = snap.gzip_body if gz else snap.body
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(len(body))
+        body = b""
+    return Response(content=body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+@app.post("/sync")
+def sync_now(wait: float = 30.0):
+    """
+    Trigger a Schoology sync, coalesced with any sync already running. 200 when the
+    data is fresh (status "fresh" or "joined"), 202 if still running after `wait`
+    seconds, 429 with Retry-After during the per-account cooldown.
+    """
+    from fastapi.responses import JSONResponse
+    from app.scheduler.sync_control import get_coordinator
+    outcome = get_coordinator().request(wait=max(0.0, min(wait, 120.0)))
+    if outcome["status"] == "cooldown":
+        return JSONResponse(outcome, status_code=429, headers={"Retry-After": str(int(outcome["retryAfter"]) + 1)})
+    return JSONResponse(outcome, status_code=202 if outcome["status"] == "pending" else 200)
+
+def get_db():
+    from app.database.database import get_db as _get_db
+    yield from _get_db()
+
 # ... (the rest of your server.py file remains the same) ...
 # (json_rpc_response, serialize_mcp_result, and the /mcp endpoint are all correct)
 
@@ -71,6 +205,7 @@ def json_rpc_response(request_id, result=None, error=None):
 
 def serialize_mcp_result(result):
     """Convert MCP types to JSON-serializable dicts."""
+    import mcp.types as types
     if isinstance(result, types.CallToolResult):
         return {
             "content": [
@@ -83,13 +218,51 @@ def serialize_mcp_result(result):
         }
     return result
 
+def _call_tool(name, args, db, profile):
+    from app import profiling
+    from app.mcp_server import tools
+    with profiling.collecting(profile):
+        return tools.call_tool(name, args, db)
+
 @app.post("/mcp")
-async def mcp_endpoint(request: Request, db: Session = Depends(get_db)):
+async def mcp_endpoint(request: Request, db=Depends(get_db)):
+    startup.mark_first_response()
+    from app.database import retention
+    retention.note_activity()
     try:
         body = await request.json()
     except:
         return json_rpc_response(None, error={"code": -32700, "message": "Parse error"})
-    
+
+    from app import profiling
+    profile = None
+    if profiling.ENABLED:  # the only cost when profiling is off
+        profile = profiling.begin("mcp", _mcp_label(body), request.headers.get(profiling.HEADER))
+    if profile is None:
+        return await _handle_mcp(body, db, None)
+    response = None
+    try:
+        payload = await _handle_mcp(body, db, profile)
+        # Render here, inside the profile, so JSON encoding is part of the sample.
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        with profile.collect():
+            response = JSONResponse(jsonable_encoder(payload))
+    finally:
+        profile_id = profile.finish(response_bytes=len(response.body) if response is not None else None)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+def _mcp_label(body) -> str:
+    params = body.get("params") or {}
+    if body.get("method") in ("tools/call", "call_tool") and params.get("name"):
+        return params["name"]
+    return body.get("method") or "unknown"
+
+async def _handle_mcp(body, db, profile):
+    from app import profiling
+    from app.mcp_server import tools, resources
     method = body.get("method")
     req_id = body.get("id", -1)
     params = body.get("params", {})
@@ -103,15 +276,21 @@ async def mcp_endpoint(request: Request, db: Session = Depends(get_db)):
             })
         
         elif method in ("tools/list", "list_tools"):
-            tool_dicts = tools.list_tools()
+            with profiling.collecting(profile):
+                tool_dicts = tools.list_tools()
             return json_rpc_response(req_id, {"tools": tool_dicts})
         
         elif method in ("tools/call", "call_tool"):
             name = params.get("name")
             args = params.get("arguments") or params.get("args", {})
             
-            result_object = tools.call_tool(name, args, db)
-            serialized = serialize_mcp_result(result_object)
+            if name in tools.BLOCKING_TOOLS:
+                from starlette.concurrency import run_in_threadpool
+                result_object = await run_in_threadpool(_call_tool, name, args, db, profile)
+            else:
+                result_object = _call_tool(name, args, db, profile)
+            with profiling.collecting(profile):
+                serialized = serialize_mcp_result(result_object)
             return json_rpc_response(req_id, serialized)
         
         elif method in ("resources/list", "list_resources"):
@@ -119,7 +298,8 @@ async def mcp_endpoint(request: Request, db: Session = Depends(get_db)):
         
         elif method == "resources/read":
             uri = params.get("uri")
-            result = resources.read_resource(uri)
+            with profiling.collecting(profile):
+                result = resources.read_resource(uri)
             if result:
                 return json_rpc_response(req_id, result)
             return json_rpc_response(req_id, error={"code": 1, "message": "Not found"})
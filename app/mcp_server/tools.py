@@ -1,10 +1,10 @@
 # app/mcp_server/tools.py
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from typing import Any, Dict, List
 import logging
-from app.database import crud
+from app.database import analytics, crud, derived, planner, retention, search, timeline
 import mcp.types as types
 
 WIDGET_URI = "ui://widget/briefing.html"
@@ -53,64 +53,205 @@ def list_tools() -> List[Dict[str, Any]]:
                     "enum": ["today", "48h", "week"],
                     "default": "today",
                     "description": "Time window: 'today' (24h), '48h' (2 days), or 'week' (7 days)"
+                },
+                "types": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": list(derived.ASSIGNMENT_TYPES)},
+                    "description": "Only include these assignment types, e.g. ['Test'] for 'tests this week'"
                 }
             },
             "additionalProperties": False
         },
         "_meta": _tool_meta()
+    }, {
+        "name": "grades.new",
+        "title": "Get New Grades",
+        "description": "Returns recently posted or changed grades, newest first",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "sinceId": {
+                    "type": "integer",
+                    "description": "Only return alerts with an id greater than this (the last one already seen)"
+                },
+                "limit": {"type": "integer", "default": 10, "minimum": 1, "maximum": 50}
+            },
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": True, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "grades.dashboard",
+        "title": "Grades Dashboard",
+        "description": "Course averages with trend arrows; pass courseId for a breakdown of why that course's grade changed",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "courseId": {
+                    "type": "integer",
+                    "description": "Explain this course: average over time, the latest change, and the assignments helping or hurting most"
+                },
+                "historyPoints": {"type": "integer", "default": 20, "minimum": 2, "maximum": 100}
+            },
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": True, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "search.query",
+        "title": "Search Schoology",
+        "description": "Full-text search over assignments, events and announcements (e.g. 'gatsby essay', 'field trip')",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Words to search for; each word matches as a prefix"},
+                "kinds": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": ["assignment", "event", "update"]},
+                    "description": "Restrict results to these item kinds"
+                },
+                "limit": {"type": "integer", "default": 10, "minimum": 1, "maximum": 50},
+                "includeArchived": {
+                    "type": "boolean", "default": False,
+                    "description": "Also search items moved to the archive by retention (older terms)"
+                }
+            },
+            "required": ["query"],
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": True, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "timeline.get",
+        "title": "Get Timeline",
+        "description": "Assignments, events, announcements and grades merged in time order; page with nextCursor",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "range": {"type": "string", "enum": ["today", "48h", "week", "month"], "default": "week"},
+                "start": {"type": "string", "description": "ISO timestamp to start from; no offset means UTC (default: now)"},
+                "kinds": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": list(timeline.STREAMS)},
+                    "description": "Restrict the timeline to these item kinds"
+                },
+                "limit": {"type": "integer", "default": 20, "minimum": 1, "maximum": 100},
+                "cursor": {"type": "string", "description": "nextCursor from the previous page"}
+            },
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": True, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "sync.now",
+        "title": "Refresh From Schoology",
+        "description": "Syncs with Schoology now (or joins a sync already running) and reports whether the data is fresh",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "wait": {
+                    "type": "number", "default": 30, "minimum": 0, "maximum": 120,
+                    "description": "Seconds to wait for the sync to finish"
+                }
+            },
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": False, "destructiveHint": False, "openWorldHint": True}
+    }, {
+        "name": "planner.list",
+        "title": "Show Planner Board",
+        "description": "Returns the planner board (todo / in_progress / done), adding upcoming assignments to 'todo'",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "importAssignments": {"type": "boolean", "default": True},
+                "columns": {"type": "array", "items": {"type": "string", "enum": list(planner.COLUMNS)}}
+            },
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": False, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "planner.create",
+        "title": "Add Planner Task",
+        "description": "Adds a personal task to the end of a planner column",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "column": {"type": "string", "enum": list(planner.COLUMNS), "default": "todo"},
+                "dueAt": {"type": "string", "description": "ISO-8601 due time, optional; no offset means UTC"}
+            },
+            "required": ["title"],
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": False, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "planner.move",
+        "title": "Move Planner Tasks",
+        "description": "Moves one or more tasks; each lands after `afterId` and/or before `beforeId` in `column`",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "moves": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "column": {"type": "string", "enum": list(planner.COLUMNS)},
+                            "afterId": {"type": "integer"},
+                            "beforeId": {"type": "integer"},
+                            "version": {"type": "integer", "description": "Version last seen; stale moves are rejected"}
+                        },
+                        "required": ["id"]
+                    }
+                }
+            },
+            "required": ["moves"],
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": False, "destructiveHint": False, "openWorldHint": False}
+    }, {
+        "name": "planner.complete",
+        "title": "Complete Planner Task",
+        "description": "Marks a task done",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, "version": {"type": "integer"}},
+            "required": ["id"],
+            "additionalProperties": False
+        },
+        "annotations": {"readOnlyHint": False, "destructiveHint": False, "openWorldHint": False}
     }]
 
-def _fmt_display(dt: datetime | None) -> str:
-    if not dt:
-        return ""
-    try:
-        # Use '%-I' on Unix-like systems for non-padded hour, fallback to '%I'
-        return dt.strftime("%a, %b %d @ %-I:%M %p").replace('AM', 'am').replace('PM', 'pm')
-    except ValueError:
-        return dt.strftime("%a, %b %d @ %I:%M %p").replace('AM', 'am').replace('PM', 'pm')
-
-def get_assignment_type(title: str) -> str:
-    """Identify assignment type from its title."""
-    title_lower = title.lower()
-    if "test" in title_lower:
-        return "Test"
-    if "quiz" in title_lower:
-        return "Quiz"
-    if "project" in title_lower:
-        return "Project"
-    if "essay" in title_lower or "paper" in title_lower:
-        return "Paper"
-    return "Homework"  # Default
-
 def call_tool(name: str, args: dict, db: Session) -> types.CallToolResult:
     """Execute tool and return proper MCP result."""
-    
-    if name != "briefing.get":
+    handler = _HANDLERS.get(name)
+    if handler is None:
         return types.CallToolResult(
             content=[types.TextContent(type="text", text=f"Unknown tool: {name}")],
             isError=True
         )
-    
+    return handler(args or {}, db)
+
+def _briefing_get(args: dict, db: Session) -> types.CallToolResult:
     window = args.get("range", "today").lower().strip()
     hours_map = {"today": 24, "48h": 48, "week": 168}
     hours = hours_map.get(window, 24)
     label_map = {"today": "today", "48h": "the next 48h", "week": "the next 7 days"}
     label = label_map.get(window, "soon")
     
-    assignments = crud.upcoming_assignments(db, window_hours=hours, limit=50)
+    types_filter = [t for t in (args.get("types") or []) if t in derived.ASSIGNMENT_TYPES]
+    assignments = crud.upcoming_assignments(db, window_hours=hours, limit=50, types=types_filter or None)
     
     # Data for the UI (_meta): The full, detailed list
     ui_items = [{
         "id": a.id, "title": a.title, "course": a.course_name, "url": a.url,
         "dueAt": a.due_at_utc.isoformat() if a.due_at_utc else None,
-        "dueAtDisplay": _fmt_display(a.due_at_utc),
-        "type": get_assignment_type(a.title)
+        "dueAtDisplay": a.due_display or "",
+        "type": a.assignment_type
     } for a in assignments]
     
     # Data for the Model (structuredContent): A concise summary
     model_summary_items = [{
         "title": a.title, "course": a.course_name,
-        "due": _fmt_display(a.due_at_utc)
+        "due": a.due_display or ""
     } for a in assignments[:5]] # Only show top 5 to the model
 
     # Build the final payloads
@@ -144,4 +285,206 @@ def call_tool(name: str, args: dict, db: Session) -> types.CallToolResult:
             "openai.com/widget": widget_resource.model_dump(mode="json"),
             "ui": meta_for_ui # Nest all UI-specific data here
         }
-    )
\ No newline at end of file
+    )
+
+def _grades_new(args: dict, db: Session) -> types.CallToolResult:
+    since_id = args.get("sinceId")
+    limit = max(1, min(int(args.get("limit", 10)), 50))
+    alerts = crud.recent_grade_alerts(db, since_id=since_id, limit=limit)
+
+    items = [{
+        "id": a.id,
+        "kind": a.kind,
+        "course": a.course_name,
+        "assignment": a.assignment_title,
+        "score": a.score_raw,
+        "previousScore": a.previous_score_raw,
+        "percent": a.score_pct,
+        "postedAt": a.created_at_utc.isoformat() if a.created_at_utc else None,
+    } for a in alerts]
+
+    if items:
+        text = f"{len(items)} new or changed grade(s)."
+    else:
+        text = "No new grades."
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=text)],
+        structuredContent={
+            "grades": items,
+            "latestId": items[0]["id"] if items else since_id,
+        },
+    )
+
+def _grades_dashboard(args: dict, db: Session) -> types.CallToolResult:
+    dash = analytics.get(db)
+    courses = dash.summaries()
+    structured = {"courses": courses, "generation": dash.generation}
+    if not courses:
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text="No graded assignments yet.")],
+            structuredContent=structured,
+        )
+
+    lines = [
+        f"{c['course']}: {c['average']:.1f}% {c['arrow']}"
+        + (f" ({c['delta']:+.1f})" if c["trend"] in ("up", "down") else "")
+        for c in courses
+    ]
+    course_id = args.get("courseId")
+    if course_id is not None:
+        course = dash.courses.get(int(course_id))
+        if course is None:
+            return _error(f"No graded assignments for course {course_id}.")
+        history_points = max(2, min(int(args.get("historyPoints", 20)), 100))
+        detail = course.detail(history_points=history_points)
+        structured["detail"] = {**course.summary(), **detail}
+        causes = ", ".join(f"{e['assignment']} ({e['score']}, {e['impact']:+.1f})" for e in detail["lastChange"])
+        if course.previous_average is None:
+            lines = [f"{course.course_name}: {course.average:.1f}% from its first graded work: {causes}."]
+        else:
+            lines = [f"{course.course_name} went from {course.previous_average:.1f}% to {course.average:.1f}% "
+                     f"after: {causes}."]
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text="\n".join(lines))],
+        structuredContent=structured,
+    )
+
+def _search_query(args: dict, db: Session) -> types.CallToolResult:
+    query = (args.get("query") or "").strip()
+    limit = max(1, min(int(args.get("limit", 10)), 50))
+    hits = search.search(db, query, limit=limit, kinds=args.get("kinds"))
+    if args.get("includeArchived") and len(hits) < limit:
+        hits += retention.search_archive(db, query, limit=limit - len(hits), kinds=args.get("kinds"))
+
+    items = [{
+        "kind": h["kind"],
+        "id": h["ref_id"],
+        "title": h["title"] or h["snippet"],
+        "course": h["course"],
+        "at": h["at"],
+        "url": h["url"],
+        "snippet": h["snippet"],
+        "archived": h.get("archived", False),
+    } for h in hits]
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"Found {len(items)} result(s) for '{query}'.")],
+        structuredContent={"query": query, "results": items},
+    )
+
+def _parse_utc(value: str) -> datetime:
+    """
+    ISO-8601 input as naive UTC, the form SQLite stores: SQLAlchemy's SQLite DateTime
+    drops tzinfo when binding, so "...-05:00" would otherwise compare as local wall time.
+    A value without an offset is taken to be UTC already.
+    """
+    dt = datetime.fromisoformat(value)
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+def _timeline_get(args: dict, db: Session) -> types.CallToolResult:
+    limit = max(1, min(int(args.get("limit", 20)), 100))
+    hours = {"today": 24, "48h": 48, "week": 168, "month": 720}.get(args.get("range", "week"), 168)
+    try:
+        start = _parse_utc(args["start"]) if args.get("start") else datetime.now(timezone.utc).replace(tzinfo=None)
+        page = timeline.timeline_page(
+            db, start=start, end=start + timedelta(hours=hours),
+            kinds=args.get("kinds"), limit=limit, cursor=args.get("cursor"),
+        )
+    except ValueError as e:
+        return _error(str(e))
+
+    more = " More available via nextCursor." if page["nextCursor"] else ""
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"{len(page['items'])} timeline item(s).{more}")],
+        structuredContent=page,
+    )
+
+_SYNC_MESSAGES = {
+    "fresh": "Synced with Schoology; data is up to date.",
+    "joined": "A sync was already running; joined it and data is now up to date.",
+    "cooldown": "Data was synced moments ago; try again in {retryAfter:.0f}s for another refresh.",
+    "pending": "Sync started but is still running; check back shortly.",
+}
+
+def _sync_now(args: dict, db: Session) -> types.CallToolResult:
+    from app.scheduler.sync_control import get_coordinator
+    wait = max(0.0, min(float(args.get("wait", 30)), 120.0))
+    outcome = get_coordinator().request(wait=wait)
+    text = _SYNC_MESSAGES[outcome["status"]].format(**outcome)
+    failed = outcome["sync"]["ok"] is False
+    if failed:
+        text = f"Sync failed: {outcome['sync']['error']}"
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=text)],
+        structuredContent=outcome,
+        isError=failed,
+    )
+
+def _error(text: str) -> types.CallToolResult:
+    return types.CallToolResult(content=[types.TextContent(type="text", text=text)], isError=True)
+
+def _planner_list(args: dict, db: Session) -> types.CallToolResult:
+    imported = planner.import_upcoming_assignments(db) if args.get("importAssignments", True) else 0
+    tasks = [planner.to_dict(t) for t in planner.list_tasks(db, args.get("columns"))]
+    board = {c: [t for t in tasks if t["column"] == c] for c in planner.COLUMNS}
+    counts = ", ".join(f"{len(board[c])} {c}" for c in planner.COLUMNS)
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"Planner: {counts}.")],
+        structuredContent={"board": board, "imported": imported},
+    )
+
+def _planner_create(args: dict, db: Session) -> types.CallToolResult:
+    title = (args.get("title") or "").strip()
+    if not title:
+        return _error("A task title is required.")
+    due = args.get("dueAt")
+    try:
+        task = planner.create_task(
+            db, title, column=args.get("column", "todo"),
+            due_at_utc=_parse_utc(due) if due else None,
+        )
+    except ValueError as e:
+        return _error(str(e))
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"Added '{task.title}' to {task.column}.")],
+        structuredContent={"task": planner.to_dict(task)},
+    )
+
+def _planner_move(args: dict, db: Session) -> types.CallToolResult:
+    moves = args.get("moves") or []
+    if not moves:
+        return _error("No moves given.")
+    results = planner.move_tasks(db, moves)
+    failed = sum(not r["ok"] for r in results)
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"Moved {len(results) - failed} task(s); {failed} failed.")],
+        structuredContent={"results": results},
+        isError=failed == len(results),
+    )
+
+def _planner_complete(args: dict, db: Session) -> types.CallToolResult:
+    task_id = args.get("id")
+    if not isinstance(task_id, int) or isinstance(task_id, bool):
+        return _error("A task id is required.")
+    result = planner.complete_task(db, task_id, args.get("version"))
+    text = "Task marked done." if result["ok"] else f"Could not complete task: {result['error']}."
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=text)],
+        structuredContent=result,
+        isError=not result["ok"],
+    )
+
+# Tools that may block for seconds; the /mcp endpoint runs these off the event loop.
+BLOCKING_TOOLS = {"sync.now"}
+
+_HANDLERS = {
+    "briefing.get": _briefing_get,
+    "grades.new": _grades_new,
+    "grades.dashboard": _grades_dashboard,
+    "search.query": _search_query,
+    "timeline.get": _timeline_get,
+    "sync.now": _sync_now,
+    "planner.list": _planner_list,
+    "planner.create": _planner_create,
+    "planner.move": _planner_move,
+    "planner.complete": _planner_complete,
+}
@@ -0,0 +1,180 @@
+# app/profiling.py
+
+"""
+Opt-in cProfile sampling for /mcp requests and sync runs.
+
+Off unless PROFILE_SAMPLE_RATE > 0 or PROFILE_TOKEN is set; when off, the /mcp
+handler checks one module constant and `profiled()` returns the sync function
+unwrapped, so there is no per-call cost at all.
+
+    PROFILE_SAMPLE_RATE=0.05   profile ~5% of /mcp requests and sync runs
+    PROFILE_TOKEN=s3cret       always profile requests sent with `X-Profile: s3cret`
+    PROFILE_DIR=profiles       where profiles go; only the newest PROFILE_KEEP are kept
+    PROFILE_KEEP=50
+
+Each sample writes `<time>_<kind>_<label>.prof` (load it with pstats or snakeviz)
+and a `.txt` next to it listing the top hot spots by own time and by cumulative
+time. `python -m app.profiling` merges every profile in the directory into one
+summary. cProfile only sees the thread it runs on: time a sync spends in its fetch
+thread pools shows up as waiting on futures. One profile is collected at a time;
+samples that would overlap an active one are skipped.
+"""
+
+import argparse
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+TOKEN = os.getenv("PROFILE_TOKEN") or None
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+TOP = int(os.getenv("PROFILE_TOP", "25"))
+HEADER = "X-Profile"
+
+ENABLED = SAMPLE_RATE > 0 or TOKEN is not None
+
+_active = threading.Lock()
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.-]+", "-", text).strip("-")[:60] or "run"
+
+
+def summarize(stats: pstats.Stats, top: int = TOP) -> str:
+    """The top `top` functions by own time and by cumulative time."""
+    buf = io.StringIO()
+    stats.stream = buf
+    for key, title in (("tottime", "own time"), ("cumulative", "cumulative time")):
+        buf.write(f"--- top {top} by {title} ---\n")
+        stats.sort_stats(key).print_stats(top)
+    return buf.getvalue()
+
+
+class Profile:
+    """One sampled run. `collect()` may be entered several times, from any thread."""
+
+    def __init__(self, kind: str, label: str):
+        self.kind = kind
+        self.label = label
+        self.started = time.perf_counter()
+        self.profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{_slug(kind)}_{_slug(label)}"
+        self._profiler = cProfile.Profile()
+
+    @contextmanager
+    def collect(self):
+        try:
+            self._profiler.enable()
+        except ValueError:  # another profiler (a debugger, coverage) owns the hook
+            yield
+            return
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+
+    def finish(self, **extra) -> str | None:
+        """Write the .prof and .txt summary, prune old samples, and release the slot."""
+        try:
+            wall_ms = (time.perf_counter() - self.started) * 1000
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            base = os.path.join(PROFILE_DIR, self.profile_id)
+            self._profiler.dump_stats(base + ".prof")
+            header = [f"{self.kind}: {self.label}", f"wall: {wall_ms:.1f} ms"]
+            header += [f"{k}: {v}" for k, v in extra.items()]
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(header) + "\n\n" + summarize(pstats.Stats(self._profiler)))
+            _prune()
+            logging.info(f"Profile written: {base}.txt ({wall_ms:.0f} ms)")
+            return self.profile_id
+        except OSError as e:
+            logging.warning(f"Could not write profile {self.profile_id}: {e}")
+            return None
+        finally:
+            _active.release()
+
+
+def begin(kind: str, label: str = "", header: str | None = None) -> Profile | None:
+    """A `Profile` if this run is sampled (or `header` carries the token), else None."""
+    # Bytes, so a non-ASCII header value can't make compare_digest raise.
+    forced = TOKEN is not None and header is not None and secrets.compare_digest(header.encode(), TOKEN.encode())
+    if not forced and (SAMPLE_RATE <= 0 or random.random() >= SAMPLE_RATE):
+        return None
+    if not _active.acquire(blocking=False):
+        logging.debug(f"Skipping {kind} profile; another one is being collected")
+        return None
+    return Profile(kind, label)
+
+
+def collecting(profile: Profile | None):
+    """`profile.collect()`, or a no-op when the run isn't sampled."""
+    return profile.collect() if profile is not None else nullcontext()
+
+
+def profiled(kind: str):
+    """Decorator sampling whole calls of a function. Returns it unchanged when profiling is off."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = begin(kind, fn.__name__)
+            if profile is None:
+                return fn(*args, **kwargs)
+            try:
+                with profile.collect():
+                    return fn(*args, **kwargs)
+            finally:
+                profile.finish()
+        return wrapper
+    return decorate
+
+
+def _prune():
+    try:
+        names = sorted(n for n in os.listdir(PROFILE_DIR) if n.endswith(".prof"))
+    except FileNotFoundError:
+        return
+    for name in names[:max(0, len(names) - KEEP)]:
+        for ext in (".prof", ".txt"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name[:-5] + ext))
+            except FileNotFoundError:
+                pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=PROFILE_DIR, help="profile directory")
+    parser.add_argument("--kind", help="only merge profiles of this kind (mcp, sync)")
+    parser.add_argument("--top", type=int, default=TOP, help="rows per table")
+    args = parser.parse_args(argv)
+
+    try:
+        names = sorted(n for n in os.listdir(args.dir) if n.endswith(".prof"))
+    except FileNotFoundError:
+        names = []
+    if args.kind:
+        names = [n for n in names if f"_{args.kind}_" in n]
+    if not names:
+        print(f"No profiles in {args.dir}")
+        return 1
+    stats = pstats.Stats(*(os.path.join(args.dir, n) for n in names))
+    print(f"{len(names)} profile(s) from {names[0][:22]} to {names[-1][:22]}\n")
+    print(summarize(stats, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,234 @@
+# app/scheduler/pipeline.py
+
+"""
+Staged pipeline runner for the sync job.
+
+    fetch tasks (thread pool) -> [queue] -> transform (one thread) -> [queue] -> write (caller's thread)
+
+Fetch tasks each return one item. The transform stage receives whatever items are
+waiting (up to a queue's worth) as one list, and so does the writer, so a stage that
+falls behind naturally works in bigger batches. Both queues are bounded: when the
+writer is the bottleneck, transform blocks, then fetchers block, and no more than
+`queue_size` items per queue are ever held in memory.
+
+Writes happen on the calling thread, so a SQLAlchemy session owned by the caller is
+never touched from another thread. The first exception in any stage cancels the
+rest and is re-raised from `run()`.
+
+With `overlap=False` the same stages run back to back (all fetches, then all
+transforms, then all writes), which is useful for comparison and debugging.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+_DONE = object()
+_POLL = 0.1
+
+
+class Cancelled(Exception):
+    pass
+
+
+class StageStats:
+    """Time a stage spent working vs waiting on its queues, and items it handled."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.items = 0
+        self.batches = 0
+        self.started: float | None = None
+        self.finished: float | None = None
+        self._lock = threading.Lock()
+
+    def add(self, busy: float = 0.0, blocked: float = 0.0, items: int = 0, batches: int = 0):
+        with self._lock:
+            self.busy += busy
+            self.blocked += blocked
+            self.items += items
+            self.batches += batches
+
+    def to_dict(self) -> dict:
+        wall = (self.finished - self.started) if self.started is not None and self.finished is not None else 0.0
+        return {
+            "wall_ms": round(wall * 1000, 1),
+            "busy_ms": round(self.busy * 1000, 1),
+            "blocked_ms": round(self.blocked * 1000, 1),
+            "items": self.items,
+            "batches": self.batches,
+        }
+
+
+class Pipeline:
+    def __init__(self, fetchers: list[Callable[[], Any]], transform: Callable[[list], list],
+                 write: Callable[[list], None], flush: Callable[[], None] | None = None,
+                 fetch_workers: int = 4, queue_size: int = 4, overlap: bool = True):
+        self.fetchers = fetchers
+        self.transform = transform
+        self.write = write
+        self.flush = flush
+        self.fetch_workers = max(1, fetch_workers)
+        self.overlap = overlap
+        # Sequential mode holds everything between stages, so its queues are unbounded.
+        size = max(1, queue_size) if overlap else 0
+        self._raw: queue.Queue = queue.Queue(size)
+        self._parsed: queue.Queue = queue.Queue(size)
+        self._cancel = threading.Event()
+        self._error: BaseException | None = None
+        self._error_lock = threading.Lock()
+        self.stats = {name: StageStats(name) for name in ("fetch", "parse", "write")}
+        self.wall = 0.0
+
+    # --- queue helpers ---
+
+    def _fail(self, e: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = e
+        self._cancel.set()
+
+    def _put(self, q: queue.Queue, item, stats: StageStats):
+        t0 = time.perf_counter()
+        while True:
+            if self._cancel.is_set():
+                raise Cancelled()
+            try:
+                q.put(item, timeout=_POLL)
+                break
+            except queue.Full:
+                continue
+        stats.add(blocked=time.perf_counter() - t0)
+
+    def _get_batch(self, q: queue.Queue, stats: StageStats) -> tuple[list, bool]:
+        """Block for one item, then take whatever else is already waiting. Returns (items, done)."""
+        t0 = time.perf_counter()
+        while True:
+            if self._cancel.is_set():
+                raise Cancelled()
+            try:
+                first = q.get(timeout=_POLL)
+                break
+            except queue.Empty:
+                continue
+        stats.add(blocked=time.perf_counter() - t0)
+        if first is _DONE:
+            return [], True
+        items, limit = [first], q.maxsize or None
+        while limit is None or len(items) < limit:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    # --- stages ---
+
+    def _fetch_one(self, fetch: Callable[[], Any]):
+        stats = self.stats["fetch"]
+        if self._cancel.is_set():
+            return
+        try:
+            t0 = time.perf_counter()
+            item = fetch()
+            stats.add(busy=time.perf_counter() - t0, items=1)
+            self._put(self._raw, item, stats)
+        except Cancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _fetch_stage(self):
+        stats = self.stats["fetch"]
+        stats.started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="sync-fetch") as pool:
+                for _ in pool.map(self._fetch_one, self.fetchers):
+                    pass
+            stats.finished = time.perf_counter()
+            self._put(self._raw, _DONE, stats)
+        except Cancelled:
+            pass
+        finally:
+            if stats.finished is None:
+                stats.finished = time.perf_counter()
+
+    def _transform_stage(self):
+        stats = self.stats["parse"]
+        stats.started = time.perf_counter()
+        try:
+            done = False
+            while not done:
+                items, done = self._get_batch(self._raw, stats)
+                if items:
+                    t0 = time.perf_counter()
+                    out = self.transform(items)
+                    stats.add(busy=time.perf_counter() - t0, items=len(items), batches=1)
+                    for o in out:
+                        self._put(self._parsed, o, stats)
+            stats.finished = time.perf_counter()
+            self._put(self._parsed, _DONE, stats)
+        except Cancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if stats.finished is None:
+                stats.finished = time.perf_counter()
+
+    def _write_stage(self):
+        stats = self.stats["write"]
+        stats.started = time.perf_counter()
+        try:
+            done = False
+            while not done:
+                items, done = self._get_batch(self._parsed, stats)
+                if items:
+                    t0 = time.perf_counter()
+                    self.write(items)
+                    stats.add(busy=time.perf_counter() - t0, items=len(items), batches=1)
+            if self.flush:
+                t0 = time.perf_counter()
+                self.flush()
+                stats.add(busy=time.perf_counter() - t0)
+        except Cancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            stats.finished = time.perf_counter()
+
+    def run(self) -> dict:
+        """Run every stage to completion; returns per-stage timings."""
+        t0 = time.perf_counter()
+        if self.overlap:
+            threads = [
+                threading.Thread(target=self._fetch_stage, name="sync-fetch-stage", daemon=True),
+                threading.Thread(target=self._transform_stage, name="sync-parse", daemon=True),
+            ]
+            for t in threads:
+                t.start()
+            self._write_stage()
+            for t in threads:
+                t.join()
+        else:
+            self._fetch_stage()
+            self._transform_stage()
+            self._write_stage()
+        self.wall = time.perf_counter() - t0
+        if self._error is not None:
+            raise self._error
+        return self.report()
+
+    def report(self) -> dict:
+        report = {name: s.to_dict() for name, s in self.stats.items()}
+        report["wall_ms"] = round(self.wall * 1000, 1)
+        report["overlap"] = self.overlap
+        return report
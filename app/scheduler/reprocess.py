@@ -0,0 +1,125 @@
+# app/scheduler/reprocess.py
+
+"""
+Re-run ingestion from the raw-response archive instead of refetching from Schoology.
+
+    python -m app.scheduler.reprocess                      # latest response per endpoint/key
+    python -m app.scheduler.reprocess --all                # every archived response, in fetch order
+    python -m app.scheduler.reprocess --endpoint calendar --since-days 30
+    python -m app.scheduler.reprocess --all --endpoint calendar --key 1760000000-1765000000
+    python -m app.scheduler.reprocess --db sqlite:///scratch.db   # e.g. as a benchmark corpus
+
+After fixing a parser or an upsert (say, how assignment links are built), this repairs
+historical rows at local disk speed. Grade replays never emit new-grade alerts.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import crud
+from app.database.database import SessionLocal, init_db
+from app.schoology_client.archive import ResponseArchive
+from app.schoology_client.client import parse_feed_html, parse_grades_html, unwrap_materials_payload
+from app.schoology_client.parsing import parse_materials_html
+
+
+def _course_id(key: str) -> int:
+    return int(dict(p.split("=", 1) for p in key.split("&"))["course"])
+
+
+def ingest_entry(db: Session, endpoint: str, key: str, body: bytes) -> int:
+    """Run one archived response through the same ingestion as a live sync. Returns items seen."""
+    if endpoint == "calendar":
+        events = json.loads(body)
+        if events:
+            crud.upsert_calendar_events(db, events)
+        return len(events or [])
+    if endpoint == "grades":
+        grades = parse_grades_html(body.decode("utf-8", errors="replace"), _course_id(key))
+        crud.upsert_grades(db, grades, emit_alerts=False)
+        return len(grades)
+    if endpoint == "materials":
+        html = unwrap_materials_payload(body.decode("utf-8", errors="replace"))
+        records = parse_materials_html(html, _course_id(key))
+        crud.upsert_course_materials(db, records)
+        return len(records)
+    if endpoint == "feed":
+        updates = parse_feed_html(unwrap_materials_payload(body.decode("utf-8", errors="replace")))
+        crud.upsert_feed_updates(db, updates)
+        return len(updates)
+    logging.warning(f"Skipping archived response for unknown endpoint {endpoint!r}")
+    return 0
+
+
+def reprocess(archive: ResponseArchive, db: Session, endpoint: str | None = None,
+              since: float | None = None, latest_only: bool = True, key: str | None = None) -> dict:
+    # Calendar before materials: materials skip assignments the calendar already covers.
+    order = {"calendar": 0, "grades": 1, "materials": 2, "feed": 3}
+    entries = sorted(
+        archive.entries(endpoint=endpoint, since=since, latest_only=latest_only, key=key),
+        key=lambda e: (order.get(e.endpoint, 9), e.id) if latest_only else e.id,
+    )
+    t0 = time.perf_counter()
+    stats = {"entries": 0, "items": 0, "raw_bytes": 0, "errors": 0}
+    for entry in entries:
+        try:
+            body = archive.read(entry.sha256)
+            stats["items"] += ingest_entry(db, entry.endpoint, entry.key, body)
+            stats["raw_bytes"] += len(body)
+            stats["entries"] += 1
+        except Exception as e:
+            db.rollback()
+            stats["errors"] += 1
+            logging.error(f"Failed to reprocess archive entry {entry.id} ({entry.endpoint} {entry.key}): {e}")
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = round(elapsed, 3)
+    stats["mb_per_s"] = round(stats["raw_bytes"] / 1e6 / elapsed, 2) if elapsed else None
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", help="archive directory (default: $SCHOOLOGY_ARCHIVE_DIR)")
+    parser.add_argument("--endpoint", choices=["calendar", "grades", "materials", "feed"])
+    parser.add_argument("--key", help="only responses archived under this key (a calendar window "
+                                      "'<start_ts>-<end_ts>', 'course=<id>', 'page=<n>')")
+    parser.add_argument("--since-days", type=float, help="only responses fetched in the last N days")
+    parser.add_argument("--all", action="store_true", help="replay every response, not just the latest per key")
+    parser.add_argument("--db", help="target database URL (default: the app database)")
+    args = parser.parse_args(argv)
+
+    archive = ResponseArchive(args.archive) if args.archive else ResponseArchive.from_env()
+    if archive is None:
+        print("No archive: pass --archive or set SCHOOLOGY_ARCHIVE_DIR.", file=sys.stderr)
+        return 2
+
+    if args.db:
+        engine = create_engine(args.db, connect_args={"check_same_thread": False})
+        init_db(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+    else:
+        init_db()
+        db = SessionLocal()
+    since = time.time() - args.since_days * 86400 if args.since_days else None
+    try:
+        stats = reprocess(archive, db, endpoint=args.endpoint, since=since, latest_only=not args.all,
+                          key=args.key)
+    finally:
+        db.close()
+        archive.close()
+    print(json.dumps(stats, indent=2))
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,21 +2,30 @@
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.orm import Session
-from app.database.database import SessionLocal
-from app.scheduler.sync_job import sync_schoology_data
+from app.database import retention
+from app.database.database import engine
+from app.scheduler.sync_control import get_coordinator
+from app.schoology_client.parsing import shutdown_materials_parser
+from app.schoology_client.sanitize import shutdown_sanitizer
+import os
 import random
 import logging
-from datetime import datetime, timezone # <-- ADD THIS
+from datetime import datetime, timedelta, timezone # <-- ADD THIS
+
+SYNC_INTERVAL = timedelta(minutes=5)
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
 
 _scheduler: BackgroundScheduler | None = None
 
 def _job_wrapper():
-    db: Session = SessionLocal()
-    try:
-        sync_schoology_data(db)
-    finally:
-        db.close()
+    # Goes through the coordinator so it never overlaps an on-demand sync.
+    get_coordinator().run_scheduled()
+
+def _postpone_scheduled_sync():
+    """An on-demand sync stands in for the next periodic one."""
+    job = _scheduler.get_job("schoology_sync_job") if _scheduler else None
+    if job:
+        job.modify(next_run_time=datetime.now(timezone.utc) + SYNC_INTERVAL)
 
 def start_scheduler():
     global _scheduler
@@ -28,12 +37,23 @@ def start_scheduler():
     # Run every 5 minutes with jitter
     _scheduler.add_job(
         _job_wrapper, 
-        IntervalTrigger(minutes=5, jitter=random.randint(0, 60)),
+        IntervalTrigger(seconds=int(SYNC_INTERVAL.total_seconds()), jitter=random.randint(0, 60)),
         id="schoology_sync_job",
         replace_existing=True,
         misfire_grace_time=300 # 5 minutes grace period
     )
+    # Retention: archive old rows daily; give freed pages back whenever the server is idle.
+    _scheduler.add_job(
+        retention.retention_job, IntervalTrigger(hours=RETENTION_INTERVAL_HOURS), args=[engine],
+        id="retention_job", replace_existing=True,
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=10),
+    )
+    _scheduler.add_job(
+        retention.idle_vacuum_job, IntervalTrigger(minutes=5), args=[engine],
+        id="idle_vacuum_job", replace_existing=True,
+    )
     _scheduler.start()
+    get_coordinator().on_manual_start = _postpone_scheduled_sync
     # Trigger the first run immediately
     _scheduler.get_job('schoology_sync_job').modify(next_run_time=datetime.now(timezone.utc))
     logging.info("Scheduler started and first sync triggered.")
@@ -44,4 +64,6 @@ def stop_scheduler():
     if _scheduler and _scheduler.running:
         logging.info("Shutting down background scheduler...")
         _scheduler.shutdown()
-        logging.info("Scheduler shut down.")
\ No newline at end of file
+        logging.info("Scheduler shut down.")
+    shutdown_materials_parser()
+    shutdown_sanitizer()
\ No newline at end of file
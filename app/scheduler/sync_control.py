@@ -0,0 +1,153 @@
+# app/scheduler/sync_control.py
+
+"""
+Single-flight coordination for Schoology syncs.
+
+Every sync, scheduled or on demand, goes through `SyncCoordinator`, so at most one
+runs at a time. A trigger that arrives while a sync is running joins it and waits
+on the same result instead of starting a second one. An on-demand run also pushes
+the periodic job's next run back a full interval, so the two don't run back to back.
+On-demand triggers are rate-limited per account: within the cooldown after a sync
+finishes, callers get that sync's result back instead of a new run.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+# Minimum gap between a finished sync and an on-demand one for the same account.
+SYNC_NOW_COOLDOWN_SECONDS = float(os.getenv("SYNC_NOW_COOLDOWN_SECONDS", "60"))
+# A scheduled run this soon after any other sync finished is skipped as redundant.
+SCHEDULED_MIN_GAP_SECONDS = float(os.getenv("SYNC_SCHEDULED_MIN_GAP_SECONDS", "60"))
+
+
+def default_account() -> str:
+    """This server syncs one Schoology account; cooldowns are keyed by its user ID."""
+    return os.getenv("SCHOOLOGY_USER_ID") or "default"
+
+
+class SyncRun:
+    def __init__(self, trigger: str):
+        self.trigger = trigger
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: datetime | None = None
+        self.finished_monotonic: float | None = None
+        self.result: dict | None = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "trigger": self.trigger,
+            "startedAt": self.started_at.isoformat(),
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+            "ok": self.result.get("ok") if self.result else None,
+            "error": self.result.get("error") if self.result else None,
+        }
+
+
+class SyncCoordinator:
+    def __init__(self, sync_fn: Callable[[], dict], cooldown: float = SYNC_NOW_COOLDOWN_SECONDS,
+                 scheduled_min_gap: float = SCHEDULED_MIN_GAP_SECONDS):
+        self._sync_fn = sync_fn
+        self.cooldown = cooldown
+        self.scheduled_min_gap = scheduled_min_gap
+        self._lock = threading.Lock()
+        self._current: SyncRun | None = None
+        self._last: SyncRun | None = None
+        self._last_by_account: dict[str, SyncRun] = {}
+        self.on_manual_start: Callable[[], None] | None = None
+
+    @property
+    def in_flight(self) -> SyncRun | None:
+        return self._current
+
+    def _execute(self, run: SyncRun, account: str | None):
+        try:
+            run.result = self._sync_fn()
+        except Exception as e:  # sync_fn logs its own failures; never leave joiners hanging
+            logging.error(f"Sync ({run.trigger}) raised: {e}", exc_info=True)
+            run.result = {"ok": False, "error": str(e)}
+        finally:
+            run.finished_at = datetime.now(timezone.utc)
+            run.finished_monotonic = time.monotonic()
+            with self._lock:
+                self._current = None
+                self._last = run
+                if account is not None:
+                    self._last_by_account[account] = run
+            run.done.set()
+
+    def run_scheduled(self) -> SyncRun | None:
+        """Body of the periodic job: join a sync in flight, skip if one just finished, else run inline."""
+        with self._lock:
+            run = self._current
+            if run is None:
+                last = self._last
+                if last and time.monotonic() - last.finished_monotonic < self.scheduled_min_gap:
+                    logging.info("Skipping scheduled sync; a sync just finished.")
+                    return None
+                run = self._current = SyncRun("scheduled")
+                owner = True
+            else:
+                owner = False
+        if owner:
+            self._execute(run, default_account())
+        else:
+            logging.info(f"Scheduled sync joined the in-flight {run.trigger} sync.")
+            run.done.wait()
+        return run
+
+    def request(self, account: str | None = None, wait: float | None = 60.0) -> dict:
+        """
+        On-demand trigger. Returns `status`:
+          "fresh"    - this call started a sync and it has finished
+          "joined"   - a sync was already running; this call waited for it
+          "cooldown" - the account synced moments ago; that result is returned
+          "pending"  - the sync is still running after `wait` seconds
+        """
+        account = account or default_account()
+        with self._lock:
+            run = self._current
+            joined = run is not None
+            if not joined:
+                last = self._last_by_account.get(account)
+                if last and time.monotonic() - last.finished_monotonic < self.cooldown:
+                    retry_after = self.cooldown - (time.monotonic() - last.finished_monotonic)
+                    return {"status": "cooldown", "retryAfter": round(retry_after, 1), "sync": last.to_dict()}
+                run = self._current = SyncRun("manual")
+        if not joined:
+            if self.on_manual_start:
+                try:
+                    self.on_manual_start()
+                except Exception as e:
+                    logging.warning(f"Could not postpone the scheduled sync: {e}")
+            threading.Thread(target=self._execute, args=(run, account), name="sync-now", daemon=True).start()
+        finished = run.done.wait(wait) if wait else run.done.is_set()
+        if not finished:
+            return {"status": "pending", "joined": joined, "sync": run.to_dict()}
+        return {"status": "joined" if joined else "fresh", "sync": run.to_dict()}
+
+
+_coordinator: SyncCoordinator | None = None
+_coordinator_lock = threading.Lock()
+
+
+def _sync_with_own_session() -> dict:
+    from app.database.database import SessionLocal
+    from app.scheduler.sync_job import sync_schoology_data
+    db = SessionLocal()
+    try:
+        return sync_schoology_data(db)
+    finally:
+        db.close()
+
+
+def get_coordinator() -> SyncCoordinator:
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = SyncCoordinator(_sync_with_own_session)
+        return _coordinator
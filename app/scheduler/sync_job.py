@@ -1,39 +1,144 @@
 # app/scheduler/sync_job.py
 
 import logging
+import os
 from sqlalchemy.orm import Session
-from app.schoology_client.client import SchoologyClient
-from app.database import crud
+from app.schoology_client.client import SchoologyClient, course_ids_from_env
+from app.schoology_client.parsing import get_materials_parser
+from app.schoology_client.sanitize import get_sanitizer
+from app.database import crud, ics_feed, read_model
+from app.scheduler.pipeline import Pipeline
+from app import profiling
 from datetime import datetime, timedelta, timezone
 
-def sync_schoology_data(db: Session):
-    logging.info("Starting Schoology sync job...")
-    client = SchoologyClient()
+# Max concurrent Schoology requests across all sources; keeps us polite to Schoology.
+COURSE_FETCH_CONCURRENCY = int(os.getenv("SCHOOLOGY_FETCH_CONCURRENCY", "4"))
+# Home feed pages fetched per sync (newest first).
+FEED_PAGES = int(os.getenv("SCHOOLOGY_FEED_PAGES", "2"))
+# Items buffered between pipeline stages before the producers wait.
+SYNC_QUEUE_SIZE = int(os.getenv("SYNC_QUEUE_SIZE", "8"))
+# SYNC_PIPELINE=0 runs the stages back to back instead of overlapped.
+SYNC_PIPELINE = os.getenv("SYNC_PIPELINE", "1").lower() not in ("0", "false", "no")
 
-    try:
-        # --- 1. Sync Calendar Events ---
-        now = datetime.now(timezone.utc)
-        # Fetch a wide window: from 1 week ago to 60 days in the future
-        start_date = now - timedelta(days=7)
-        end_date = now + timedelta(days=60)
-        
-        start_ts = int(start_date.timestamp())
-        end_ts = int(end_date.timestamp())
-        
-        events_data = client.get_calendar_events(start_ts=start_ts, end_ts=end_ts)
-        
-        if events_data:
-            logging.info(f"Fetched {len(events_data)} calendar items. Upserting into database...")
-            crud.upsert_calendar_events(db, events_data)
+
+def _fetchers(client: SchoologyClient, course_ids: list[int], now: datetime) -> list:
+    """One task per upstream request (group); each returns (kind, course_id, payload)."""
+    # Fetch a wide window: from 1 week ago to 60 days in the future
+    start_ts = int((now - timedelta(days=7)).timestamp())
+    end_ts = int((now + timedelta(days=60)).timestamp())
+    tasks = [
+        lambda: ("calendar", None, client.get_calendar_events(start_ts=start_ts, end_ts=end_ts)),
+        lambda: ("feed", None, client.get_feed_updates(pages=FEED_PAGES)),
+    ]
+    tasks += [lambda cid=cid: ("grades", cid, client.get_grades(cid)) for cid in course_ids]
+    tasks += [lambda cid=cid: ("materials", cid, client.get_course_materials_html(cid)) for cid in course_ids]
+    return tasks
+
+
+def _parse(items: list) -> list:
+    """Materials pages waiting together are parsed as one batch in the worker pool."""
+    pages = [(html, cid) for kind, cid, html in items if kind == "materials" and html]
+    out = [(kind, payload) for kind, _, payload in items if kind != "materials"]
+    if pages:
+        out.append(("materials", get_materials_parser().parse_many(pages)))
+    return out
+
+
+class _SyncWriter:
+    """
+    The pipeline's only database user. Batches of the same kind are merged into one
+    upsert. Materials wait until the calendar has been written, because
+    `upsert_course_materials` only adds assignments the calendar doesn't have.
+    """
+
+    ORDER = ("calendar", "grades", "feed", "materials")
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.calendar_written = False
+        self.calendar_changed = False
+        self.deferred_materials: list = []
+
+    def write(self, items: list):
+        merged: dict[str, list] = {}
+        for kind, payload in items:
+            merged.setdefault(kind, []).extend(payload or [])
+        if "materials" in merged and not self.calendar_written:
+            self.deferred_materials += merged.pop("materials")
+        for kind in self.ORDER:
+            if kind in merged:
+                getattr(self, f"_write_{kind}")(merged[kind])
+
+    def flush(self):
+        self._write_materials([])
+
+    def _write_calendar(self, events: list):
+        if events:
+            logging.info(f"Fetched {len(events)} calendar items. Upserting into database...")
+            counts = crud.upsert_calendar_events(self.db, events)
+            logging.info(f"Calendar items: {counts}")
+            self.calendar_changed = self.calendar_changed or bool(counts["inserted"] or counts["updated"])
         else:
             logging.warning("No calendar items returned from Schoology client.")
+        self.calendar_written = True
+        if self.deferred_materials:
+            self._write_materials([])
+
+    def _write_grades(self, grades: list):
+        counts = crud.upsert_grades(self.db, grades)
+        logging.info(f"Grades: {counts}")
+
+    def _write_feed(self, updates: list):
+        if updates:
+            counts = crud.upsert_feed_updates(self.db, updates)
+            logging.info(f"Feed updates: {counts}; sanitizer {get_sanitizer().stats()}")
+
+    def _write_materials(self, records: list):
+        records, self.deferred_materials = self.deferred_materials + records, []
+        if records:
+            counts = crud.upsert_course_materials(self.db, records)
+            logging.info(f"Materials: {counts}")
+            self.calendar_changed = self.calendar_changed or bool(counts["inserted"] or counts["updated"])
+
+
+@profiling.profiled("sync")
+def sync_schoology_data(db: Session, client: SchoologyClient | None = None, overlap: bool | None = None):
+    """
+    Fetch every source, parse, and write, as a pipeline (see pipeline.py): requests
+    run in a pool of SCHOOLOGY_FETCH_CONCURRENCY threads, materials pages are parsed
+    in the worker pool while other fetches continue, and a single writer on this
+    thread upserts batches as they arrive. Returns {"ok", "stages"} with per-stage timings.
+    """
+    logging.info("Starting Schoology sync job...")
+    client = client or SchoologyClient()
+
+    try:
+        course_ids = course_ids_from_env()
+        if not course_ids:
+            logging.info("SCHOOLOGY_COURSE_IDS not set; skipping grade and materials sync.")
+        writer = _SyncWriter(db)
+        pipe = Pipeline(
+            _fetchers(client, course_ids, datetime.now(timezone.utc)), _parse, writer.write, writer.flush,
+            fetch_workers=COURSE_FETCH_CONCURRENCY, queue_size=SYNC_QUEUE_SIZE,
+            overlap=SYNC_PIPELINE if overlap is None else overlap,
+        )
+        stages = pipe.run()
+
+        # Rebuild the ICS feed snapshot only when something it shows has changed.
+        if writer.calendar_changed or ics_feed.get_snapshot() is None:
+            ics_feed.refresh(db)
+        # Warm the read model here so the next briefing doesn't pay for the rebuild. get()
+        # rebuilds whenever the assignments version moved, whoever wrote it.
+        read_model.get(db)
 
-        # TODO: Add calls to sync feed, grades, etc. here in the future
-        
-        logging.info("Sync job completed successfully.")
-        return {"ok": True}
+        logging.info(
+            f"Sync job completed in {stages['wall_ms']:.0f} ms "
+            + ", ".join(f"{k} {stages[k]['busy_ms']:.0f} ms busy / {stages[k]['wall_ms']:.0f} ms"
+                        for k in ("fetch", "parse", "write"))
+        )
+        return {"ok": True, "stages": stages}
 
     except Exception as e:
         logging.error(f"An error occurred during the sync job: {e}", exc_info=True)
         db.rollback() # Rollback any partial changes on error
-        return {"ok": False, "error": str(e)}
\ No newline at end of file
+        return {"ok": False, "error": str(e)}
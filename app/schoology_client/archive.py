@@ -0,0 +1,197 @@
+# app/schoology_client/archive.py
+
+"""
+Optional on-disk archive of raw Schoology responses.
+
+Enabled by setting SCHOOLOGY_ARCHIVE_DIR. Each successful upstream response is
+recorded as an index row keyed by endpoint and request key (calendar window, course
+ID, ...), pointing at a gzip blob named by the SHA-256 of the raw bytes. Identical
+responses share one blob, so a calendar that hasn't changed since the last sync
+costs one index row, not another copy.
+
+The archive is bounded: entries older than SCHOOLOGY_ARCHIVE_MAX_AGE_DAYS are
+dropped, then the oldest entries go until blobs fit in SCHOOLOGY_ARCHIVE_MAX_MB.
+`app.scheduler.reprocess` replays it through ingestion without touching Schoology.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+
+# Endpoints whose request key changes on every fetch (the calendar window is relative to
+# now) but always describes the same resource. `latest_only` keeps one entry for each,
+# the newest, whatever its key.
+SINGLE_KEY_ENDPOINTS = ("calendar",)
+
+
+def calendar_key(start_ts: int, end_ts: int) -> str:
+    """Archive key of a calendar fetch: its window, so a replay can pick one out."""
+    return f"{start_ts}-{end_ts}"
+
+
+class ArchiveEntry(NamedTuple):
+    id: int
+    endpoint: str
+    key: str
+    fetched_at: float
+    sha256: str
+    size: int
+
+
+class ResponseArchive:
+    def __init__(self, root: str | os.PathLike, max_bytes: int = 512 * 1024 * 1024,
+                 max_age_days: float = 365.0, prune_every: int = 50):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()  # grade/materials fetches record from worker threads
+        self._db = sqlite3.connect(self.root / "index.db", check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                endpoint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_endpoint_key ON entries(endpoint, key, fetched_at);
+            CREATE INDEX IF NOT EXISTS ix_entries_fetched_at ON entries(fetched_at);
+            CREATE INDEX IF NOT EXISTS ix_entries_sha256 ON entries(sha256);
+            CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, stored_bytes INTEGER NOT NULL);
+        """)
+
+    @classmethod
+    def from_env(cls) -> "ResponseArchive | None":
+        root = os.getenv("SCHOOLOGY_ARCHIVE_DIR")
+        if not root:
+            return None
+        return cls(
+            root,
+            max_bytes=int(float(os.getenv("SCHOOLOGY_ARCHIVE_MAX_MB", "512")) * 1024 * 1024),
+            max_age_days=float(os.getenv("SCHOOLOGY_ARCHIVE_MAX_AGE_DAYS", "365")),
+        )
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.blobs / sha256[:2] / f"{sha256}.gz"
+
+    def record(self, endpoint: str, key: str, body: bytes) -> str:
+        """Archive one response body; returns its content hash."""
+        sha256 = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            known = self._db.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if not known:
+                path = self._blob_path(sha256)
+                path.parent.mkdir(exist_ok=True)
+                data = gzip.compress(body, compresslevel=6)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                tmp.replace(path)
+                self._db.execute("INSERT INTO blobs VALUES (?, ?)", (sha256, len(data)))
+            self._db.execute(
+                "INSERT INTO entries (endpoint, key, fetched_at, sha256, size) VALUES (?, ?, ?, ?, ?)",
+                (endpoint, key, time.time(), sha256, len(body)),
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune_locked()
+        return sha256
+
+    def safe_record(self, endpoint: str, key: str, body: bytes):
+        """record() that logs instead of raising, so archiving can never fail a sync."""
+        try:
+            self.record(endpoint, key, body)
+        except Exception as e:
+            logging.warning(f"Could not archive {endpoint} response ({key}): {e}")
+
+    def read(self, sha256: str) -> bytes:
+        return gzip.decompress(self._blob_path(sha256).read_bytes())
+
+    def entries(self, endpoint: str | None = None, since: float | None = None,
+                latest_only: bool = False, key: str | None = None) -> Iterator[ArchiveEntry]:
+        """Entries in fetch order. `latest_only` keeps just the newest per (endpoint, key)."""
+        where, params = ["1=1"], []
+        if endpoint:
+            where.append("endpoint = ?")
+            params.append(endpoint)
+        if key is not None:
+            where.append("key = ?")
+            params.append(key)
+        if since is not None:
+            where.append("fetched_at >= ?")
+            params.append(since)
+        if latest_only:
+            single = ", ".join("?" * len(SINGLE_KEY_ENDPOINTS))
+            where.append(
+                "id IN (SELECT MAX(id) FROM entries "
+                f"GROUP BY endpoint, CASE WHEN endpoint IN ({single}) THEN '' ELSE key END)"
+            )
+            params.extend(SINGLE_KEY_ENDPOINTS)
+        q = f"SELECT id, endpoint, key, fetched_at, sha256, size FROM entries WHERE {' AND '.join(where)} ORDER BY id"
+        for row in self._db.execute(q, params):
+            yield ArchiveEntry(*row)
+
+    def prune(self) -> dict:
+        with self._lock:
+            return self._prune_locked()
+
+    def _prune_locked(self) -> dict:
+        cutoff = time.time() - self.max_age_days * 86400
+        expired = self._db.execute("DELETE FROM entries WHERE fetched_at < ?", (cutoff,)).rowcount
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(stored_bytes), 0) FROM blobs WHERE sha256 IN (SELECT sha256 FROM entries)"
+        ).fetchone()[0]
+        evicted = 0
+        while total > self.max_bytes:
+            oldest = self._db.execute("SELECT id, sha256 FROM entries ORDER BY id LIMIT 1").fetchone()
+            if not oldest:
+                break
+            self._db.execute("DELETE FROM entries WHERE id = ?", (oldest[0],))
+            evicted += 1
+            if not self._db.execute("SELECT 1 FROM entries WHERE sha256 = ?", (oldest[1],)).fetchone():
+                size = self._db.execute("SELECT stored_bytes FROM blobs WHERE sha256 = ?", (oldest[1],)).fetchone()
+                total -= size[0] if size else 0
+        orphans = [r[0] for r in self._db.execute(
+            "SELECT sha256 FROM blobs WHERE sha256 NOT IN (SELECT sha256 FROM entries)"
+        )]
+        for sha256 in orphans:
+            self._blob_path(sha256).unlink(missing_ok=True)
+        self._db.executemany("DELETE FROM blobs WHERE sha256 = ?", [(s,) for s in orphans])
+        self._db.commit()
+        if expired or evicted or orphans:
+            logging.info(f"Archive pruned: {expired} expired, {evicted} evicted, {len(orphans)} blobs removed")
+        return {"expired": expired, "evicted": evicted, "blobs_removed": len(orphans)}
+
+    def stats(self) -> dict:
+        entries, raw = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        blobs, stored = self._db.execute("SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0) FROM blobs").fetchone()
+        return {"entries": entries, "raw_bytes": raw, "blobs": blobs, "stored_bytes": stored}
+
+    def close(self):
+        self._db.close()
+
+
+_archive: ResponseArchive | None = None
+_archive_checked = False
+
+
+def get_archive() -> ResponseArchive | None:
+    """Process-wide archive, or None when SCHOOLOGY_ARCHIVE_DIR isn't set."""
+    global _archive, _archive_checked
+    if not _archive_checked:
+        _archive = ResponseArchive.from_env()
+        _archive_checked = True
+    return _archive
@@ -1,11 +1,122 @@
 # app/schoology_client/client.py
 
 import os
+import re
+import json
 import requests
 import time
 import logging
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
+from bs4 import BeautifulSoup
+from app.schoology_client.archive import calendar_key, get_archive
+
+_SCORE_RE = re.compile(r"^\s*(-?[\d.]+)\s*/\s*([\d.]+)\s*$")
+_FEED_TIME_RE = re.compile(r"(\w{3}\s+\d{1,2},\s+\d{4})\s+at\s+(\d{1,2}:\d{2}\s*[ap]m)", re.IGNORECASE)
+
+
+def course_ids_from_env() -> list[int]:
+    """Parse SCHOOLOGY_COURSE_IDS (comma-separated) into a list of ints."""
+    raw = os.getenv("SCHOOLOGY_COURSE_IDS", "")
+    return [int(part) for part in raw.replace(" ", "").split(",") if part.isdigit()]
+
+
+def score_to_pct(score_raw: str | None) -> float | None:
+    """'92/100' -> 92.0. Returns None for blank, excused or non-numeric scores."""
+    if not score_raw:
+        return None
+    m = _SCORE_RE.match(score_raw)
+    if not m or float(m.group(2)) == 0:
+        return None
+    return round(100 * float(m.group(1)) / float(m.group(2)), 2)
+
+
+def unwrap_materials_payload(body: str) -> str:
+    """The materials and feed endpoints wrap their HTML in JSON; fall back to the raw text."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(payload, dict):
+        return payload.get("html") or payload.get("output") or payload.get("content") or ""
+    return ""
+
+
+def _parse_feed_time(text: str) -> datetime | None:
+    # "Fri Oct 17, 2025 at 2:05 pm"; like calendar dates, the wall time is stored as UTC.
+    m = _FEED_TIME_RE.search(text or "")
+    if not m:
+        return None
+    try:
+        dt = datetime.strptime(f"{m.group(1)} {m.group(2).replace(' ', '').lower()}", "%b %d, %Y %I:%M%p")
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=timezone.utc)
+
+
+def parse_feed_html(html: str) -> list[dict]:
+    """
+    Parses the home feed (`/home/feed`). Each post is an `li[id^=edge-assoc-]` whose
+    number is the update ID; the body is `.update-body` (kept as raw HTML for the
+    sanitizer), the author and realm are links in `.update-sentence-inner`, and the
+    posted time is the `.small.gray` footer text.
+    """
+    if not html:
+        return []
+    soup = BeautifulSoup(html, "html.parser")
+    updates = []
+    for item in soup.select("li[id^='edge-assoc-']"):
+        m = re.search(r"(\d+)", item.get("id", ""))
+        body = item.select_one(".update-body")
+        if not m or body is None:
+            continue
+        links = item.select(".update-sentence-inner a")
+        author = links[0].get_text(" ", strip=True) if links else "Unknown"
+        realm = next((a for a in links[1:] if re.search(r"/(course|group)/\d+", a.get("href", ""))), None)
+        posted = _parse_feed_time(item.select_one(".small.gray").get_text(" ", strip=True)
+                                  if item.select_one(".small.gray") else "")
+        updates.append({
+            "id": int(m.group(1)),
+            "author": author,
+            "content_html": body.decode_contents(),
+            "posted_at_utc": posted or datetime.now(timezone.utc),
+            "source": realm.get_text(" ", strip=True) if realm else "Home",
+        })
+    return updates
+
+
+def parse_grades_html(html: str, course_id: int) -> list[dict]:
+    """
+    Parses the course `student_grades` page. Each graded item is a `tr.item-row`
+    whose `data-id` is the assignment ID; the score lives in `.awarded-grade`
+    and the denominator in `.max-grade` (rendered as " / 100").
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title_el = soup.select_one("#center-top .page-title") or soup.select_one("title")
+    course_name = title_el.get_text(" ", strip=True) if title_el else f"Course {course_id}"
+
+    grades = []
+    for row in soup.select("tr.item-row"):
+        raw_id = (row.get("data-id") or "").strip()
+        if not raw_id.isdigit():
+            continue
+        title_el = row.select_one(".title a") or row.select_one(".title")
+        awarded = row.select_one(".awarded-grade")
+        max_el = row.select_one(".max-grade")
+        score = awarded.get_text(strip=True) if awarded else ""
+        score_raw = None
+        if score and score != "—":
+            denom = max_el.get_text(strip=True).lstrip("/").strip() if max_el else ""
+            score_raw = f"{score}/{denom}" if denom else score
+        grades.append({
+            "course_id": course_id,
+            "course_name": course_name,
+            "assignment_id": int(raw_id),
+            "assignment_title": title_el.get_text(" ", strip=True) if title_el else "Untitled",
+            "score_raw": score_raw,
+            "score_pct": score_to_pct(score_raw),
+        })
+    return grades
 
 class SchoologyClient:
     def __init__(self):
@@ -27,6 +138,8 @@ class SchoologyClient:
             "Cookie": cookie,
             "Referer": f"{self.base_url}/home"
         })
+        # Raw-response archive for offline reprocessing (None unless SCHOOLOGY_ARCHIVE_DIR is set)
+        self.archive = get_archive()
 
     def get_calendar_events(self, start_ts: int, end_ts: int) -> List[Dict[str, Any]]:
         """
@@ -55,7 +168,10 @@ class SchoologyClient:
             
             # If we get here, the request was successful (2xx status code)
             # Now, try to parse it as JSON
-            return response.json()
+            events = response.json()
+            if self.archive:
+                self.archive.safe_record("calendar", calendar_key(start_ts, end_ts), response.content)
+            return events
 
         except Exception as e:
             logging.error(f"AN EXCEPTION OCCURRED: {type(e).__name__} - {e}")
@@ -73,12 +189,61 @@ class SchoologyClient:
         
         return []
 
-    # --- Stubs for future implementation ---
-    def get_feed_updates(self):
-        return []
+    def get_feed_updates(self, pages: int = 1) -> List[Dict[str, Any]]:
+        """
+        Fetches the first `pages` pages of the home feed. Post bodies are returned
+        as raw HTML; sanitizing happens at ingest (see sanitize.HtmlSanitizer).
+        """
+        updates = []
+        for page in range(pages):
+            try:
+                response = self.s.get(f"{self.base_url}/home/feed", params={"page": page}, timeout=30)
+                response.raise_for_status()
+                if self.archive:
+                    self.archive.safe_record("feed", f"page={page}", response.content)
+                batch = parse_feed_html(unwrap_materials_payload(response.text))
+            except Exception as e:
+                logging.error(f"Failed to fetch feed page {page}: {type(e).__name__} - {e}")
+                break
+            if not batch:
+                break
+            updates.extend(batch)
+        return updates
 
-    def get_grades(self, course_id: int):
-        return []
+    def get_grades(self, course_id: int) -> List[Dict[str, Any]]:
+        """
+        Fetches and parses the student's grade rows for one course.
+        Returns [] on any HTTP or parse failure so one bad course can't fail a sync.
+        """
+        url = f"{self.base_url}/course/{course_id}/student_grades"
+        try:
+            response = self.s.get(url, headers={"Accept": "text/html"}, timeout=30)
+            response.raise_for_status()
+            if self.archive:
+                self.archive.safe_record("grades", f"course={course_id}", response.content)
+            return parse_grades_html(response.text, course_id)
+        except Exception as e:
+            logging.error(f"Failed to fetch grades for course {course_id}: {type(e).__name__} - {e}")
+            return []
+
+    def get_course_materials_html(self, course_id: int) -> str:
+        """
+        Fetches the raw HTML of a course's assignment listing. The endpoint wraps
+        the markup in JSON; parsing is left to `parsing.MaterialsParser` so it can
+        happen off the scheduler thread.
+        """
+        url = f"{self.base_url}/course/{course_id}/materials"
+        try:
+            response = self.s.get(url, params={"list_filter": "assignments", "ajax": 1}, timeout=30)
+            response.raise_for_status()
+            if self.archive:
+                self.archive.safe_record("materials", f"course={course_id}", response.content)
+            return unwrap_materials_payload(response.text)
+        except Exception as e:
+            logging.error(f"Failed to fetch materials for course {course_id}: {type(e).__name__} - {e}")
+            return ""
 
-    def get_course_assignments(self, course_id: int):
-        return []
\ No newline at end of file
+    def get_course_assignments(self, course_id: int) -> list:
+        """Fetches and parses one course's assignments inline (see MaterialsParser for bulk)."""
+        from app.schoology_client.parsing import parse_materials_html
+        return parse_materials_html(self.get_course_materials_html(course_id), course_id)
\ No newline at end of file
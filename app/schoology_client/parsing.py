@@ -0,0 +1,151 @@
+# app/schoology_client/parsing.py
+
+"""
+CPU-bound HTML parsing for Schoology pages, runnable in a worker process pool.
+
+Parsing a course materials page with BeautifulSoup takes milliseconds of pure Python
+while holding the GIL; done on the scheduler thread it stalls every `/mcp` request in
+the same process. `MaterialsParser` ships raw HTML strings to worker processes and
+gets compact tuples back, so only small records cross the process boundary.
+
+This module is imported by the workers, so it deliberately imports nothing from the
+app besides bs4.
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    PARSER_BACKEND = "lxml"
+except ImportError:
+    PARSER_BACKEND = "html.parser"
+
+_ASSIGNMENT_HREF_RE = re.compile(r"/assignment/(\d+)(?:/info)?/?(?:[?#]|$)")
+_DUE_RE = re.compile(r"Due\s+\w+,\s+(\w+\s+\d{1,2},\s+\d{4})\s+at\s+(\d{1,2}:\d{2}\s*[ap]m)", re.IGNORECASE)
+
+BASE_URL = "https://classes.esdallas.org"
+
+
+class MaterialRecord(NamedTuple):
+    """One assignment from a course materials listing. Pickles as a plain tuple."""
+    assignment_id: int
+    course_id: int
+    title: str
+    due_at_utc: str | None  # ISO-8601; datetimes are cheaper to ship as strings
+    url: str
+
+
+def _parse_due(text: str) -> str | None:
+    m = _DUE_RE.search(text)
+    if not m:
+        return None
+    try:
+        dt = datetime.strptime(f"{m.group(1)} {m.group(2).replace(' ', '').lower()}", "%B %d, %Y %I:%M%p")
+    except ValueError:
+        return None
+    # Same convention as crud.parse_schoology_date: Schoology's wall time is stored as UTC.
+    return dt.replace(tzinfo=timezone.utc).isoformat()
+
+
+def parse_materials_html(html: str, course_id: int) -> list[MaterialRecord]:
+    """
+    Extract assignments from the HTML of `/course/{id}/materials?list_filter=assignments`.
+    Each item row carries a link to `/assignment/{id}`; the due date is in the row's
+    info text ("Due Friday, October 24, 2025 at 11:59 pm").
+    """
+    if not html:
+        return []
+    soup = BeautifulSoup(html, PARSER_BACKEND)
+    records = []
+    seen = set()
+    for link in soup.select("a[href*='/assignment/']"):
+        m = _ASSIGNMENT_HREF_RE.search(link.get("href", ""))
+        if not m:
+            continue
+        assignment_id = int(m.group(1))
+        if assignment_id in seen:
+            continue
+        seen.add(assignment_id)
+        row = link.find_parent(["tr", "li", "div"], class_=re.compile(r"type-assignment|material-row|item-row"))
+        info = row.select_one(".item-info, .due-date") if row is not None else None
+        records.append(MaterialRecord(
+            assignment_id=assignment_id,
+            course_id=course_id,
+            title=link.get_text(" ", strip=True) or "Untitled",
+            due_at_utc=_parse_due(info.get_text(" ", strip=True)) if info is not None else None,
+            url=f"{BASE_URL}/assignment/{assignment_id}/info",
+        ))
+    return records
+
+
+def _parse_job(job: tuple[str, int]) -> list[tuple]:
+    html, course_id = job
+    return [tuple(r) for r in parse_materials_html(html, course_id)]
+
+
+def _default_workers() -> int:
+    configured = os.getenv("SCHOOLOGY_PARSE_WORKERS")
+    if configured is not None:
+        return int(configured)
+    return min(4, os.cpu_count() or 1)
+
+
+class MaterialsParser:
+    """
+    Parses many materials pages, in a process pool when `workers > 0`.
+    `workers=0` parses inline on the calling thread (useful for tests and tiny syncs).
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = _default_workers() if workers is None else workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # 'spawn' avoids forking a process that already runs uvicorn and scheduler threads.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logging.info(f"Started {self.workers} HTML parse worker(s) using the '{PARSER_BACKEND}' backend")
+        return self._pool
+
+    def parse_many(self, pages: list[tuple[str, int]]) -> list[MaterialRecord]:
+        """Parse `(html, course_id)` pages and return all records, in page order."""
+        if not pages:
+            return []
+        if self.workers <= 0 or len(pages) == 1:
+            return [r for html, course_id in pages for r in parse_materials_html(html, course_id)]
+        chunksize = max(1, len(pages) // (self.workers * 4))
+        results = self._get_pool().map(_parse_job, pages, chunksize=chunksize)
+        return [MaterialRecord(*t) for batch in results for t in batch]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_parser: MaterialsParser | None = None
+
+
+def get_materials_parser() -> MaterialsParser:
+    """Process-wide parser; its pool is started lazily on the first multi-page parse."""
+    global _parser
+    if _parser is None:
+        _parser = MaterialsParser()
+    return _parser
+
+
+def shutdown_materials_parser():
+    global _parser
+    if _parser is not None:
+        _parser.shutdown()
+        _parser = None
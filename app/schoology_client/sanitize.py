@@ -0,0 +1,170 @@
+# app/schoology_client/sanitize.py
+
+"""
+Content-addressed HTML sanitization for feed posts.
+
+bleach is pure Python and slow on long announcements, and the same posts come back
+on every feed sync. `HtmlSanitizer` keys results by the SHA-256 of the raw HTML, so
+each distinct post is sanitized once per process (crud additionally skips rows
+whose stored hash already matches, so steady-state syncs don't even get here).
+Misses are sanitized in a process pool, keeping bleach's GIL-bound work off the
+scheduler thread, and hit/miss counters show how well the cache is doing.
+
+Like parsing.py, this module is imported by pool workers and imports nothing from
+the app.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import bleach
+
+ALLOWED_TAGS = {
+    "a", "b", "blockquote", "br", "code", "div", "em", "h1", "h2", "h3", "h4", "hr", "i",
+    "img", "li", "ol", "p", "pre", "span", "strong", "sub", "sup", "table", "tbody", "td",
+    "th", "thead", "tr", "u", "ul",
+}
+ALLOWED_ATTRIBUTES = {"a": ["href", "title"], "img": ["src", "alt", "title"], "td": ["colspan", "rowspan"]}
+ALLOWED_PROTOCOLS = {"http", "https", "mailto"}
+
+# bleach strips disallowed tags but keeps their text; scripts and styles go entirely.
+_DROP_BLOCKS_RE = re.compile(r"<(script|style|noscript)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# Misses totalling fewer bytes than this are sanitized inline. bleach costs ~2.5 ms/KB
+# and a warm pool round trip ~1 ms, so only a post or two is cheaper in-process; anything
+# bigger goes to the pool so it doesn't stall the calling (writer) thread.
+INLINE_MAX_BYTES = int(os.getenv("SCHOOLOGY_SANITIZE_INLINE_BYTES", str(2 * 1024)))
+
+_local = threading.local()
+
+
+def content_hash(raw_html: str) -> str:
+    return hashlib.sha256(raw_html.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def sanitize_html(raw_html: str) -> str:
+    """The stored form of a post body: allow-listed tags/attributes, no scripts."""
+    cleaner = getattr(_local, "cleaner", None)
+    if cleaner is None:  # Cleaner instances aren't thread-safe; one per thread
+        cleaner = _local.cleaner = bleach.Cleaner(
+            tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, protocols=ALLOWED_PROTOCOLS, strip=True,
+        )
+    return cleaner.clean(_DROP_BLOCKS_RE.sub("", raw_html or "")).strip()
+
+
+def _default_workers() -> int:
+    configured = os.getenv("SCHOOLOGY_SANITIZE_WORKERS")
+    if configured is not None:
+        return int(configured)
+    return min(2, os.cpu_count() or 1)
+
+
+class HtmlSanitizer:
+    """
+    Sanitizes batches of raw HTML with an LRU cache keyed by content hash.
+    `workers=0` sanitizes misses inline on the calling thread.
+    """
+
+    def __init__(self, workers: int | None = None, cache_size: int = 4096):
+        self.workers = _default_workers() if workers is None else workers
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self.hits = 0
+        self.misses = 0
+        self.skipped_stored = 0
+        self.sanitize_seconds = 0.0
+        self.sanitized_bytes = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logging.info(f"Started {self.workers} HTML sanitize worker(s)")
+        return self._pool
+
+    def note_stored(self, n: int):
+        """Record posts skipped because the database already had their sanitized form."""
+        with self._lock:
+            self.skipped_stored += n
+
+    def sanitize_many(self, raws: list[str], hashes: list[str] | None = None) -> list[str]:
+        """Sanitized HTML for each raw string, in order. Pass `hashes` if already computed."""
+        hashes = hashes or [content_hash(r) for r in raws]
+        out: list[str | None] = [None] * len(raws)
+        missing: dict[str, str] = {}
+        with self._lock:
+            for i, h in enumerate(hashes):
+                cached = self._cache.get(h)
+                if cached is not None:
+                    self._cache.move_to_end(h)
+                    out[i] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(h, raws[i])
+                    self.misses += 1
+
+        if missing:
+            t0 = time.perf_counter()
+            keys, bodies = list(missing), list(missing.values())
+            total = sum(len(b) for b in bodies)
+            if self.workers <= 0 or total < INLINE_MAX_BYTES:
+                cleaned = [sanitize_html(b) for b in bodies]
+            else:
+                chunksize = max(1, len(bodies) // (self.workers * 4))
+                cleaned = list(self._get_pool().map(sanitize_html, bodies, chunksize=chunksize))
+            fresh = dict(zip(keys, cleaned))
+            with self._lock:
+                self.sanitize_seconds += time.perf_counter() - t0
+                self.sanitized_bytes += total
+                for h, c in fresh.items():
+                    self._cache[h] = c
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            out = [o if o is not None else fresh[h] for o, h in zip(out, hashes)]
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            seen = self.hits + self.misses + self.skipped_stored
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped_stored": self.skipped_stored,
+                "hit_rate": round((self.hits + self.skipped_stored) / seen, 4) if seen else None,
+                "cached_entries": len(self._cache),
+                "sanitize_ms": round(self.sanitize_seconds * 1000, 1),
+                "sanitized_bytes": self.sanitized_bytes,
+                "workers": self.workers,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_sanitizer: HtmlSanitizer | None = None
+
+
+def get_sanitizer() -> HtmlSanitizer:
+    """Process-wide sanitizer; its pool is started lazily on the first large batch of misses."""
+    global _sanitizer
+    if _sanitizer is None:
+        _sanitizer = HtmlSanitizer()
+    return _sanitizer
+
+
+def shutdown_sanitizer():
+    global _sanitizer
+    if _sanitizer is not None:
+        _sanitizer.shutdown()
+        _sanitizer = None
@@ -0,0 +1,61 @@
+# app/startup.py
+
+"""
+Startup phase timing, reported once the server answers its first request.
+
+Deliberately dependency-free so it can be imported first thing in main.py and
+measure everything after it, including the framework imports.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+_T0 = time.perf_counter()
+_phases: list[tuple[str, float]] = []
+_ready_at: float | None = None
+_first_response_at: float | None = None
+
+
+@contextmanager
+def phase(name: str):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - t))
+
+
+def mark_ready():
+    """The lifespan finished; uvicorn is about to accept connections."""
+    global _ready_at
+    if _ready_at is None:
+        _ready_at = time.perf_counter() - _T0
+        logging.info(f"⏱️  Ready to serve after {_ready_at * 1000:.0f} ms")
+
+
+def mark_first_response():
+    """Called by request handlers; only the first call does any work."""
+    global _first_response_at
+    if _first_response_at is None:
+        _first_response_at = time.perf_counter() - _T0
+        logging.info(format_report())
+
+
+def report() -> dict:
+    return {
+        "phases_ms": {name: round(sec * 1000, 1) for name, sec in _phases},
+        "ready_ms": round(_ready_at * 1000, 1) if _ready_at is not None else None,
+        "first_response_ms": round(_first_response_at * 1000, 1) if _first_response_at is not None else None,
+    }
+
+
+def format_report() -> str:
+    r = report()
+    lines = ["⏱️  Startup timing:"]
+    lines += [f"   {name:<24} {ms:>8.1f} ms" for name, ms in r["phases_ms"].items()]
+    if r["ready_ms"] is not None:
+        lines.append(f"   {'ready to serve':<24} {r['ready_ms']:>8.1f} ms")
+    if r["first_response_ms"] is not None:
+        lines.append(f"   {'first response':<24} {r['first_response_ms']:>8.1f} ms")
+    return "\n".join(lines)
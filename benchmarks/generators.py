@@ -0,0 +1,193 @@
+# benchmarks/generators.py
+
+"""
+Synthetic Schoology payload generators.
+
+Every generator is seeded so two runs with the same arguments produce byte-identical
+payloads, which is what makes benchmark results comparable across machines and commits.
+The shapes mirror what `SchoologyClient` returns (calendar) or what the sync job stores
+(grades, feed updates).
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+# Default mix of calendar `e_type` values, roughly what a real student calendar looks like.
+DEFAULT_TYPE_MIX = {
+    "assignment": 0.55,
+    "assessment": 0.15,
+    "common-assessment": 0.05,
+    "discussion": 0.05,
+    "event": 0.20,
+}
+
+COURSES = [
+    (7001, "AP Calculus BC"),
+    (7002, "AP Physics C"),
+    (7003, "English Literature"),
+    (7004, "US History"),
+    (7005, "Spanish IV"),
+    (7006, "Computer Science"),
+    (7007, "Chemistry"),
+]
+
+GROUPS = ["Class of 2026", "Robotics Club", "Student Council", "Athletics"]
+
+_TITLE_STEMS = [
+    "Homework {n}: Problem Set",
+    "Quiz {n}: Chapter Review",
+    "Unit {n} Test",
+    "Project {n}: Research Poster",
+    "Essay {n}: Analysis of 'The Great Gatsby'",
+    "Lab Report {n}: Projectile Motion",
+    "Reading Response {n}",
+    "Paper {n}: Primary Sources",
+]
+
+_EVENT_STEMS = [
+    "Field Trip {n}",
+    "Club Meeting {n}",
+    "Assembly {n}",
+    "Pep Rally {n}",
+    "College Visit {n}",
+]
+
+_SCHOOLOGY_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_type_mix(spec: str | None) -> dict[str, float]:
+    """Parse a mix like 'assignment=0.6,event=0.4' into normalized weights."""
+    if not spec:
+        return dict(DEFAULT_TYPE_MIX)
+    mix = {}
+    for part in spec.split(","):
+        key, _, weight = part.partition("=")
+        mix[key.strip()] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"Invalid type mix: {spec!r}")
+    return {k: v / total for k, v in mix.items()}
+
+
+def make_calendar_items(
+    n: int,
+    seed: int = 0,
+    type_mix: dict[str, float] | None = None,
+    now: datetime | None = None,
+    past_days: int = 7,
+    future_days: int = 60,
+) -> list[dict]:
+    """
+    Build `n` raw calendar items shaped like the `/calendar/{user}/{view}` response.
+    Start times are spread over the same window the sync job fetches.
+    """
+    rng = random.Random(seed)
+    mix = type_mix or DEFAULT_TYPE_MIX
+    e_types = list(mix)
+    weights = [mix[t] for t in e_types]
+    now = now or datetime.now(timezone.utc)
+    span = (past_days + future_days) * 86400
+    origin = now - timedelta(days=past_days)
+
+    items = []
+    for i in range(n):
+        e_type = rng.choices(e_types, weights)[0]
+        start = origin + timedelta(seconds=rng.randrange(span))
+        item_id = 100_000_000 + i
+        if e_type == "event":
+            title = rng.choice(_EVENT_STEMS).format(n=i)
+            source = rng.choice(GROUPS)
+            realm_id = 9000 + GROUPS.index(source)
+        else:
+            title = rng.choice(_TITLE_STEMS).format(n=i)
+            realm_id, source = rng.choice(COURSES)
+        has_end = e_type == "event" and rng.random() < 0.5
+        items.append({
+            "id": item_id,
+            "content_id": 500_000_000 + i,
+            "e_type": e_type,
+            "titleText": title,
+            "title": f"<span class=\"title\">{title}</span>",
+            "start": start.strftime(_SCHOOLOGY_FMT),
+            "end": (start + timedelta(hours=1)).strftime(_SCHOOLOGY_FMT) if has_end else "",
+            "has_end": "1" if has_end else "0",
+            "all_day": "0",
+            "content_title": source,
+            "realm_id": realm_id,
+        })
+    return items
+
+
+def make_grades(n: int, seed: int = 0, now: datetime | None = None) -> list[dict]:
+    """Build `n` grade rows shaped like the `Grade` model's columns."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    rows = []
+    for i in range(n):
+        course_id, course_name = rng.choice(COURSES)
+        total = rng.choice([10, 20, 50, 100])
+        earned = round(rng.uniform(0.55, 1.0) * total, 1)
+        rows.append({
+            "course_id": course_id,
+            "course_name": course_name,
+            "assignment_id": 500_000_000 + i,
+            "assignment_title": rng.choice(_TITLE_STEMS).format(n=i),
+            "score_raw": f"{earned:g}/{total}",
+            "score_pct": round(100 * earned / total, 2),
+            "posted_at_utc": now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+        })
+    return rows
+
+
+def make_feed_updates(
+    n: int, seed: int = 0, body_paragraphs: int = 3, now: datetime | None = None
+) -> list[dict]:
+    """Build `n` feed posts with raw (unsanitized) HTML bodies of configurable size."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    authors = ["Ms. Rivera", "Mr. Chen", "Dr. Okafor", "Coach Smith", "Mrs. Patel"]
+    updates = []
+    for i in range(n):
+        paragraphs = "".join(
+            f"<p>Reminder {i}.{p}: bring your <b>materials</b> and check "
+            f"<a href=\"https://example.com/{i}/{p}\" onclick=\"x()\">the page</a>.</p>"
+            for p in range(body_paragraphs)
+        )
+        updates.append({
+            "id": 300_000_000 + i,
+            "author": rng.choice(authors),
+            "content_html": f"<div class=\"update-body\">{paragraphs}<script>track()</script></div>",
+            "posted_at_utc": now - timedelta(minutes=rng.randrange(60 * 24 * 120)),
+            "source": rng.choice([c[1] for c in COURSES] + GROUPS),
+        })
+    return updates
+
+
+def make_materials_html(course_id: int, n_items: int = 60, seed: int = 0) -> str:
+    """
+    Build a course materials listing (the HTML inside the JSON wrapper) with
+    `n_items` assignment rows plus folder/document noise around them.
+    """
+    rng = random.Random(seed * 1_000_003 + course_id)
+    rows = []
+    for i in range(n_items):
+        assignment_id = course_id * 10_000 + i
+        due = datetime(2025, 9, 1) + timedelta(days=rng.randrange(240), minutes=rng.randrange(1440))
+        rows.append(
+            f'<tr id="n-{assignment_id}" class="type-assignment material-row">'
+            f'<td class="item-icon"><span class="inline-icon assignment-icon"></span></td>'
+            f'<td class="item-body"><div class="item-title">'
+            f'<a href="/assignment/{assignment_id}">{rng.choice(_TITLE_STEMS).format(n=i)}</a></div>'
+            f'<div class="item-info"><span class="due-date">Due {due:%A, %B} {due.day}, {due.year} at '
+            f'{due.hour % 12 or 12}:{due:%M} {"am" if due.hour < 12 else "pm"}</span>'
+            f'<span class="item-comments">{rng.randrange(5)} comments</span></div></td>'
+            f'<td class="item-actions"><div class="action-links-wrapper"><ul class="action-links">'
+            f'<li><a href="/assignment/{assignment_id}/edit">Edit</a></li></ul></div></td></tr>'
+        )
+        if i % 10 == 0:
+            rows.append(
+                f'<tr id="f-{course_id}-{i}" class="type-folder material-row"><td colspan="3">'
+                f'<div class="folder-title"><a href="/course/{course_id}/materials?f={i}">Unit {i // 10}</a></div>'
+                f'<div class="folder-description"><p>Readings and handouts for unit {i // 10}.</p></div></td></tr>'
+            )
+    return f'<div class="materials-wrapper"><table id="folder-contents-table"><tbody>{"".join(rows)}</tbody></table></div>'
@@ -0,0 +1,137 @@
+# benchmarks/harness.py
+
+"""
+Timing, result-file and baseline-comparison helpers shared by the benchmark scripts.
+
+Results are plain JSON so they can be diffed, archived, or fed into CI:
+
+    {"meta": {...}, "results": {"<case name>": {"min_ms": .., "median_ms": .., ...}}}
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.database import init_db
+
+
+def temp_session(path: str | None = None) -> tuple[Session, str]:
+    """
+    Open a session on a fresh on-disk SQLite file with the app's schema and PRAGMAs.
+    Returns the session and the file path (caller removes it).
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="schoology-bench-", suffix=".db")
+        os.close(fd)
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    init_db(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)(), path
+
+
+def remove_db(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int = 5,
+    setup: Callable[[], object] | None = None,
+    teardown: Callable[[], object] | None = None,
+    items: int | None = None,
+) -> dict:
+    """
+    Time `fn` `repeat` times. `setup`/`teardown` run around each sample, outside the clock.
+    When `items` is given, throughput is reported as items per second of the median sample.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+        if teardown:
+            teardown()
+    samples.sort()
+    median = statistics.median(samples)
+    result = {
+        "repeat": repeat,
+        "min_ms": round(samples[0] * 1000, 4),
+        "median_ms": round(median * 1000, 4),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+    }
+    if items:
+        result["items"] = items
+        result["items_per_s"] = round(items / median, 1) if median else None
+    return result
+
+
+def run_metadata(argv: list[str] | None = None) -> dict:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "argv": argv if argv is not None else sys.argv[1:],
+    }
+
+
+def write_results(path: str, results: dict, meta: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10, metric: str = "median_ms") -> list[dict]:
+    """
+    Compare two result maps case by case. A case regresses when `metric` grew by more
+    than `threshold` (0.10 == 10%). Cases missing from either side are skipped.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        new, old = current[name].get(metric), baseline[name].get(metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        rows.append({
+            "case": name,
+            "baseline": old,
+            "current": new,
+            "change": round(change, 4),
+            "regressed": change > threshold,
+        })
+    return rows
+
+
+def print_table(results: dict):
+    width = max((len(n) for n in results), default=10)
+    print(f"{'case':<{width}}  {'median ms':>12}  {'min ms':>12}  {'items/s':>12}")
+    for name, r in results.items():
+        ips = r.get("items_per_s")
+        print(f"{name:<{width}}  {r['median_ms']:>12.3f}  {r['min_ms']:>12.3f}  {ips if ips else '':>12}")
+
+
+def print_comparison(rows: list[dict]):
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else "ok"
+        print(f"  {row['case']}: {row['baseline']:.3f} -> {row['current']:.3f} ms "
+              f"({row['change']:+.1%}) {flag}")
@@ -0,0 +1,309 @@
+# benchmarks/mcp_load.py
+
+"""
+Load generator for a running `/mcp` server.
+
+Each virtual client replays a realistic ChatGPT session trace:
+
+    initialize -> tools/list -> resources/read -> tools/call x N
+
+Sessions arrive open-loop at `--rate` sessions/s (Poisson), with at most
+`--concurrency` in flight; `--rate 0` runs closed-loop (every slot starts a new
+session as soon as the previous one ends). Uses only asyncio streams with
+HTTP/1.1 keep-alive so the client itself adds no dependencies.
+
+    python main.py &
+    python -m benchmarks.mcp_load --duration 30 --concurrency 16 --rate 20
+    python -m benchmarks.mcp_load --background-sync --sync-db sqlite:///bench.db --out load.json
+
+`--background-sync` runs synthetic calendar upserts against the server's SQLite
+file in a thread while the load runs, so latency can be compared with and without
+a sync holding the write lock. Those rows stay in that database, so `--sync-db`
+has to be given explicitly; use it only with a database you can throw away.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from benchmarks.harness import run_metadata
+
+RANGES = ["today", "48h", "week"]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def session_trace(rng: random.Random, calls: int) -> list[tuple[str, dict | None]]:
+    trace = [
+        ("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-load", "version": "1"},
+        }),
+        ("tools/list", None),
+        ("resources/read", {"uri": "ui://widget/briefing.html"}),
+    ]
+    for _ in range(calls):
+        trace.append(("tools/call", {"name": "briefing.get", "arguments": {"range": rng.choice(RANGES)}}))
+    return trace
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client for JSON POSTs."""
+
+    def __init__(self, host: str, port: int, path: str):
+        self.host, self.port, self.path = host, port, path
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.writer = None
+
+    async def post_json(self, payload: dict) -> tuple[int, bytes]:
+        if self.writer is None:
+            await self._connect()
+        body = json.dumps(payload).encode()
+        head = (
+            f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+        self.writer.write(head + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed connection")
+        status = int(status_line.split()[1])
+        length, chunked, close = None, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+
+        if chunked:
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                parts.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            data = b"".join(parts)
+        elif length is not None:
+            data = await self.reader.readexactly(length)
+        else:
+            data = await self.reader.read()
+            close = True
+        if close:
+            await self.close()
+        return status, data
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: dict[tuple[str, bool], list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.requests = 0
+        self.sessions = 0
+        self.dropped_arrivals = 0
+
+    def record(self, method: str, seconds: float, during_sync: bool):
+        self.latencies[(method, during_sync)].append(seconds)
+
+    def summary(self, elapsed: float) -> dict:
+        per_method = {}
+        for during_sync in (False, True):
+            for (method, flag), values in sorted(self.latencies.items()):
+                if flag != during_sync:
+                    continue
+                values.sort()
+                key = f"{method}{' [sync]' if during_sync else ''}"
+                per_method[key] = {
+                    "count": len(values),
+                    "p50_ms": round(percentile(values, 50) * 1000, 3),
+                    "p90_ms": round(percentile(values, 90) * 1000, 3),
+                    "p99_ms": round(percentile(values, 99) * 1000, 3),
+                    "max_ms": round(values[-1] * 1000, 3),
+                }
+        error_total = sum(self.errors.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "sessions": self.sessions,
+            "dropped_arrivals": self.dropped_arrivals,
+            "requests": self.requests,
+            "throughput_rps": round(self.requests / elapsed, 2) if elapsed else None,
+            "errors": dict(self.errors),
+            "error_rate": round(error_total / self.requests, 5) if self.requests else 0.0,
+            "latency": per_method,
+        }
+
+
+async def run_session(url: tuple[str, int, str], rng: random.Random, calls: int,
+                      stats: Stats, sync_flag: threading.Event):
+    conn = HttpConnection(*url)
+    try:
+        for req_id, (method, params) in enumerate(session_trace(rng, calls), start=1):
+            payload = {"jsonrpc": "2.0", "id": req_id, "method": method}
+            if params is not None:
+                payload["params"] = params
+            during_sync = sync_flag.is_set()
+            t0 = time.perf_counter()
+            try:
+                status, data = await conn.post_json(payload)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                stats.requests += 1
+                stats.errors[f"transport:{type(e).__name__}"] += 1
+                await conn.close()
+                continue
+            stats.record(method, time.perf_counter() - t0, during_sync)
+            stats.requests += 1
+            if status != 200:
+                stats.errors[f"http:{status}"] += 1
+                continue
+            try:
+                body = json.loads(data)
+            except ValueError:
+                stats.errors["invalid_json"] += 1
+                continue
+            if "error" in body:
+                stats.errors[f"rpc:{body['error'].get('code')}"] += 1
+            elif body.get("result", {}).get("isError"):
+                stats.errors["tool_error"] += 1
+    finally:
+        stats.sessions += 1
+        await conn.close()
+
+
+async def drive(args, stats: Stats, sync_flag: threading.Event) -> float:
+    parts = urlsplit(args.url)
+    url = (parts.hostname or "127.0.0.1", parts.port or 80, parts.path or "/mcp")
+    rng = random.Random(args.seed)
+    slots = asyncio.Semaphore(args.concurrency)
+    tasks: set[asyncio.Task] = set()
+    start = time.perf_counter()
+    deadline = start + args.duration
+
+    async def one():
+        try:
+            await run_session(url, random.Random(rng.random()), args.calls, stats, sync_flag)
+        finally:
+            slots.release()
+
+    while time.perf_counter() < deadline:
+        if args.rate > 0:
+            await asyncio.sleep(rng.expovariate(args.rate))
+            if slots.locked():
+                # Open-loop arrival with every slot busy: the session is dropped, not queued.
+                stats.dropped_arrivals += 1
+                continue
+        await slots.acquire()
+        task = asyncio.create_task(one())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return time.perf_counter() - start
+
+
+def background_sync(db_url: str, items: int, stop: threading.Event, in_sync: threading.Event, counter: list):
+    """Repeatedly upsert synthetic calendar data into the server's database."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import crud
+    from benchmarks.generators import make_calendar_items
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    payload = make_calendar_items(items, seed=1)
+    while not stop.is_set():
+        db = Session()
+        in_sync.set()
+        try:
+            crud.upsert_calendar_events(db, payload)
+            counter[0] += 1
+        finally:
+            in_sync.clear()
+            db.close()
+        stop.wait(0.5)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5544/mcp")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=8, help="max sessions in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="session arrivals per second (0 = closed loop)")
+    parser.add_argument("--calls", type=int, default=5, help="tools/call requests per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--background-sync", action="store_true", help="run synthetic syncs during the load")
+    parser.add_argument("--sync-db", help="database the server reads (required with --background-sync)")
+    parser.add_argument("--sync-items", type=int, default=2000)
+    parser.add_argument("--out", help="write the JSON report here as well as stdout")
+    args = parser.parse_args(argv)
+    if args.background_sync and not args.sync_db:
+        parser.error("--background-sync writes synthetic assignments; pass --sync-db with a scratch database")
+
+    stats = Stats()
+    stop, in_sync, sync_runs = threading.Event(), threading.Event(), [0]
+    syncer = None
+    if args.background_sync:
+        syncer = threading.Thread(
+            target=background_sync, name="bench-sync", daemon=True,
+            args=(args.sync_db, args.sync_items, stop, in_sync, sync_runs),
+        )
+        syncer.start()
+
+    try:
+        elapsed = asyncio.run(drive(args, stats, in_sync))
+    finally:
+        stop.set()
+        if syncer:
+            syncer.join()
+
+    report = {
+        "meta": run_metadata(argv),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "summary": stats.summary(elapsed),
+        "background_syncs": sync_runs[0],
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
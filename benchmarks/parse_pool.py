@@ -0,0 +1,81 @@
+# benchmarks/parse_pool.py
+
+"""
+Materials parsing throughput: inline (single thread) vs the worker process pool.
+
+    python -m benchmarks.parse_pool --courses 24 --items 80 --workers 4 --out parse.json
+
+Also reports how long a concurrent "request" thread is stalled while parsing runs,
+which is the cost `/mcp` pays when parsing happens on the scheduler thread.
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from app.schoology_client.parsing import PARSER_BACKEND, MaterialsParser
+from benchmarks.generators import make_materials_html
+from benchmarks.harness import measure, print_table, run_metadata, write_results
+
+
+def _request_stall_ms(fn) -> float:
+    """Worst gap between 1 ms ticks of a background thread while `fn` runs."""
+    stop, worst = threading.Event(), [0.0]
+
+    def ticker():
+        last = time.perf_counter()
+        while not stop.is_set():
+            time.sleep(0.001)
+            now = time.perf_counter()
+            worst[0] = max(worst[0], now - last)
+            last = now
+
+    t = threading.Thread(target=ticker, daemon=True)
+    t.start()
+    try:
+        fn()
+    finally:
+        stop.set()
+        t.join()
+    return round(worst[0] * 1000, 3)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=24)
+    parser.add_argument("--items", type=int, default=80, help="assignments per course page")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="bench_parse.json")
+    args = parser.parse_args(argv)
+
+    pages = [(make_materials_html(7000 + c, args.items), 7000 + c) for c in range(args.courses)]
+    inline = MaterialsParser(workers=0)
+    pooled = MaterialsParser(workers=args.workers)
+    try:
+        # Start the workers (and import bs4 in them) outside the timed region.
+        pooled.parse_many(pages[:2])
+        assert inline.parse_many(pages) == pooled.parse_many(pages)
+
+        results = {
+            f"parse/inline/{args.courses}": measure(lambda: inline.parse_many(pages), args.repeat, items=args.courses),
+            f"parse/pool{args.workers}/{args.courses}": measure(lambda: pooled.parse_many(pages), args.repeat, items=args.courses),
+        }
+        results[f"parse/inline/{args.courses}"]["request_stall_ms"] = _request_stall_ms(lambda: inline.parse_many(pages))
+        results[f"parse/pool{args.workers}/{args.courses}"]["request_stall_ms"] = _request_stall_ms(lambda: pooled.parse_many(pages))
+    finally:
+        pooled.shutdown()
+
+    meta = run_metadata(argv)
+    meta.update({"backend": PARSER_BACKEND, "courses": args.courses, "items": args.items, "workers": args.workers})
+    write_results(args.out, results, meta)
+    print(f"parser backend: {PARSER_BACKEND}")
+    print_table(results)
+    for name, r in results.items():
+        print(f"{name}: worst request stall {r['request_stall_ms']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# benchmarks/projections.py
+
+"""
+Read-path row shapes: full ORM entities vs the column projections `crud` returns.
+
+    python -m benchmarks.projections                         # 1k / 10k / 100k rows
+    python -m benchmarks.projections --sizes 1000,50000 --out proj.json
+
+For each size, every upcoming assignment is read both ways. The report gives
+throughput and the peak memory allocated while the result list is built (tracemalloc).
+`orm` is the query `upcoming_assignments_sql` ran before it switched to projections.
+"""
+
+import argparse
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from app.database import crud, models
+from benchmarks.generators import COURSES
+from benchmarks.harness import measure, print_table, remove_db, run_metadata, temp_session, write_results
+
+TYPES = ["Assignment", "Test", "Quiz", "Project", "Lab"]
+
+
+def _seed(db, n: int, seed: int, now: datetime):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        course_id, course_name = rng.choice(COURSES)
+        due = now + timedelta(minutes=rng.randrange(1, 60 * 24 * 30))
+        rows.append({
+            "id": 900_000_000 + i, "course_id": course_id, "course_name": course_name,
+            "title": f"Assignment {i}", "url": f"https://app.schoology.com/assignment/{900_000_000 + i}",
+            "due_at_utc": due, "status": "open", "last_seen_at_utc": now,
+            "assignment_type": rng.choice(TYPES), "due_display": due.strftime("%a %b %d"),
+        })
+    db.execute(insert(models.Assignment), rows)
+    db.commit()
+
+
+def _orm(db, start: datetime, end: datetime):
+    return (
+        db.query(models.Assignment)
+        .filter(models.Assignment.due_at_utc != None)  # noqa: E711
+        .filter(models.Assignment.due_at_utc >= start)
+        .filter(models.Assignment.due_at_utc <= end)
+        .order_by(models.Assignment.due_at_utc.asc(), models.Assignment.id)
+        .all()
+    )
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return round(peak / 1024, 1)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default="bench_projections.json")
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict] = {}
+    for n in (int(s) for s in args.sizes.split(",") if s):
+        print(f"Seeding {n} assignments...", file=sys.stderr)
+        db, path = temp_session()
+        try:
+            now = datetime.now(timezone.utc)
+            _seed(db, n, args.seed, now)
+            start, end = now, now + timedelta(days=31)
+            cases = {
+                # expunge_all() so each ORM sample builds fresh entities, as a new request would.
+                "orm": lambda: (db.expunge_all(), _orm(db, start, end))[1],
+                "projection": lambda: crud.upcoming_assignments_sql(db, start, end, limit=None),
+            }
+            assert [a.id for a in cases["orm"]()] == [a.id for a in cases["projection"]()]
+            for name, fn in cases.items():
+                r = measure(fn, repeat=args.repeat, items=n)
+                db.expunge_all()
+                r["peak_kib"] = _peak_kib(fn)
+                r["bytes_per_row"] = round(r["peak_kib"] * 1024 / n)
+                results[f"upcoming_assignments/{name}/{n}"] = r
+        finally:
+            db.close()
+            remove_db(path)
+
+    meta = run_metadata(argv)
+    meta.update({"seed": args.seed})
+    write_results(args.out, results, meta)
+    print_table(results)
+    print()
+    for name, r in results.items():
+        print(f"{name}: peak {r['peak_kib']} KiB ({r['bytes_per_row']} B/row)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# benchmarks/run.py
+
+"""
+Core benchmark suite.
+
+    python -m benchmarks.run                              # 100 / 10k / 100k items
+    python -m benchmarks.run --sizes 100,10000 --out bench.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.15
+
+Exits with status 1 when any case regresses past the threshold against the baseline.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from sqlalchemy import insert
+
+from app.database import analytics, crud, models, read_model, search
+from app.mcp_server import tools
+from app.mcp_server.server import json_rpc_response, serialize_mcp_result
+from benchmarks import generators
+from benchmarks.harness import (
+    compare, load_results, measure, print_comparison, print_table,
+    remove_db, run_metadata, temp_session, write_results,
+)
+
+RANGES = ["today", "48h", "week"]
+HOURS = {"today": 24, "48h": 48, "week": 168}
+FEED_MAX = 2000  # feed posts per size; a real home feed sync sees a few pages
+GRADES_MAX = 50000  # grade rows per size; years of grades across every course
+
+
+def bench_upsert(n: int, items: list[dict], repeat: int, results: dict):
+    state = {}
+
+    def cold_setup():
+        state["db"], state["path"] = temp_session()
+
+    def teardown():
+        state["db"].close()
+        remove_db(state["path"])
+
+    results[f"upsert_calendar_events/cold/{n}"] = measure(
+        lambda: crud.upsert_calendar_events(state["db"], items),
+        repeat=repeat, setup=cold_setup, teardown=teardown, items=n,
+    )
+
+    db, path = temp_session()
+    crud.upsert_calendar_events(db, items)
+    try:
+        results[f"upsert_calendar_events/warm/{n}"] = measure(
+            lambda: crud.upsert_calendar_events(db, items), repeat=repeat, items=n,
+        )
+    finally:
+        db.close()
+        remove_db(path)
+
+
+def bench_reads(n: int, items: list[dict], repeat: int, results: dict):
+    db, path = temp_session()
+    try:
+        crud.upsert_calendar_events(db, items)
+        results[f"read_model/rebuild/{n}"] = measure(lambda: read_model.refresh(db), repeat=repeat, items=n)
+        problems = read_model.verify(db)
+        if problems:
+            raise AssertionError(f"read model inconsistent with database: {problems[:5]}")
+        for r in RANGES:
+            results[f"upcoming_assignments/{r}/{n}"] = measure(
+                lambda: crud.upcoming_assignments(db, window_hours=HOURS[r], limit=50),
+                repeat=repeat,
+            )
+            now = datetime.now(timezone.utc)
+            results[f"upcoming_assignments/sql/{r}/{n}"] = measure(
+                lambda: crud.upcoming_assignments_sql(db, now, now + timedelta(hours=HOURS[r]), limit=50),
+                repeat=repeat,
+            )
+            results[f"call_tool/briefing.get/{r}/{n}"] = measure(
+                lambda: tools.call_tool("briefing.get", {"range": r}, db), repeat=repeat,
+            )
+            # Mirror what FastAPI does with the dict the /mcp route returns.
+            result_object = tools.call_tool("briefing.get", {"range": r}, db)
+
+            def serialize():
+                payload = json_rpc_response(1, serialize_mcp_result(result_object))
+                return JSONResponse(content=jsonable_encoder(payload)).body
+
+            results[f"mcp_serialize/tools.call/{r}/{n}"] = measure(serialize, repeat=repeat)
+        page = tools.call_tool("timeline.get", {"range": "week", "limit": 20}, db).structuredContent
+        results[f"call_tool/timeline.get/week/{n}"] = measure(
+            lambda: tools.call_tool("timeline.get", {"range": "week", "limit": 20}, db), repeat=repeat,
+        )
+        if page["nextCursor"]:
+            results[f"call_tool/timeline.get/next_page/{n}"] = measure(
+                lambda: tools.call_tool("timeline.get", {"cursor": page["nextCursor"]}, db), repeat=repeat,
+            )
+        for q in ("gatsby essay", "field trip", "projectile"):
+            results[f"search/{q.replace(' ', '_')}/{n}"] = measure(
+                lambda: search.search(db, q, limit=10), repeat=repeat,
+            )
+    finally:
+        db.close()
+        remove_db(path)
+
+
+def bench_feed(n: int, seed: int, repeat: int, results: dict):
+    """Feed ingest: first sight of every post (all sanitized) vs a steady-state resync."""
+    from app.schoology_client.sanitize import HtmlSanitizer
+    updates = generators.make_feed_updates(n, seed=seed)
+    state = {}
+
+    def cold_setup():
+        state["db"], state["path"] = temp_session()
+        state["sanitizer"] = HtmlSanitizer(workers=0)
+
+    def teardown():
+        state["db"].close()
+        remove_db(state["path"])
+
+    results[f"upsert_feed_updates/cold/{n}"] = measure(
+        lambda: crud.upsert_feed_updates(state["db"], updates, state["sanitizer"]),
+        repeat=repeat, setup=cold_setup, teardown=teardown, items=n,
+    )
+    db, path = temp_session()
+    sanitizer = HtmlSanitizer(workers=0)
+    crud.upsert_feed_updates(db, updates, sanitizer)
+    try:
+        results[f"upsert_feed_updates/warm/{n}"] = measure(
+            lambda: crud.upsert_feed_updates(db, updates, sanitizer), repeat=repeat, items=n,
+        )
+    finally:
+        db.close()
+        remove_db(path)
+
+
+def bench_grades(n: int, seed: int, repeat: int, results: dict):
+    """Grade analytics: a rebuild after a sync vs a cached dashboard read."""
+    db, path = temp_session()
+    try:
+        db.execute(insert(models.Grade), generators.make_grades(n, seed=seed))
+        db.commit()
+        results[f"grade_analytics/rebuild/{n}"] = measure(lambda: analytics.load(db), repeat=repeat, items=n)
+        analytics.get(db)
+        results[f"grades.dashboard/cached/{n}"] = measure(
+            lambda: tools.call_tool("grades.dashboard", {}, db), repeat=repeat,
+        )
+    finally:
+        db.close()
+        remove_db(path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000", help="comma-separated calendar sizes")
+    parser.add_argument("--type-mix", default=None, help="e.g. 'assignment=0.6,assessment=0.2,event=0.2'")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--upsert-repeat", type=int, default=3, help="samples for the (slow) upsert cases")
+    parser.add_argument("--out", default="bench_results.json", help="where to write machine-readable results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", help="also write results to this path as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    mix = generators.parse_type_mix(args.type_mix)
+    results: dict[str, dict] = {}
+
+    for n in sizes:
+        print(f"Generating {n} calendar items...", file=sys.stderr)
+        items = generators.make_calendar_items(n, seed=args.seed, type_mix=mix)
+        bench_upsert(n, items, args.upsert_repeat, results)
+        bench_reads(n, items, args.repeat, results)
+        bench_feed(min(n, FEED_MAX), args.seed, args.upsert_repeat, results)
+        bench_grades(min(n, GRADES_MAX), args.seed, args.repeat, results)
+
+    meta = run_metadata(argv)
+    meta.update({"sizes": sizes, "type_mix": mix, "seed": args.seed})
+    write_results(args.out, results, meta)
+    if args.save_baseline:
+        write_results(args.save_baseline, results, meta)
+    print_table(results)
+    print(f"\nResults written to {args.out}")
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), threshold=args.threshold)
+        print(f"\nComparison against {args.baseline} (threshold {args.threshold:.0%}):")
+        print_comparison(rows)
+        if any(r["regressed"] for r in rows):
+            print(json.dumps([r for r in rows if r["regressed"]], indent=2), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# benchmarks/sync_pipeline.py
+
+"""
+Full sync against a fake Schoology with injected latency: overlapped pipeline vs
+the same stages run back to back.
+
+    python -m benchmarks.sync_pipeline --courses 12 --latency-ms 80 --out sync.json
+
+Every run starts from an empty database, so the writer does real inserts. The
+report has the wall time of each mode plus each stage's busy and blocked time;
+with overlap the wall time should approach the slowest stage instead of the sum.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.scheduler.sync_job import COURSE_FETCH_CONCURRENCY, sync_schoology_data
+from benchmarks.generators import (
+    COURSES,
+    make_calendar_items,
+    make_feed_updates,
+    make_grades,
+    make_materials_html,
+)
+from benchmarks.harness import measure, print_table, remove_db, run_metadata, temp_session, write_results
+
+
+class FakeClient:
+    """Returns pre-built payloads after sleeping `latency` seconds, like a slow Schoology."""
+
+    def __init__(self, course_ids: list[int], latency: float, calendar: int, grades: int,
+                 feed: int, materials: int, seed: int):
+        now = datetime.now(timezone.utc)
+        self.latency = latency
+        self.calendar = make_calendar_items(calendar, seed=seed, now=now)
+        self.feed = make_feed_updates(feed, seed=seed, now=now)
+        self.grades, self.materials = {}, {}
+        names = dict(COURSES)
+        for n, cid in enumerate(course_ids):
+            rows = make_grades(grades, seed=seed + n, now=now)
+            for row in rows:  # generator ids restart per call; keep them unique across courses
+                row.update(course_id=cid, course_name=names.get(cid, f"Course {cid}"),
+                           assignment_id=row["assignment_id"] + n * 1_000_000)
+            self.grades[cid] = rows
+            self.materials[cid] = make_materials_html(cid, n_items=materials, seed=seed + n)
+
+    def get_calendar_events(self, start_ts: int, end_ts: int):
+        time.sleep(self.latency)
+        return self.calendar
+
+    def get_feed_updates(self, pages: int = 1):
+        time.sleep(self.latency * pages)
+        return self.feed
+
+    def get_grades(self, course_id: int):
+        time.sleep(self.latency)
+        return self.grades[course_id]
+
+    def get_course_materials_html(self, course_id: int):
+        time.sleep(self.latency)
+        return self.materials[course_id]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=len(COURSES))
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--calendar", type=int, default=400)
+    parser.add_argument("--grades", type=int, default=150, help="grades per course")
+    parser.add_argument("--feed", type=int, default=100)
+    parser.add_argument("--materials", type=int, default=80, help="materials rows per course")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_sync_pipeline.json")
+    args = parser.parse_args(argv)
+
+    course_ids = [7001 + i for i in range(args.courses)]
+    os.environ["SCHOOLOGY_COURSE_IDS"] = ",".join(map(str, course_ids))
+    client = FakeClient(course_ids, args.latency_ms / 1000, args.calendar, args.grades,
+                        args.feed, args.materials, args.seed)
+
+    results: dict[str, dict] = {}
+    stages: dict[str, dict] = {}
+    for mode, overlap in (("sequential", False), ("pipelined", True)):
+        state = {}
+
+        def setup():
+            state["db"], state["path"] = temp_session()
+
+        def teardown():
+            state["db"].close()
+            remove_db(state["path"])
+
+        def run():
+            result = sync_schoology_data(state["db"], client=client, overlap=overlap)
+            if not result["ok"]:
+                raise RuntimeError(result["error"])
+            stages[mode] = result["stages"]
+
+        print(f"Running {mode} sync x{args.repeat}...", file=sys.stderr)
+        results[f"sync/{mode}"] = measure(run, repeat=args.repeat, setup=setup, teardown=teardown)
+        results[f"sync/{mode}"]["stages"] = stages[mode]
+
+    meta = run_metadata(argv)
+    meta.update({"seed": args.seed, "courses": args.courses, "latency_ms": args.latency_ms,
+                 "fetch_workers": COURSE_FETCH_CONCURRENCY})
+    write_results(args.out, results, meta)
+    print_table(results)
+    print()
+    for mode, report in stages.items():
+        print(f"{mode}: wall {report['wall_ms']} ms")
+        for name in ("fetch", "parse", "write"):
+            s = report[name]
+            print(f"  {name:<6} busy {s['busy_ms']:>8} ms  blocked {s['blocked_ms']:>8} ms  "
+                  f"wall {s['wall_ms']:>8} ms  items {s['items']}  batches {s['batches']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,47 @@
 # exp.py
+"""
+Bundle the project's source files into one text blob (for pasting into a chat).
+
+    python exp.py                   # whole project -> copy.txt
+    python exp.py -o -              # stream to stdout
+    python exp.py --changed         # only files changed since the last bundle
+    python exp.py --clipboard       # copy to the clipboard (needs pyperclip)
+
+Files are listed with `git ls-files` (so .gitignore is honoured), falling back to a
+directory walk that applies the root .gitignore. A per-file cache (.exp_cache.json)
+keeps the size, mtime and content hash of every file, so --changed never opens a
+file whose stat hasn't changed, and binary verdicts aren't recomputed.
+Files are read by a thread pool and written out in order as they arrive. Secret-
+bearing files (.env*, keys, certificates) are redacted.
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
 import os
-import pyperclip
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
 
 # --- Configuration ---
 # Directories to completely ignore. Add any others you need.
 EXCLUDED_DIRS = {
-    '.expo', 
-    '.vscode', 
-    'node_modules', 
-    '__pycache__', 
+    '.expo',
+    '.vscode',
+    'node_modules',
+    '__pycache__',
     '.git',
     'assets' # Excluding assets folder as it contains binary images/fonts
 }
 
 # Specific individual files to ignore
 EXCLUDED_FILES = {
-    'package-lock.json', 
+    'package-lock.json',
     '.gitignore',
-    'exp.py' # Ignore the script itself
+    'exp.py', # Ignore the script itself
+    'copy.txt',
+    '.exp_cache.json',
 }
 
 # File extensions to ignore (mostly binary or non-essential files)
@@ -25,73 +49,264 @@ EXCLUDED_EXTENSIONS = {
     '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp',
     '.ttf', '.otf', '.woff', '.woff2',
     '.ico',
-    '.zip', '.tar', '.gz'
+    '.zip', '.tar', '.gz',
+    '.db', '.sqlite', '.sqlite3',
 }
+
+# Files whose values must never leave the machine. .env-style files keep their keys.
+SECRET_ENV_PATTERNS = ('.env', '.env.*', '*.env')
+SECRET_FILE_PATTERNS = ('*.pem', '*.key', '*.p12', '*.pfx', 'id_rsa*', 'id_ed25519*', '*.keystore')
+
+MAX_FILE_BYTES = 256 * 1024
+CACHE_FILE = '.exp_cache.json'
+BLOCK_SEPARATOR = "\n\n\n"
 # --- End of Configuration ---
 
-def gather_project_context():
-    """
-    Traverses the project directory, gathers relevant source file contents,
-    and returns a single formatted string.
-    """
-    output_blocks = []
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-
-    print("Starting file traversal...")
-
-    for root, dirs, files in os.walk(script_dir, topdown=True):
-        # Modify dirs in-place to prevent os.walk from descending into excluded directories
-        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-        
-        for filename in sorted(files):
-            # Check against exclusion lists
-            if filename in EXCLUDED_FILES:
-                continue
-            if any(filename.endswith(ext) for ext in EXCLUDED_EXTENSIONS):
-                continue
-
-            file_path = os.path.join(root, filename)
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # Create a clean, relative path for the header
-                relative_path = os.path.relpath(file_path, script_dir)
-                display_path = relative_path.replace(os.sep, '/')
-                
-                # Format the block for this file
-                block = f"{display_path}\n----\n{content}\n\n______________"
-                output_blocks.append(block)
-                print(f"  + Added: {display_path}")
-
-            except Exception as e:
-                print(f"  - Skipped (error reading): {file_path} | Reason: {e}")
-
-    # Join all the individual file blocks into one large string
-    return "\n\n\n".join(output_blocks)
+ROOT = os.path.dirname(os.path.abspath(__file__))
 
-if __name__ == "__main__":
-    print("Gathering project context. This may take a moment...")
-    
-    final_string = gather_project_context()
-    
-    if final_string:
+
+def log(msg: str):
+    print(msg, file=sys.stderr)
+
+
+def _is_excluded(rel_path: str) -> bool:
+    parts = rel_path.split('/')
+    if any(p in EXCLUDED_DIRS for p in parts[:-1]):
+        return True
+    name = parts[-1]
+    return name in EXCLUDED_FILES or os.path.splitext(name)[1].lower() in EXCLUDED_EXTENSIONS
+
+
+def _git_files(root: str) -> list[str] | None:
+    """Tracked plus untracked-but-not-ignored files, or None outside a git checkout."""
+    try:
+        out = subprocess.run(
+            ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            cwd=root, capture_output=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    files = {f for f in out.decode('utf-8', 'surrogateescape').split('\0') if f}
+    # Deleted-but-still-tracked files show up in --cached; skip them.
+    return sorted(f for f in files if os.path.isfile(os.path.join(root, f)))
+
+
+def _gitignore_rules(root: str) -> list[tuple[str, bool, bool]]:
+    """(pattern, negated, dir_only) from the root .gitignore."""
+    rules = []
+    try:
+        with open(os.path.join(root, '.gitignore'), encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line.strip() or line.startswith('#'):
+                    continue
+                negated = line.startswith('!')
+                line = line[1:] if negated else line
+                dir_only = line.endswith('/')
+                rules.append((line.rstrip('/'), negated, dir_only))
+    except FileNotFoundError:
+        pass
+    return rules
+
+
+def _ignored(rel_path: str, is_dir: bool, rules) -> bool:
+    ignored = False
+    for pattern, negated, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if '/' in pattern:  # anchored to the root
+            hit = fnmatch.fnmatch(rel_path, pattern.lstrip('/').replace('**/', '*'))
+        else:
+            hit = fnmatch.fnmatch(rel_path.rsplit('/', 1)[-1], pattern)
+        if hit:
+            ignored = not negated
+    return ignored
+
+
+def _walk_files(root: str) -> list[str]:
+    rules = _gitignore_rules(root)
+    found = []
+    for dirpath, dirs, files in os.walk(root, topdown=True):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+        rel_dir = '' if rel_dir == '.' else rel_dir + '/'
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not _ignored(rel_dir + d, True, rules))
+        found += [rel_dir + f for f in files if not _ignored(rel_dir + f, False, rules)]
+    return sorted(found)
+
+
+def list_files(root: str) -> list[str]:
+    files = _git_files(root)
+    if files is None:
+        files = _walk_files(root)
+    return [f for f in files if not _is_excluded(f)]
+
+
+def _matches(name: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def _redact_env(text: str) -> str:
+    out = []
+    for line in text.splitlines():
+        key, sep, _ = line.partition('=')
+        if sep and not line.lstrip().startswith('#'):
+            out.append(f"{key}=<redacted>")
+        else:
+            out.append(line)
+    return "\n".join(out)
+
+
+def _read(root: str, rel_path: str, max_bytes: int) -> dict:
+    """Read one file and decide how it appears in the bundle."""
+    try:
+        return _read_file(os.path.join(root, rel_path), rel_path, max_bytes)
+    except OSError as e:  # deleted since listing, unreadable, ...
+        return {'size': None, 'mtime_ns': None, 'sha256': None, 'kind': 'error',
+                'text': f"[skipped: {e.strerror or e}]"}
+
+
+def _read_file(path: str, rel_path: str, max_bytes: int) -> dict:
+    st = os.stat(path)
+    entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    name = rel_path.rsplit('/', 1)[-1]
+    if _matches(name, SECRET_FILE_PATTERNS):
+        entry.update(sha256=None, kind='secret', text=f"[redacted: {st.st_size} bytes]")
+        return entry
+    with open(path, 'rb') as f:
+        data = f.read(max_bytes + 1)
+    truncated = len(data) > max_bytes
+    if truncated:
+        # Only the head was read, so there is no whole-file hash to compare against.
+        data = data[:max_bytes]
+        entry['sha256'] = None
+    else:
+        entry['sha256'] = hashlib.sha256(data).hexdigest()
+    if b'\0' in data[:8192]:
+        entry.update(kind='binary', text=f"[skipped: binary, {st.st_size} bytes]")
+        return entry
+    text = data.decode('utf-8', errors='ignore')
+    if _matches(name, SECRET_ENV_PATTERNS):
+        entry.update(kind='env', text=_redact_env(text))
+    else:
+        entry.update(kind='text', text=text)
+    if truncated:
+        entry['kind'] = 'truncated' if entry['kind'] == 'text' else entry['kind']
+        entry['text'] += f"\n[truncated: first {max_bytes} of {st.st_size} bytes]"
+    return entry
+
+
+def _ordered_parallel(fn, items: list, workers: int) -> Iterator:
+    """Like pool.map, but with a bounded read-ahead so memory stays flat on big trees."""
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        it = iter(items)
+        for item in it:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                break
+        for item in it:
+            yield pending.pop(0).result()
+            pending.append(pool.submit(fn, item))
+        for fut in pending:
+            yield fut.result()
+
+
+def load_cache(root: str) -> dict:
+    try:
+        with open(os.path.join(root, CACHE_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(root: str, cache: dict):
+    tmp = os.path.join(root, CACHE_FILE + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp, os.path.join(root, CACHE_FILE))
+
+
+def bundle(out, root: str = ROOT, changed_only: bool = False, max_bytes: int = MAX_FILE_BYTES,
+           workers: int = 8) -> dict:
+    """Write the bundle to the text stream `out`; returns counts."""
+    cache = load_cache(root)
+    files = list_files(root)
+
+    def stat_unchanged(rel_path: str) -> bool:
+        old = cache.get(rel_path)
+        if not old:
+            return False
+        try:
+            st = os.stat(os.path.join(root, rel_path))
+        except OSError:
+            return False
+        return old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns
+
+    to_read = [f for f in files if not (changed_only and stat_unchanged(f))]
+    new_cache = {f: cache[f] for f in files if f not in to_read}
+    stats = {'files': len(files), 'read': len(to_read), 'written': 0, 'redacted': 0, 'skipped': 0,
+             'truncated': 0}
+
+    first = True
+    for rel_path, entry in zip(to_read, _ordered_parallel(lambda f: _read(root, f, max_bytes), to_read, workers)):
+        text = entry.pop('text')
+        old = cache.get(rel_path)
+        if entry['kind'] != 'error':  # unreadable files are retried next run
+            new_cache[rel_path] = entry
+        if changed_only and old and entry['sha256'] is not None and old.get('sha256') == entry['sha256']:
+            continue  # touched but identical
+        if entry['kind'] in ('secret', 'env'):
+            stats['redacted'] += 1
+        elif entry['kind'] in ('binary', 'error'):
+            stats['skipped'] += 1
+        elif entry['kind'] == 'truncated':
+            stats['truncated'] += 1
+        out.write(("" if first else BLOCK_SEPARATOR) + f"{rel_path}\n----\n{text}\n\n______________")
+        first = False
+        stats['written'] += 1
+
+    if changed_only:
+        removed = sorted(set(cache) - set(files))
+        if removed:
+            out.write(("" if first else BLOCK_SEPARATOR) + "Removed since last bundle:\n" + "\n".join(removed))
+        stats['removed'] = len(removed)
+    save_cache(root, new_cache)
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', default='copy.txt', help="output file, or '-' for stdout")
+    parser.add_argument('--changed', action='store_true', help='only files changed since the last run')
+    parser.add_argument('--clipboard', action='store_true', help='copy the bundle to the clipboard instead')
+    parser.add_argument('--max-bytes', type=int, default=MAX_FILE_BYTES, help='include only the first this many bytes of larger files')
+    parser.add_argument('--workers', type=int, default=8, help='parallel file readers')
+    args = parser.parse_args(argv)
+
+    if args.clipboard:
+        import io
+        import pyperclip
+        buf = io.StringIO()
+        stats = bundle(buf, changed_only=args.changed, max_bytes=args.max_bytes, workers=args.workers)
         try:
-            pyperclip.copy(final_string)
-            print("\n✅ Success! Project context has been copied to your clipboard.")
+            pyperclip.copy(buf.getvalue())
         except pyperclip.PyperclipException:
-            print("\n❌ Pyperclip Error: Could not access the clipboard.")
-            print("This can happen in environments without a GUI (like SSH).")
-            print("The script will now save the output to copy.txt for you to copy manually.")
-            try:
-                with open('copy.txt', 'w', encoding='utf-8') as f:
-                    f.write(final_string)
-                print("✅ Content saved to copy.txt")
-            except Exception as e:
-                print(f"❌ Error saving to copy.txt: {e}")
-                print("Falling back to printing the output:")
-                print("\n--- SCRIPT OUTPUT ---")
-                print(final_string)
+            log("❌ Pyperclip Error: Could not access the clipboard. Use -o FILE instead.")
+            return 1
+        log(f"✅ Copied {stats['written']} file(s) to the clipboard.")
+        return 0
+
+    if args.output == '-':
+        stats = bundle(sys.stdout, changed_only=args.changed, max_bytes=args.max_bytes, workers=args.workers)
     else:
-        print("\n⚠️ No files were found to copy. Check your EXCLUDED_DIRS and EXCLUDED_FILES configuration.")
\ No newline at end of file
+        with open(args.output, 'w', encoding='utf-8') as f:
+            stats = bundle(f, changed_only=args.changed, max_bytes=args.max_bytes, workers=args.workers)
+    log(f"✅ {stats['written']} file(s) written ({stats['read']} of {stats['files']} read, "
+        f"{stats['redacted']} redacted, {stats['truncated']} truncated, {stats['skipped']} skipped)"
+        + ("" if args.output == '-' else f" to {args.output}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
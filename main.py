@@ -1,18 +1,24 @@
 # main.py
 
-import uvicorn
+from app import startup  # first, so its clock covers every import below
+
 import os
 import logging
-from app.mcp_server.server import app
+
+# Configure logging before importing the app: a module-level logging.error() during
+# import would otherwise install a default WARNING-level handler first.
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [%(threadName)s] - %(message)s'
+)
+
+with startup.phase("import_uvicorn"):
+    import uvicorn
+with startup.phase("import_app"):
+    from app.mcp_server.server import app
 
 def main():
     """Main entry point to run the application."""
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - [%(threadName)s] - %(message)s'
-    )
-
     # Get host and port from environment, with defaults
     # Note: load_dotenv() is now called inside the lifespan manager
     host = os.getenv("APP_HOST", "0.0.0.0")
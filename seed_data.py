@@ -6,6 +6,7 @@ Run this once to populate the database with sample assignments.
 
 from app.database.database import SessionLocal, init_db
 from app.database.models import Assignment
+from app.database.derived import apply_to_assignment
 from datetime import datetime, timedelta, timezone
 
 def seed_sample_data():
@@ -43,6 +44,7 @@ def seed_sample_data():
         ]
         
         for assignment in sample_assignments:
+            apply_to_assignment(assignment)
             db.add(assignment)
         
         db.commit()
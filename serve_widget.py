@@ -2,14 +2,19 @@
 """
 Simple static file server for the widget assets.
 Run this script to serve your built React widget on localhost:8080
+
+Serves pre-compressed (gzip/brotli) variants with long-lived cache headers for the
+hashed files, one thread per connection (see app/mcp_server/assets.py).
 """
 
-import http.server
-import socketserver
-import os
+import logging
 import sys
 from pathlib import Path
 
+from app.mcp_server.assets import serve
+
+PORT = 8080
+
 def main():
     # Check if dist folder exists
     dist_path = Path("web/briefing-widget/dist")
@@ -17,32 +22,9 @@ def main():
         print("❌ Error: dist folder not found at web/briefing-widget/dist")
         print("Please run: cd web/briefing-widget && npm run build")
         sys.exit(1)
-    
-    # Change to dist directory
-    os.chdir(dist_path)
-    
-    PORT = 8080
-    
-    class Handler(http.server.SimpleHTTPRequestHandler):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, directory=str(dist_path), **kwargs)
-        
-        def end_headers(self):
-            # Add CORS headers for ChatGPT
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            super().end_headers()
-    
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"🚀 Widget server running at http://localhost:{PORT}")
-        print(f"📁 Serving files from: {dist_path.absolute()}")
-        print("Press Ctrl+C to stop")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n👋 Widget server stopped")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    serve(str(dist_path), port=PORT)
 
 if __name__ == "__main__":
     main()
-